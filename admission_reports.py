@@ -0,0 +1,183 @@
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from program_store import ProgramStore
+
+# Converts the nested 'admission_reports' lists in program_data.json into one
+# typed columnar table. Reports are flattened in a single pass and every field
+# is then parsed column-wise with pandas' vectorized regex methods.
+
+# Source keys written by offer_scraper.scrape_admission_reports_dom and offer_network.report_from_api
+REPORT_TIME = '报告时间'
+DEGREE_MAJOR = '学位/专业'
+PROJECT = '项目'
+TITLE = '标题'
+TERM = '学期'
+RESULT = '录取结果'
+UNDERGRAD_SCHOOL = '本科学校名称'
+UNDERGRAD_TIER = '本科学校档次'
+UNDERGRAD_MAJOR = '本科专业'
+UNDERGRAD_GPA = '本科成绩和算法，排名'
+
+# "3 个月前", "2 天前", "1 年前" relative to the scrape time
+RELATIVE_TIME_PATTERN = r'(?P<value>\d+)\s*(?P<unit>秒|分钟|小时|天|周|个月|月|年)\s*前'
+RELATIVE_UNIT_DAYS = {'秒': 1 / 86400, '分钟': 1 / 1440, '小时': 1 / 24, '天': 1, '周': 7, '个月': 30.44, '月': 30.44, '年': 365.25}
+TERM_PATTERN = r'(?P<year>\d{4})\s*(?P<season>Fall|Spring|Summer|Winter)?'
+DEGREE_PATTERN = r'^(?P<degree>[^\n]+)\n?(?P<major>.*)$'
+# "邮件/AD无奖\n2024-03-10"; the channel can be empty ("/AD无奖"), and the decision is a whole word
+# ("Reject" is not "Rej" with funding "ect") though funding in Chinese follows it without a space
+RESULT_PATTERN = (
+    r'^(?P<channel>[^/\n]*)/(?P<decision>AD|Offer|Reject|Rej|WaitList|Waitlist|Waiting|Defer|Interview|[A-Za-z]+)(?![A-Za-z])'
+    r'(?P<funding>[^\n]*)(?:\n(?P<date>\d{4}-\d{1,2}-\d{1,2}))?'
+)
+# Multi-part scores are written as "total||part||part"; every numeric part is matched
+SCORE_PART_PATTERN = r'(?:^|\|\|)\s*(?P<value>\d+(?:\.\d+)?)'
+
+COLUMNS = [
+    'Program ID', 'Program Name', 'University', 'report_index', 'scraped_at',
+    'report_date', 'term_year', 'term_season', 'degree', 'major', 'project', 'title',
+    'channel', 'decision', 'funding', 'decision_date',
+    'undergrad_school', 'undergrad_tier', 'undergrad_major', 'gpa',
+    'toefl', 'ielts', 'gre', 'gmat',
+]
+
+
+def flatten_reports(programs, default_scraped_at=None):
+    rows = []
+    for program in programs:
+        scraped_at = program.get('Scraped At') or default_scraped_at
+        for report_index, report in enumerate(program.get('admission_reports') or []):
+            row = dict(report)
+            row['Program ID'] = program.get('Program ID', '')
+            row['Program Name'] = program.get('Program Name', '')
+            row['University'] = program.get('University', '')
+            row['report_index'] = report_index
+            row['scraped_at'] = scraped_at
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _column(df, key):
+    if key in df.columns:
+        return df[key].astype('string').str.strip()
+    return pd.Series(pd.NA, index=df.index, dtype='string')
+
+
+def _column_containing(df, needle):
+    # Modal labels carry their help text after a newline ("托福/雅思\n总分+单项(...)"), so match on the prefix
+    for key in df.columns:
+        if isinstance(key, str) and key.split('\n')[0].startswith(needle):
+            return _column(df, key)
+    return pd.Series(pd.NA, index=df.index, dtype='string')
+
+
+def _score_parts(series):
+    parts = series.str.extractall(SCORE_PART_PATTERN)
+    values = pd.to_numeric(parts['value'], errors='coerce')
+    return values
+
+
+def _first_part(series):
+    first = pd.Series(np.nan, index=series.index, dtype='float64')
+    values = _score_parts(series)
+    if not values.empty:
+        firsts = values.groupby(level=0).first()
+        first.loc[firsts.index] = firsts
+    return first
+
+
+def _first_part_where(series, condition):
+    result = pd.Series(np.nan, index=series.index, dtype='float64')
+    values = _score_parts(series)
+    values = values[condition(values)]
+    if not values.empty:
+        firsts = values.groupby(level=0).first()
+        result.loc[firsts.index] = firsts
+    return result
+
+
+def resolve_report_dates(report_time, scraped_at):
+    scraped_at = pd.to_datetime(scraped_at, errors='coerce')
+    relative = report_time.str.extract(RELATIVE_TIME_PATTERN)
+    days = pd.to_numeric(relative['value'], errors='coerce') * relative['unit'].map(RELATIVE_UNIT_DAYS).astype('float64')
+    resolved = scraped_at - pd.to_timedelta(days, unit='D')
+    # Recent reports are sometimes shown as absolute dates already
+    absolute = pd.to_datetime(report_time.str.extract(r'(\d{4}-\d{1,2}-\d{1,2})')[0], errors='coerce')
+    return resolved.fillna(absolute).dt.normalize()
+
+
+def build_report_table(programs, default_scraped_at=None):
+    raw = flatten_reports(programs, default_scraped_at)
+    if raw.empty:
+        return pd.DataFrame(columns=COLUMNS)
+
+    table = pd.DataFrame(index=raw.index)
+    table['Program ID'] = _column(raw, 'Program ID')
+    table['Program Name'] = _column(raw, 'Program Name')
+    table['University'] = _column(raw, 'University')
+    table['report_index'] = raw['report_index'].astype('int32')
+    table['scraped_at'] = pd.to_datetime(raw['scraped_at'], errors='coerce')
+    table['report_date'] = resolve_report_dates(_column(raw, REPORT_TIME), table['scraped_at'])
+
+    term = _column(raw, TERM).str.extract(TERM_PATTERN)
+    table['term_year'] = pd.to_numeric(term['year'], errors='coerce').astype('Int16')
+    table['term_season'] = term['season'].astype('category')
+
+    degree = _column(raw, DEGREE_MAJOR).str.extract(DEGREE_PATTERN)
+    table['degree'] = degree['degree'].str.strip().astype('category')
+    table['major'] = degree['major'].str.strip().astype('category')
+    table['project'] = _column(raw, PROJECT)
+    table['title'] = _column(raw, TITLE)
+
+    result = _column(raw, RESULT).str.extract(RESULT_PATTERN)
+    table['channel'] = result['channel'].str.strip().replace('', pd.NA).astype('category')
+    table['decision'] = result['decision'].str.replace('Waitlist', 'WaitList', regex=False).astype('category')
+    table['funding'] = result['funding'].str.strip().replace('', pd.NA).astype('category')
+    table['decision_date'] = pd.to_datetime(result['date'], errors='coerce')
+
+    table['undergrad_school'] = _column(raw, UNDERGRAD_SCHOOL)
+    table['undergrad_tier'] = _column(raw, UNDERGRAD_TIER).astype('category')
+    table['undergrad_major'] = _column(raw, UNDERGRAD_MAJOR)
+    # "89||3.76||9/58": the GPA is the first part on a 4-point scale, percentages and ranks are skipped
+    table['gpa'] = _first_part_where(_column(raw, UNDERGRAD_GPA), lambda values: values <= 4.3)
+
+    # The same field holds TOEFL or IELTS; the total tells them apart
+    english = _first_part(_column_containing(raw, '托福/雅思'))
+    table['toefl'] = english.where(english > 9)
+    table['ielts'] = english.where(english <= 9)
+    test = _first_part(_column_containing(raw, 'GRE/GMAT'))
+    table['gre'] = test.where(test.between(260, 340))
+    table['gmat'] = test.where(test.between(200, 800) & ~test.between(260, 340))
+
+    return table[COLUMNS]
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python admission_reports.py <program_data.json|program_data.jsonl> [output.pkl] [scraped-at ISO time]")
+        sys.exit(1)
+    source = sys.argv[1]
+    output = sys.argv[2] if len(sys.argv) > 2 else 'admission_reports.pkl'
+    # Programs scraped before 'Scraped At' was recorded fall back to the file's modification time
+    default_scraped_at = sys.argv[3] if len(sys.argv) > 3 else datetime.fromtimestamp(os.path.getmtime(source)).isoformat(timespec='seconds')
+
+    if source.endswith('.jsonl'):
+        programs = list(ProgramStore(source))
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            programs = json.load(f)
+    table = build_report_table(programs, default_scraped_at)
+    table.to_pickle(output)
+    logging.info(f"Wrote {len(table)} admission reports from {len(programs)} programs to {output}")
+    logging.info(f"Decisions: {table['decision'].value_counts().to_dict()}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
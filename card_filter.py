@@ -0,0 +1,149 @@
+import ast
+import operator
+import re
+import sys
+
+# Filter expressions evaluated on the listing card, before any detail page is
+# opened, e.g.  applicants > 10 and tag == 'MS' and university != 'Columbia University'
+# The expression is parsed once with ast and compiled into nested closures; only
+# comparisons, and/or/not, names and literals are accepted, nothing is eval'd.
+
+# Filter name -> card field from offer_scraper.read_program_card
+FIELDS = {
+    'name': 'Program Name',
+    'university': 'University',
+    'department': 'Department',
+    'admissions': 'Admissions',
+    'applicants': 'Applicants',
+    'gpa': 'Median GPA',
+    'toefl': 'TOEFL',
+    'gre': 'GRE',
+    'tags': 'Tags',
+}
+NUMERIC_FIELDS = {'admissions', 'applicants', 'gpa', 'toefl', 'gre'}
+# 'tag' compares against each tag: tag == 'MS' is true when any tag is MS, tag != 'MS' when none is
+TAG = 'tag'
+CONSTANTS = {'none': None, 'true': True, 'false': False}
+
+COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+}
+
+
+class FilterError(ValueError):
+    pass
+
+
+def card_number(text):
+    # Card stats are shown as "12", "3.7", "1,024" or "N/A"
+    match = re.search(r'\d[\d,]*(?:\.\d+)?', text or '')
+    return float(match.group().replace(',', '')) if match else None
+
+
+def _value(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, int, float)):
+        value = node.value
+        return lambda card: value
+    if isinstance(node, ast.Name) and node.id in CONSTANTS:
+        value = CONSTANTS[node.id]
+        return lambda card: value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant):
+        value = -node.operand.value
+        return lambda card: value
+    if isinstance(node, (ast.List, ast.Tuple)):
+        items = [_value(item) for item in node.elts]
+        return lambda card: [item(card) for item in items]
+    if isinstance(node, ast.Name) and node.id in FIELDS:
+        key = FIELDS[node.id]
+        if node.id in NUMERIC_FIELDS:
+            return lambda card: card_number(card.get(key))
+        if node.id == 'tags':
+            return lambda card: card.get(key) or []
+        return lambda card: card.get(key)
+    raise FilterError(f"Unsupported expression: {ast.unparse(node)}")
+
+
+def _compare(left, op, right):
+    compare = COMPARISONS[type(op)]
+
+    def test(card):
+        a, b = left(card), right(card)
+        # A missing card value only equals none; ordering comparisons with it are false
+        if (a is None or b is None) and type(op) not in (ast.Eq, ast.NotEq):
+            return False
+        try:
+            return compare(a, b)
+        except TypeError:
+            return False
+    return test
+
+
+def _tag_compare(op, right):
+    if isinstance(op, ast.Eq):
+        return lambda card: right(card) in (card.get('Tags') or [])
+    if isinstance(op, ast.NotEq):
+        return lambda card: right(card) not in (card.get('Tags') or [])
+    if isinstance(op, ast.In):
+        return lambda card: any(tag in right(card) for tag in card.get('Tags') or [])
+    if isinstance(op, ast.NotIn):
+        return lambda card: not any(tag in right(card) for tag in card.get('Tags') or [])
+    raise FilterError("'tag' only supports ==, !=, in and not in")
+
+
+def _predicate(node):
+    if isinstance(node, ast.BoolOp):
+        parts = [_predicate(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            return lambda card: all(part(card) for part in parts)
+        return lambda card: any(part(card) for part in parts)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        inner = _predicate(node.operand)
+        return lambda card: not inner(card)
+    if isinstance(node, ast.Compare):
+        tests = []
+        left = node.left
+        # Chained comparisons (3 < applicants < 50) are split into pairs
+        for op, right in zip(node.ops, node.comparators):
+            if type(op) not in COMPARISONS:
+                raise FilterError(f"Unsupported comparison: {type(op).__name__}")
+            if isinstance(left, ast.Name) and left.id == TAG:
+                tests.append(_tag_compare(op, _value(right)))
+            else:
+                tests.append(_compare(_value(left), op, _value(right)))
+            left = right
+        return lambda card: all(test(card) for test in tests)
+    raise FilterError(f"Expected a comparison, got: {ast.unparse(node)}")
+
+
+def compile_filter(expression):
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError as e:
+        raise FilterError(f"Invalid filter {expression!r}: {e.msg}") from None
+    predicate = _predicate(tree.body)
+    predicate.expression = expression
+    return predicate
+
+
+def main():
+    # Try a filter against saved program data: python card_filter.py "applicants > 10 and tag == 'MS'" [program_data.json]
+    if len(sys.argv) < 2:
+        print("Usage: python card_filter.py <expression> [program_data.json]")
+        sys.exit(1)
+    import json
+    predicate = compile_filter(sys.argv[1])
+    with open(sys.argv[2] if len(sys.argv) > 2 else 'program_data.json', 'r', encoding='utf-8') as f:
+        programs = json.load(f)
+    kept = [program for program in programs if predicate(program)]
+    print(f"{len(kept)} of {len(programs)} programs pass {sys.argv[1]!r}")
+
+
+if __name__ == "__main__":
+    main()
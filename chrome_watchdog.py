@@ -0,0 +1,276 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import psutil
+
+# Keeps the scrapers' Chrome processes in check. A background thread sums the
+# RSS of each registered driver's process tree (chromedriver, Chrome and its
+# renderers), recycles drivers that grow past a memory cap, and reaps
+# automation Chrome/chromedriver processes whose owner is gone, e.g. after a
+# worker crashed or timed out before driver.quit(). Counts are logged and
+# written to chrome_watchdog.json when the watchdog stops.
+
+logger = logging.getLogger('chrome_watchdog')
+
+MEMORY_CAP_MB = 1024
+CHECK_SECONDS = 5
+REAP_SECONDS = 60
+STATS_FILE = 'chrome_watchdog.json'
+BROWSER_NAMES = ('chrome', 'chromium', 'chromium-browser', 'google-chrome', 'chromedriver')
+# Only Chrome started by chromedriver carries these; a person's own browser is never touched
+AUTOMATION_FLAGS = ('--enable-automation', '--test-type=webdriver')
+
+_watchdog = None
+
+
+def _name(process):
+    name = (process.info.get('name') if hasattr(process, 'info') else process.name()) or ''
+    return name.lower().removesuffix('.exe')
+
+
+def is_automation_process(process):
+    try:
+        name = _name(process)
+        if name == 'chromedriver':
+            return True
+        if name not in BROWSER_NAMES:
+            return False
+        cmdline = process.cmdline()
+        return any(arg.startswith(flag) for arg in cmdline for flag in AUTOMATION_FLAGS)
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return False
+
+
+def is_orphan(process):
+    # chromedriver whose parent (the Python process that started it) is gone, or automation Chrome with no chromedriver above it
+    try:
+        if _name(process) == 'chromedriver':
+            parent = process.parent()
+            # A parent started after the child is a reused PID, not the original owner
+            return parent is None or parent.pid <= 1 or parent.create_time() > process.create_time()
+        return not any(_name(ancestor) == 'chromedriver' for ancestor in process.parents())
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return False
+
+
+def kill_tree(process, timeout=3):
+    try:
+        processes = [process] + process.children(recursive=True)
+    except (psutil.NoSuchProcess, psutil.ZombieProcess):
+        return 0
+    for target in processes:
+        try:
+            target.terminate()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    _, alive = psutil.wait_procs(processes, timeout=timeout)
+    for target in alive:
+        try:
+            target.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return len(processes)
+
+
+def tree_rss(process):
+    total = 0
+    for target in [process] + process.children(recursive=True):
+        try:
+            total += target.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            pass
+    return total
+
+
+class ChromeWatchdog:
+    def __init__(self, memory_cap_mb=MEMORY_CAP_MB, check_seconds=CHECK_SECONDS, reap_seconds=REAP_SECONDS, stats_file=STATS_FILE):
+        self.memory_cap = memory_cap_mb * 2**20
+        self.check_seconds = check_seconds
+        self.reap_seconds = reap_seconds
+        self.stats_file = stats_file
+        # id(driver) -> {'driver', 'process', 'persistent', 'pids', 'rss'}
+        self.drivers = {}
+        self.recycle_requested = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.counts = {'registered': 0, 'released': 0, 'recycled': 0, 'killed': 0, 'reaped': 0, 'checks': 0, 'peak_rss_mb': 0}
+
+    def register(self, driver, persistent=False):
+        # persistent drivers are long-lived and recycled by their owner (needs_recycle);
+        # per-call drivers over the cap are killed outright
+        try:
+            process = psutil.Process(driver.service.process.pid)
+        except (AttributeError, psutil.NoSuchProcess):
+            return driver
+        with self.lock:
+            self.drivers[id(driver)] = {'driver': driver, 'process': process, 'persistent': persistent, 'pids': {process.pid}, 'rss': 0}
+            self.counts['registered'] += 1
+        return driver
+
+    def needs_recycle(self, driver):
+        with self.lock:
+            return id(driver) in self.recycle_requested
+
+    def release(self, driver, recycled=False):
+        # driver.quit(), then anything of its tree that survived it
+        with self.lock:
+            entry = self.drivers.pop(id(driver), None)
+            self.recycle_requested.discard(id(driver))
+            self.counts['released'] += 1
+            if recycled:
+                self.counts['recycled'] += 1
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"driver.quit() failed: {e}")
+        if entry is not None:
+            for pid in entry['pids']:
+                try:
+                    process = psutil.Process(pid)
+                    if is_automation_process(process):
+                        kill_tree(process)
+                        with self.lock:
+                            self.counts['reaped'] += 1
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+
+    def check(self):
+        with self.lock:
+            entries = list(self.drivers.items())
+        for key, entry in entries:
+            process = entry['process']
+            try:
+                entry['pids'] = {process.pid} | {child.pid for child in process.children(recursive=True)}
+                rss = tree_rss(process)
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                continue
+            entry['rss'] = rss
+            with self.lock:
+                self.counts['peak_rss_mb'] = max(self.counts['peak_rss_mb'], round(rss / 2**20))
+            if rss <= self.memory_cap:
+                continue
+            if entry['persistent']:
+                with self.lock:
+                    if key not in self.recycle_requested:
+                        self.recycle_requested.add(key)
+                        logger.warning(f"Driver {process.pid} uses {rss / 2**20:.0f} MiB; recycling it after its current page")
+            else:
+                # The owner's page load fails with it and the owner treats that page as not fetched
+                logger.warning(f"Driver {process.pid} uses {rss / 2**20:.0f} MiB; killing it")
+                killed = kill_tree(process)
+                with self.lock:
+                    self.drivers.pop(key, None)
+                    self.counts['killed'] += killed
+        with self.lock:
+            self.counts['checks'] += 1
+
+    def reap(self):
+        # Orphaned automation processes, never those of a registered driver
+        with self.lock:
+            owned = set().union(*(entry['pids'] for entry in self.drivers.values())) if self.drivers else set()
+        reaped = 0
+        for process in psutil.process_iter(['name']):
+            if process.pid in owned or not is_automation_process(process) or not is_orphan(process):
+                continue
+            logger.info(f"Reaping orphaned {_name(process)} process {process.pid}")
+            reaped += kill_tree(process)
+        with self.lock:
+            self.counts['reaped'] += reaped
+        return reaped
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, tracked=len(self.drivers),
+                        tracked_rss_mb=round(sum(entry['rss'] for entry in self.drivers.values()) / 2**20))
+
+    def export(self):
+        if not self.stats_file:
+            return
+        with open(self.stats_file + '.tmp', 'w') as f:
+            json.dump(self.stats(), f)
+        os.replace(self.stats_file + '.tmp', self.stats_file)
+
+    def _run(self):
+        last_reap = time.monotonic()
+        while not self.stop_event.wait(self.check_seconds):
+            try:
+                self.check()
+                if time.monotonic() - last_reap >= self.reap_seconds:
+                    self.reap()
+                    last_reap = time.monotonic()
+            except Exception as e:
+                logger.error(f"Chrome watchdog check failed: {e}")
+
+    def start(self):
+        # Leftovers of earlier runs are reaped before this run starts its own browsers
+        reaped = self.reap()
+        if reaped:
+            logger.info(f"Reaped {reaped} orphaned Chrome processes left by an earlier run")
+        self.thread = threading.Thread(target=self._run, name='chrome-watchdog', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.check_seconds + 5)
+        self.export()
+        logger.info(f"Chrome watchdog: {self.stats()}")
+
+
+def start_watchdog(**kwargs):
+    # One watchdog per process; later calls return the running one
+    global _watchdog
+    if _watchdog is None:
+        _watchdog = ChromeWatchdog(**kwargs).start()
+    return _watchdog
+
+
+def get_watchdog():
+    return _watchdog
+
+
+def stop_watchdog():
+    global _watchdog
+    if _watchdog is not None:
+        _watchdog.stop()
+        _watchdog = None
+
+
+def track(driver, persistent=False):
+    # Registers a new driver with the running watchdog, if there is one
+    return _watchdog.register(driver, persistent) if _watchdog is not None else driver
+
+
+def needs_recycle(driver):
+    return _watchdog is not None and _watchdog.needs_recycle(driver)
+
+
+def quit_driver(driver, recycled=False):
+    if _watchdog is not None:
+        _watchdog.release(driver, recycled)
+    else:
+        driver.quit()
+
+
+def main():
+    # Lists automation Chrome processes and their memory; with 'reap', kills the orphaned ones
+    reap = len(sys.argv) > 1 and sys.argv[1] == 'reap'
+    for process in psutil.process_iter(['name']):
+        if is_automation_process(process):
+            try:
+                print(f"{process.pid:>7} {_name(process):<14} {tree_rss(process) / 2**20:>8.0f} MiB{'  orphan' if is_orphan(process) else ''}")
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+    if reap:
+        logger.info(f"Reaped {ChromeWatchdog(stats_file=None).reap()} processes")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
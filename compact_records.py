@@ -0,0 +1,126 @@
+import json
+import logging
+import sys
+import tracemalloc
+
+# Compact in-memory form of the mastersportal program records that scraper.py
+# collects for a whole run. A dict per program repeats its 20 keys and its
+# University, Location, tags and disciplines in every record; a slotted record
+# keeps the keys once on the class and interns repeated strings so equal values
+# share one object. Records that are already in the ProgramStore can be spilled
+# down to their ID, so the list stays small however long the crawl runs.
+
+FIELDS = (
+    'Program ID', 'Title', 'University', 'Link', 'About', 'Degree Tags', 'Tuition Fee', 'Program Website',
+    'Duration', 'Ranking', 'Location', 'Program Type', 'Start Dates and Deadlines', 'Program Structure',
+    'GPA', 'IELTS', 'TOEFL', 'Other Requirements', 'Cost of Living', 'Disciplines',
+)
+# Short values that repeat across programs; long text (About) is left alone
+INTERNED_FIELDS = ('University', 'Location', 'Degree Tags', 'Disciplines', 'Duration', 'Program Type',
+                   'Tuition Fee', 'Ranking', 'GPA', 'IELTS', 'TOEFL', 'Cost of Living')
+_SLOTS = tuple(field.lower().replace(' ', '_') for field in FIELDS)
+_MISSING = object()
+
+
+def _intern(value):
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return tuple(sys.intern(item) if isinstance(item, str) else item for item in value)
+    return value
+
+
+class ProgramRecord:
+    __slots__ = _SLOTS + ('extra',)
+
+    def __init__(self, program):
+        for field, slot in zip(FIELDS, _SLOTS):
+            value = program.get(field, _MISSING)
+            if value is not _MISSING and field in INTERNED_FIELDS:
+                value = _intern(value)
+            setattr(self, slot, value)
+        # Fields added later (e.g. 'Duplicate Of') without a slot of their own
+        extra = {key: value for key, value in program.items() if key not in FIELDS}
+        self.extra = extra or None
+
+    def to_dict(self):
+        program = {}
+        for field, slot in zip(FIELDS, _SLOTS):
+            value = getattr(self, slot)
+            if value is not _MISSING:
+                program[field] = list(value) if isinstance(value, tuple) else value
+        if self.extra:
+            program.update(self.extra)
+        return program
+
+
+class ProgramList:
+    # Append-only list of programs; entries are ProgramRecords, or just the ID once spilled to the store
+    def __init__(self, store=None):
+        self.store = store
+        self.entries = []
+
+    @classmethod
+    def from_store(cls, store):
+        programs = cls(store)
+        programs.entries = list(store.index)
+        return programs
+
+    def append(self, program):
+        self.entries.append(ProgramRecord(program))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def __iter__(self):
+        for entry in self.entries:
+            if isinstance(entry, str):
+                yield self.store.get(entry)
+            else:
+                yield entry.to_dict()
+
+    def spill(self):
+        # Called after a checkpoint: records the store already holds are dropped from memory
+        spilled = 0
+        for position, entry in enumerate(self.entries):
+            if isinstance(entry, ProgramRecord) and entry.program_id in self.store:
+                self.entries[position] = entry.program_id
+                spilled += 1
+        return spilled
+
+    def in_memory(self):
+        return sum(1 for entry in self.entries if isinstance(entry, ProgramRecord))
+
+
+def measure(programs):
+    # Bytes allocated per program as plain dicts (as json.loads builds them) and as ProgramRecords
+    encoded = [json.dumps(program, ensure_ascii=False) for program in programs]
+    results = {}
+    for label, build in (('dict', lambda: [json.loads(line) for line in encoded]),
+                         ('record', lambda: [ProgramRecord(json.loads(line)) for line in encoded])):
+        tracemalloc.start()
+        built = build()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[label] = size / len(built)
+        del built
+    return results
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python compact_records.py <master_programs_store.jsonl|master_programs_final.csv>")
+        sys.exit(1)
+    from near_duplicates import load_programs
+    programs = load_programs(sys.argv[1])
+    sizes = measure(programs)
+    logging.info(f"{len(programs)} programs: {sizes['dict']:.0f} bytes per dict, {sizes['record']:.0f} bytes per compact record "
+                 f"({sizes['dict'] / sizes['record']:.2f}x); a spilled entry keeps only its ID")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
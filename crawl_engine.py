@@ -0,0 +1,262 @@
+import argparse
+import logging
+import time
+from collections import deque
+
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, NoSuchElementException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from offer_scraper import (
+    DetailWorkerPool, SESSION_FILE, check_login, generate_unique_id, random_delay, read_program_card,
+    save_to_csv, scrape_program_detail, setup_driver,
+)
+from card_filter import FilterError, compile_filter
+from chrome_watchdog import MEMORY_CAP_MB, quit_driver, start_watchdog, stop_watchdog
+from program_store import ProgramStore
+from scrape_logging import setup_logging, log_context
+from crawl_profiler import MODES as PROFILE_MODES, start_profiler, stop_profiler
+from span_trace import span, start_tracing, stop_tracing, traced
+
+# One crawl over any number of 1point3acres program lists. All sources run in
+# the same logged-in browser and share one set of seen program URLs, so a
+# program that appears in several lists has its detail page fetched once.
+# This is the entry point for the 1point3acres scrapers; offer_scraper.py
+# holds the page-level helpers it uses. The old per-list scripts map to:
+#   python crawl_engine.py --source datascience
+#   python crawl_engine.py --source favorites
+#   python crawl_engine.py --source datascience --filter "applicants >= 4 or applicants == none" --csv
+
+logger = logging.getLogger('crawl_engine')
+
+# Rough cost of one serial detail fetch (delays, page load, report modals) before any has been timed
+DETAIL_FETCH_SECONDS = 20
+
+# Durable store keyed on 'Program ID'; export to the old program_data.json with program_store.py
+STORE_FILE = 'program_data.jsonl'
+
+SOURCES = {
+    'datascience': {
+        'name': 'datascience',
+        'url': "https://offer.1point3acres.com/db/programs/DataScience-Analytics-MS-",
+        'card_selector': '.bg-white.text-\\#5E5E5E.shadow-card',
+    },
+    'favorites': {
+        'name': 'favorites',
+        'url': "https://offer.1point3acres.com/my/favorites",
+        'card_selector': '.bg-\\#E7EDEA\\/30.text-\\#5E5E5E.rounded-md',
+    },
+}
+
+DEFAULT_SOURCES = ('datascience',)
+
+
+def for_each_listing_page(driver, source, handle_page):
+    driver.get(source['url'])
+    logger.info(f"Waiting for {source['name']} to load completely...")
+    random_delay(30, 40)
+
+    page_number = 1
+
+    while True:
+        retry_count = 0
+        while retry_count < 3:
+            try:
+                WebDriverWait(driver, 30).until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, source['card_selector'])))
+                programs = driver.find_elements(By.CSS_SELECTOR, source['card_selector'])
+                handle_page(page_number, programs)
+                logger.info(f"Scraped {source['name']} page {page_number} - Total programs on this page: {len(programs)}")
+                break
+            except (TimeoutException, StaleElementReferenceException) as e:
+                logger.warning(f"Error on page {page_number}, retry {retry_count + 1}: {e}")
+                retry_count += 1
+                if retry_count == 3:
+                    logger.error(f"Failed to scrape page {page_number} after 3 attempts. Moving to next page.")
+                random_delay(3, 5)
+
+        # Check if there's a next page
+        next_button = driver.find_elements(By.CSS_SELECTOR, '.ant-pagination-next:not(.ant-pagination-disabled)')
+        if next_button:
+            random_delay()
+            next_button[0].click()
+            logger.info("Waiting for the next page to load...")
+            random_delay(8, 12)
+            page_number += 1
+        else:
+            logger.info(f"No more pages to scrape in {source['name']}.")
+            break
+
+
+class Crawl:
+    def __init__(self, driver, capture_network=False, workers=0, requests_per_minute=20, store=None):
+        self.driver = driver
+        self.store = store if store is not None else ProgramStore(STORE_FILE)
+        self.capture_network = capture_network
+        self.pool = DetailWorkerPool(driver, workers, requests_per_minute, capture_network) if workers > 0 else None
+        self.pending = deque()
+        # Program URL -> names of the sources that listed it
+        self.seen = {}
+        self.stats = {'cards': 0, 'duplicates': 0, 'filtered': 0, 'fetched': 0, 'changed': 0}
+        self.detail_seconds = 0.0
+
+    def handle_page(self, source, page_number, programs):
+        for program in programs:
+            with log_context(source=source['name'], phase='listing', page=page_number), span('listing.card', page=page_number):
+                try:
+                    program_info, program_url = read_program_card(program)
+                except (TimeoutException, NoSuchElementException) as e:
+                    logger.error(f"An error occurred while reading program card: {e}")
+                    continue
+                self.stats['cards'] += 1
+
+                key = program_url or (program_info.get('Program Name'), program_info.get('University'))
+                if key in self.seen:
+                    self.seen[key].add(source['name'])
+                    self.stats['duplicates'] += 1
+                    logger.info(f"Already scraped {program_info.get('Program Name')} this run; skipping")
+                    continue
+                # Evaluated on card data only, so a rejected program never opens a detail tab
+                if source.get('filter') and not source['filter'](program_info):
+                    self.stats['filtered'] += 1
+                    logger.info(f"Skipping program {program_info.get('Program Name')}: rejected by filter {getattr(source['filter'], 'expression', source['name'])!r}")
+                    continue
+                self.seen[key] = {source['name']}
+                program_info['Program ID'] = generate_unique_id(program_info, program_url)
+
+            if self.pool:
+                self.pending.append((source, self.pool.submit(program_info, program_url, page_number)))
+                self.save_completed()
+            else:
+                with log_context(source=source['name'], phase='program', page=page_number, program_id=program_url), span('program', program=program_url):
+                    self.fetch_serial(source, program_info, program_url)
+                random_delay(3, 6)
+
+    def fetch_serial(self, source, program_info, program_url):
+        started = time.monotonic()
+        try:
+            if program_url:
+                random_delay()
+                self.driver.execute_script("window.open('');")
+                self.driver.switch_to.window(self.driver.window_handles[-1])
+                try:
+                    scrape_program_detail(self.driver, program_info, program_url, self.capture_network)
+                finally:
+                    # Close the program details window and switch back to the listing window
+                    self.driver.close()
+                    self.driver.switch_to.window(self.driver.window_handles[0])
+        except Exception as e:
+            logger.error(f"An error occurred while extracting program info: {e}")
+            return
+        finally:
+            self.detail_seconds += time.monotonic() - started
+        self.save(source, program_info)
+
+    @traced('store.save')
+    def save(self, source, program_info):
+        self.stats['fetched'] += 1
+        # Upsert by Program ID: an unchanged program costs a hash comparison, a changed one a single appended line
+        if not self.store.upsert(program_info):
+            logger.info(f"Scraped program unchanged since last run: {program_info.get('Program Name', 'Unknown')}")
+            return
+        self.stats['changed'] += 1
+        if source.get('save_csv'):
+            save_to_csv(program_info)
+        logger.info(f"Scraped and saved program: {program_info.get('Program Name', 'Unknown')}")
+
+    def save_completed(self, wait=False):
+        # Parallel results are written in listing order, like the serial path
+        while self.pending and (wait or self.pending[0][1].done()):
+            source, future = self.pending.popleft()
+            program_info = future.result()
+            if program_info:
+                self.save(source, program_info)
+
+    def estimated_seconds_saved(self):
+        # Filtered programs times the average detail fetch seen this run; the pool overlaps workers' fetches
+        if self.pool:
+            fetches, seconds = self.pool.timing()
+            seconds /= self.pool.workers
+        else:
+            fetches, seconds = self.stats['fetched'], self.detail_seconds
+        average = seconds / fetches if fetches else DETAIL_FETCH_SECONDS
+        return self.stats['filtered'] * average
+
+    def run(self, sources):
+        try:
+            for source in sources:
+                try:
+                    for_each_listing_page(self.driver, source, lambda page_number, programs: self.handle_page(source, page_number, programs))
+                except Exception as e:
+                    logger.exception(f"An error occurred while scraping {source['name']}: {e}")
+        finally:
+            self.save_completed(wait=True)
+            if self.pool:
+                self.pool.close()
+        shared = sum(1 for names in self.seen.values() if len(names) > 1)
+        logger.info(f"Crawl finished: {self.stats}, {shared} programs listed by more than one source")
+        if self.stats['filtered']:
+            logger.info(f"Filters skipped {self.stats['filtered']} detail fetches, saving about {self.estimated_seconds_saved() / 60:.1f} min")
+        return self.stats
+
+
+def crawl(driver, sources, capture_network=False, workers=0, requests_per_minute=20, store=None):
+    return Crawl(driver, capture_network, workers, requests_per_minute, store).run(sources)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scrape 1point3acres program lists, program pages and admission reports')
+    parser.add_argument('--source', action='append', choices=sorted(SOURCES), help=f"program list to crawl; repeat for several (default: {', '.join(DEFAULT_SOURCES)})")
+    # --capture-network reads reports from Chrome's network log instead of clicking every 详情 modal
+    parser.add_argument('--capture-network', action='store_true')
+    parser.add_argument('--debug', action='store_true', help='enable sampled HTML dumps')
+    parser.add_argument('--workers', type=int, default=0, help='number of parallel detail browsers (0 = serial)')
+    parser.add_argument('--requests-per-minute', type=float, default=20, help='global cap on detail page loads in parallel mode')
+    parser.add_argument('--session', default=SESSION_FILE, help='saved login session (see session_store.py)')
+    parser.add_argument('--headless', action='store_true', help='run without a window or Chrome profile; requires a saved session')
+    parser.add_argument('--no-prompt', action='store_true', help='fail instead of waiting for a manual login')
+    parser.add_argument('--chrome-memory-cap', type=int, default=MEMORY_CAP_MB, help='MiB per browser (chromedriver, Chrome and renderers) before it is recycled (default: %(default)s)')
+    parser.add_argument('--trace', metavar='TRACE_JSON', help='record span timings and write a Chrome trace (Perfetto) plus a per-phase summary at exit')
+    parser.add_argument('--profile', choices=PROFILE_MODES, help='sample: all-thread flamegraphs (wall clock and on-CPU); cprofile: deterministic stats of the main and worker threads, for short runs')
+    parser.add_argument('--profile-out', default='profile', help='output path prefix for --profile (default: %(default)s); SIGUSR1 writes an interim profile')
+    parser.add_argument('--filter', help="card filter applied before opening detail pages, e.g. \"applicants > 10 and tag == 'MS'\" (see card_filter.py)")
+    parser.add_argument('--csv', action='store_true', help='also append new and changed programs to program_data.csv and admission_reports.csv')
+    args = parser.parse_args()
+
+    source_options = {'save_csv': args.csv}
+    if args.filter:
+        try:
+            source_options['filter'] = compile_filter(args.filter)
+        except FilterError as e:
+            parser.error(str(e))
+    sources = [dict(SOURCES[name], **source_options) for name in (args.source or DEFAULT_SOURCES)]
+    setup_logging(level=logging.DEBUG if args.debug else logging.INFO)
+    start_watchdog(memory_cap_mb=args.chrome_memory_cap)
+    if args.trace:
+        start_tracing(args.trace)
+    if args.profile:
+        start_profiler(args.profile, args.profile_out)
+    driver = setup_driver(args.capture_network, use_profile=not args.headless, headless=args.headless)
+
+    try:
+        if check_login(driver, args.session, interactive=not (args.headless or args.no_prompt)):
+            store = ProgramStore(STORE_FILE)
+            crawl(driver, sources, args.capture_network, args.workers, args.requests_per_minute, store)
+
+            if len(store):
+                logger.info(f"{len(store)} programs in {STORE_FILE}")
+            else:
+                logger.info("No data was scraped.")
+        else:
+            logger.error("Could not proceed with scraping due to login failure.")
+    except Exception as e:
+        logger.exception(f"An error occurred in the main function: {e}")
+    finally:
+        quit_driver(driver)
+        stop_watchdog()
+        stop_tracing()
+        stop_profiler()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import heapq
+import json
+import logging
+import math
+import os
+import pickle
+import re
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from university_resolver import UniversityResolver
+
+# Priority frontier for scraper.py's detail fetches. Discovered programs wait
+# in a heap ordered by a weighted score (discipline keywords in the title,
+# university ranking, staleness, closeness of the next application deadline),
+# so a run cut short by its time or page budget has fetched the most valuable
+# pages rather than whatever came first in listing order. The frontier is
+# pickled with the crawl state and picked up again on restart.
+
+FRONTIER_FILE = 'crawl_frontier.pkl'
+# Optional overrides for WEIGHTS, KEYWORDS, STALE_AFTER_DAYS, REFRESH_AFTER_DAYS and DEADLINE_WINDOW_DAYS
+CONFIG_FILE = 'frontier_config.json'
+
+WEIGHTS = {'keywords': 0.4, 'ranking': 0.3, 'staleness': 0.2, 'deadline': 0.1}
+# Title keywords and how much each is worth; the best match counts
+KEYWORDS = {
+    'computer science': 1.0, 'data science': 1.0, 'machine learning': 1.0, 'artificial intelligence': 1.0,
+    'computer engineering': 0.9, 'software': 0.9, 'analytics': 0.8, 'statistics': 0.8, 'cyber': 0.7,
+    'electrical': 0.7, 'information': 0.6, 'engineering': 0.5, 'mathematics': 0.5,
+}
+# A stored program counts as fully stale this long after it was scraped; never-fetched programs always do
+STALE_AFTER_DAYS = 90
+# Stored programs seen again in a listing go back on the frontier once they are this old
+REFRESH_AFTER_DAYS = 30
+DEADLINE_WINDOW_DAYS = 120
+# Global Ranking 1 scores 1.0 and scores fall off with log(rank); unranked universities score 0
+WORST_RANK = 2500
+DATE_FORMATS = ('%d %b %Y', '%b %d, %Y', '%b %Y', '%B %Y', '%Y-%m-%d', '%d %B %Y')
+
+
+def load_config(path=CONFIG_FILE):
+    config = {'weights': dict(WEIGHTS), 'keywords': dict(KEYWORDS),
+              'stale_after_days': STALE_AFTER_DAYS, 'refresh_after_days': REFRESH_AFTER_DAYS,
+              'deadline_window_days': DEADLINE_WINDOW_DAYS}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+        for key, value in overrides.items():
+            if key not in config:
+                raise ValueError(f"Unknown frontier setting '{key}' in {path}; expected one of {', '.join(config)}")
+            if isinstance(config[key], dict):
+                config[key].update(value)
+            else:
+                config[key] = value
+    return config
+
+
+def parse_date(text):
+    text = re.sub(r'\s+', ' ', str(text)).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def next_deadline(program, now):
+    # Earliest deadline still ahead, from the 'Start Dates and Deadlines' of a stored version
+    dates = []
+    for start in program.get('Start Dates and Deadlines') or []:
+        for deadline in start.get('Deadlines', []) if isinstance(start, dict) else []:
+            date = parse_date(deadline)
+            if date is not None and date >= now:
+                dates.append(date)
+    return min(dates) if dates else None
+
+
+class ProgramScorer:
+    def __init__(self, universities_path='universities.csv', config=None, resolver=None):
+        self.config = config or load_config()
+        self.resolver = resolver or UniversityResolver()
+        # university key -> Global Ranking, names linked through the resolver
+        self.ranks = {}
+        if os.path.exists(universities_path):
+            universities = pd.read_csv(universities_path, dtype=str, keep_default_na=False)
+            for name, rank in zip(universities['Name'], universities['Global Ranking']):
+                if rank.isdigit():
+                    self.ranks[self.resolver.resolve(name, 'mastersportal')] = int(rank)
+        self.rank_cache = {}
+
+    def save(self):
+        # University names resolved while scoring become aliases in the shared mapping; kept for later runs
+        if self.resolver.dirty:
+            self.resolver.save()
+
+    def keyword_score(self, title):
+        title = str(title).lower()
+        return max((weight for keyword, weight in self.config['keywords'].items() if keyword in title), default=0.0)
+
+    def ranking_score(self, university):
+        # Sitemap programs whose page could not be checked have no university yet; they rank by keywords alone
+        if university not in self.rank_cache:
+            rank = self.ranks.get(self.resolver.resolve(university, 'mastersportal_programs')) if university else None
+            self.rank_cache[university] = max(0.0, 1 - math.log(rank) / math.log(WORST_RANK)) if rank else 0.0
+        return self.rank_cache[university]
+
+    def age_days(self, stored, now):
+        scraped_at = parse_date(str(stored.get('Scraped At') or '')[:10]) if stored else None
+        return None if scraped_at is None else (now - scraped_at).days
+
+    def staleness_score(self, stored, now):
+        age = self.age_days(stored, now)
+        return 1.0 if age is None else min(1.0, age / self.config['stale_after_days'])
+
+    def needs_refresh(self, stored, now=None):
+        # Stored versions without 'Scraped At' predate it and are left alone
+        age = self.age_days(stored, now or datetime.now())
+        return age is not None and age >= self.config['refresh_after_days']
+
+    def deadline_score(self, stored, now):
+        deadline = next_deadline(stored, now) if stored else None
+        if deadline is None:
+            return 0.0
+        return max(0.0, 1 - (deadline - now).days / self.config['deadline_window_days'])
+
+    def signals(self, program, stored=None, now=None):
+        now = now or datetime.now()
+        return {
+            'keywords': self.keyword_score(program.get('Title', '')),
+            'ranking': self.ranking_score(program.get('University', '')),
+            'staleness': self.staleness_score(stored, now),
+            'deadline': self.deadline_score(stored, now),
+        }
+
+    def score(self, program, stored=None, now=None):
+        # stored: the program's last stored version, if any, for staleness and deadlines
+        weights = self.config['weights']
+        return sum(weights.get(name, 0.0) * value for name, value in self.signals(program, stored, now).items())
+
+
+class Frontier:
+    def __init__(self):
+        # (-score, sequence, program id); entries whose score changed are skipped when popped
+        self.heap = []
+        self.programs = {}
+        self.scores = {}
+        self.sequence = 0
+        self.stats = {'pushed': 0, 'popped': 0, 'rescored': 0, 'refreshed': 0}
+
+    @classmethod
+    def load(cls, path=FRONTIER_FILE):
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        return cls()
+
+    def save(self, path=FRONTIER_FILE):
+        if len(self.heap) > 2 * len(self.programs):
+            # Drop the entries superseded by a rescore before they are written out
+            self.heap = [entry for entry in self.heap if self.scores.get(entry[2]) == -entry[0]]
+            heapq.heapify(self.heap)
+        # Written aside and renamed so an interrupted save keeps the previous frontier
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(self, f)
+        os.replace(path + '.tmp', path)
+
+    def __len__(self):
+        return len(self.programs)
+
+    def __contains__(self, record_id):
+        return record_id in self.programs
+
+    def push(self, program, score):
+        record_id = program['Program ID']
+        if record_id in self.programs:
+            if self.scores[record_id] == score:
+                return False
+            self.stats['rescored'] += 1
+        else:
+            self.stats['pushed'] += 1
+        self.programs[record_id] = program
+        self.scores[record_id] = score
+        self.sequence += 1
+        heapq.heappush(self.heap, (-score, self.sequence, record_id))
+        return True
+
+    def pop(self):
+        while self.heap:
+            negative_score, _, record_id = heapq.heappop(self.heap)
+            if self.scores.get(record_id) == -negative_score:
+                del self.scores[record_id]
+                self.stats['popped'] += 1
+                return self.programs.pop(record_id)
+        raise IndexError('pop from an empty frontier')
+
+    def pop_many(self, count):
+        return [self.pop() for _ in range(min(count, len(self)))]
+
+    def top(self, count=10):
+        return sorted(((score, self.programs[record_id]) for record_id, score in self.scores.items()), key=lambda item: -item[0])[:count]
+
+
+class Budget:
+    # Time and page (detail fetch) limits for one run
+    def __init__(self, seconds=None, pages=None, started=None):
+        self.seconds = seconds
+        self.pages = pages
+        self.started = started or time.time()
+        self.fetched = 0
+
+    def record(self, count=1):
+        self.fetched += count
+
+    def remaining_pages(self):
+        # Pages that still fit, with the time left converted at the average fetch rate so far
+        remaining = math.inf if self.pages is None else self.pages - self.fetched
+        if self.seconds is not None:
+            elapsed = time.time() - self.started
+            if elapsed >= self.seconds:
+                return 0
+            if self.fetched:
+                remaining = min(remaining, (self.seconds - elapsed) / (elapsed / self.fetched))
+        return max(0, int(remaining)) if remaining != math.inf else remaining
+
+    def exhausted(self):
+        return self.remaining_pages() <= 0
+
+
+def main():
+    # Shows how the programs in a store would be ordered, and the frontier left by the last run
+    if len(sys.argv) < 2:
+        print("Usage: python crawl_frontier.py <master_programs_store.jsonl> [count]")
+        sys.exit(1)
+    from program_store import ProgramStore
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    scorer = ProgramScorer()
+    frontier = Frontier()
+    started = time.perf_counter()
+    for program in ProgramStore(sys.argv[1]):
+        frontier.push(program, scorer.score(program, stored=program))
+    logging.info(f"Scored {len(frontier)} programs in {time.perf_counter() - started:.2f} s")
+    for score, program in frontier.top(count):
+        logging.info(f"{score:.3f}  {program.get('Title')} - {program.get('University')}  {scorer.signals(program, program)}")
+    scorer.save()
+    saved = Frontier.load()
+    logging.info(f"{FRONTIER_FILE}: {len(saved)} programs waiting, {saved.stats}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,310 @@
+import atexit
+import cProfile
+import gc
+import html
+import io
+import logging
+import os
+import pstats
+import re
+import signal
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+
+# Profiling for whole crawl runs.
+#
+# 'sample' mode: a background thread reads every thread's Python stack with
+# sys._current_frames() about 100 times a second and counts the stacks. It
+# writes <path>.wall.collapsed (every sample, sleeps included) and, where
+# per-thread CPU times can be read from /proc (Linux), <path>.cpu.collapsed
+# with only the samples in which the thread actually used CPU, so parsing, GC
+# and checkpointing stand out from the waiting. Each gets an SVG flamegraph.
+# Garbage collection shows up as a [gc] frame on the thread that triggered it.
+#
+# 'cprofile' mode: deterministic cProfile of the main thread and every thread
+# started after it, one profile per thread merged on write, for short runs;
+# writes <path>.pstats and a top-functions table.
+#
+# Output is written at exit and, on platforms that have it, whenever the
+# process receives SIGUSR1 (kill -USR1 <pid>), without stopping the run.
+
+logger = logging.getLogger('crawl_profiler')
+
+MODES = ('sample', 'cprofile')
+SAMPLE_INTERVAL = 0.01
+FLAMEGRAPH_WIDTH = 1200
+FRAME_HEIGHT = 16
+# /proc/<pid>/task/<tid>/stat counts CPU time in these
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+_profiler = None
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_label(name):
+    # ThreadPoolExecutor-3_12 and ThreadPoolExecutor-4_0 are the same kind of worker
+    return re.sub(r'[-_]\d+(?:_\d+)?$', '', name) or name
+
+
+def _stack(frame, skip=()):
+    labels = []
+    while frame is not None:
+        if frame.f_code not in skip:
+            labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _thread_cpu(native_id):
+    # User plus system CPU seconds of one thread, or None once it has exited
+    try:
+        with open(f'/proc/self/task/{native_id}/stat', 'rb') as f:
+            # Fields after the ')' that closes the command name; utime and stime are the 12th and 13th
+            fields = f.read().rsplit(b')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def write_collapsed(counts, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, count in sorted(counts.items()):
+            f.write(f"{stack} {count}\n")
+
+
+def _color(name):
+    # Stable warm colour per function, as in the usual flamegraph palette
+    value = zlib.crc32(name.encode('utf-8'))
+    return f"rgb({205 + value % 50},{(value >> 8) % 180 + 50},{(value >> 16) % 55})"
+
+
+def write_flamegraph(counts, path, title):
+    # Minimal self-contained SVG flamegraph of collapsed stacks; hover a frame for its sample count
+    root = {'children': {}, 'count': 0}
+    for stack, count in counts.items():
+        node = root
+        node['count'] += count
+        for name in stack.split(';'):
+            node = node['children'].setdefault(name, {'children': {}, 'count': 0})
+            node['count'] += count
+    total = root['count'] or 1
+
+    def depth(node):
+        return 1 + max((depth(child) for child in node['children'].values()), default=0)
+    height = (depth(root) + 2) * FRAME_HEIGHT
+    rects = []
+
+    def layout(node, x, level):
+        for name, child in sorted(node['children'].items()):
+            width = child['count'] / total * FLAMEGRAPH_WIDTH
+            if width >= 0.2:
+                y = height - (level + 1) * FRAME_HEIGHT
+                label = html.escape(name)
+                text = label[:int(width / 7)] if width > 21 else ''
+                rects.append(
+                    f'<g><title>{label} ({child["count"]} samples, {child["count"] / total:.1%})</title>'
+                    f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}" height="{FRAME_HEIGHT - 1}" fill="{_color(name)}"/>'
+                    f'<text x="{x + 3:.1f}" y="{y + FRAME_HEIGHT - 4}">{text}</text></g>')
+                layout(child, x, level + 1)
+            x += width
+
+    layout(root, 0.0, 0)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{FLAMEGRAPH_WIDTH}" height="{height}" '
+                f'font-family="monospace" font-size="11">\n'
+                f'<text x="4" y="{FRAME_HEIGHT - 2}" font-size="13">{html.escape(title)} ({total} samples)</text>\n')
+        f.write('\n'.join(rects))
+        f.write('\n</svg>\n')
+
+
+class SamplingProfiler:
+    def __init__(self, path='profile', interval=SAMPLE_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.wall = Counter()
+        self.cpu = Counter()
+        self.samples = 0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        # thread native ID -> last per-thread CPU time; None where there is no /proc to read it from
+        self.cpu_times = {} if os.path.isdir('/proc/self/task') else None
+        self.gc_thread = None
+        self.started = None
+
+    def _gc_callback(self, phase, info):
+        self.gc_thread = threading.get_ident() if phase == 'start' else None
+
+    def sample(self):
+        own = threading.get_ident()
+        threads = {thread.ident: thread for thread in threading.enumerate()}
+        gc_thread = self.gc_thread
+        skip = (self._gc_callback.__code__,)
+        stacks = []
+        alive = set()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            thread = threads.get(ident)
+            # The profiler's own GC callback is left out; the collection itself has no Python frame
+            labels = [_thread_label(thread.name if thread else str(ident))] + _stack(frame, skip)
+            if ident == gc_thread:
+                labels.append('[gc]')
+            on_cpu = None
+            if self.cpu_times is not None and thread is not None and thread.native_id is not None:
+                cpu = _thread_cpu(thread.native_id)
+                if cpu is not None:
+                    alive.add(thread.native_id)
+                    previous = self.cpu_times.get(thread.native_id)
+                    self.cpu_times[thread.native_id] = cpu
+                    # CPU time moves in clock ticks (usually 10 ms), so a thread shows as busy
+                    # in about the share of samples that it spends on the CPU
+                    on_cpu = previous is not None and cpu - previous >= self.interval / 5
+            stacks.append((';'.join(labels), on_cpu))
+        if self.cpu_times is not None:
+            # Threads that have exited; their IDs can be reused by new ones
+            for native_id in self.cpu_times.keys() - alive:
+                del self.cpu_times[native_id]
+        with self.lock:
+            self.samples += 1
+            for stack, on_cpu in stacks:
+                self.wall[stack] += 1
+                if on_cpu:
+                    self.cpu[stack] += 1
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Profiler sample failed: {e}")
+
+    def start(self):
+        self.started = time.monotonic()
+        gc.callbacks.append(self._gc_callback)
+        self.thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+        if self._gc_callback in gc.callbacks:
+            gc.callbacks.remove(self._gc_callback)
+
+    def write(self):
+        with self.lock:
+            wall, cpu, samples = Counter(self.wall), Counter(self.cpu), self.samples
+        elapsed = time.monotonic() - self.started
+        outputs = [('wall', wall, 'All threads, wall clock')]
+        if self.cpu_times is not None:
+            outputs.append(('cpu', cpu, 'All threads, on CPU only'))
+        written = []
+        for kind, counts, title in outputs:
+            write_collapsed(counts, f"{self.path}.{kind}.collapsed")
+            write_flamegraph(counts, f"{self.path}.{kind}.svg", f"{title}, {elapsed:.0f} s")
+            written.append(f"{self.path}.{kind}.svg")
+        logger.info(f"Profile: {samples} samples over {elapsed:.0f} s written to {', '.join(written)} (and .collapsed)")
+
+
+class _Snapshot:
+    # What pstats.Stats reads from a profile, taken without disabling it; a thread's profile can
+    # only be disabled on that thread
+    def __init__(self, profile):
+        profile.snapshot_stats()
+        self.stats = profile.stats
+
+    def create_stats(self):
+        pass
+
+
+class DeterministicProfiler:
+    # cProfile of the thread that starts it and of every thread started while it runs (the scraper's
+    # and DetailWorkerPool's workers, where the parsing happens). Each thread gets its own profile
+    # through threading.setprofile; they are merged when written.
+    def __init__(self, path='profile', top=30):
+        self.path = path
+        self.top = top
+        self.profile = cProfile.Profile()
+        self.thread_profiles = []
+        self.lock = threading.Lock()
+        self.running = False
+
+    def _start_thread(self, frame, event, arg):
+        # Runs once, on the first call in a new thread, and hands the thread over to its own profile
+        sys.setprofile(None)
+        with self.lock:
+            if not self.running:
+                return
+            profile = cProfile.Profile()
+            self.thread_profiles.append(profile)
+        try:
+            profile.enable()
+        except ValueError:
+            # From Python 3.12 cProfile hooks every thread at once, so the main profile already sees this one
+            with self.lock:
+                self.thread_profiles.remove(profile)
+
+    def start(self):
+        self.running = True
+        threading.setprofile(self._start_thread)
+        self.profile.enable()
+        return self
+
+    def stop(self):
+        # Threads still running keep their profiles until they exit; write() takes what they have so far
+        threading.setprofile(None)
+        self.running = False
+        self.profile.disable()
+
+    def write(self):
+        with self.lock:
+            snapshots = [_Snapshot(profile) for profile in [self.profile] + self.thread_profiles]
+        # pstats refuses a profile without any calls, e.g. a thread that has only just started
+        snapshots = [snapshot for snapshot in snapshots if snapshot.stats]
+        if not snapshots:
+            logger.info("cProfile: nothing recorded yet")
+            return
+        stats = pstats.Stats(snapshots[0])
+        stats.add(*snapshots[1:])
+        stats.dump_stats(f"{self.path}.pstats")
+        output = io.StringIO()
+        stats.stream = output
+        stats.sort_stats('cumulative').print_stats(self.top)
+        logger.info(f"cProfile of {len(snapshots)} threads written to {self.path}.pstats; "
+                    f"top {self.top} by cumulative time:\n{output.getvalue()}")
+
+
+def _on_sigusr1(signum, frame):
+    if _profiler is not None:
+        _profiler.write()
+
+
+def start_profiler(mode='sample', path='profile', interval=SAMPLE_INTERVAL):
+    global _profiler
+    if mode not in MODES:
+        raise ValueError(f"Unknown profile mode {mode!r}; expected one of {', '.join(MODES)}")
+    if _profiler is None:
+        _profiler = (SamplingProfiler(path, interval) if mode == 'sample' else DeterministicProfiler(path)).start()
+        atexit.register(stop_profiler)
+        if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, _on_sigusr1)
+        logger.info(f"Profiling ({mode}) to {path}.*" + ("; send SIGUSR1 for an interim dump" if hasattr(signal, 'SIGUSR1') else ''))
+    return _profiler
+
+
+def stop_profiler():
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.stop()
+        profiler.write()
+    return profiler
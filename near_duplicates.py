@@ -0,0 +1,207 @@
+import logging
+import os
+import pickle
+import re
+import sys
+import zlib
+from collections import Counter, defaultdict
+
+import numpy as np
+
+# Near-duplicate mastersportal programs: the same program listed under more
+# than one link, with (almost) the same About text and Programme Structure.
+# Each program gets a MinHash signature over word shingles of that text, and
+# LSH buckets on signature bands propose candidate pairs, so a new program is
+# compared with a handful of candidates rather than with every stored program.
+
+INDEX_FILE = 'near_duplicates.pkl'
+TEXT_FIELDS = ('About', 'Program Structure')
+
+SHINGLE_WORDS = 5
+MIN_SHINGLES = 5
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs are proposed from about 0.7 estimated Jaccard similarity up
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+THRESHOLD = 0.8
+
+_PRIME = np.uint64((1 << 32) - 5)
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+
+
+def program_text(program):
+    parts = []
+    for field in TEXT_FIELDS:
+        value = program.get(field)
+        if isinstance(value, (list, tuple)):
+            value = ' '.join(str(item) for item in value)
+        if isinstance(value, str):
+            parts.append(value)
+    return ' '.join(parts)
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    words = re.findall(r'\w+', text.lower())
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(shingle_set):
+    # crc32 is stable across processes, unlike hash(), so signatures can be saved with the index
+    hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingle_set), dtype=np.uint64, count=len(shingle_set))
+    permuted = (hashes[:, None] * _A % _PRIME + _B) % _PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def similarity(left, right):
+    return float(np.mean(left == right))
+
+
+def listing_key(program):
+    # What the listing page shows before the detail fetch
+    return '|'.join(' '.join(re.findall(r'\w+', str(program.get(field, '')).lower())) for field in ('Title', 'University'))
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold=THRESHOLD):
+        self.threshold = threshold
+        self.signatures = {}
+        self.buckets = defaultdict(list)
+        # union-find over program IDs
+        self.parent = {}
+        # listing key -> first program fetched with it; keys whose programs turned out to be duplicates
+        self.listing_first = {}
+        self.duplicate_listings = set()
+        self.stats = Counter()
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        return cls()
+
+    def save(self, path=INDEX_FILE):
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    def _root(self, record_id):
+        root = record_id
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        while record_id != root:
+            self.parent[record_id], record_id = root, self.parent[record_id]
+        return root
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+    def add(self, record_id, program):
+        # Returns the ID of the program this one duplicates (the cluster's first member), or None
+        if record_id in self.signatures:
+            root = self._root(record_id)
+            return root if root != record_id else None
+        shingle_set = shingles(program_text(program))
+        if len(shingle_set) < MIN_SHINGLES:
+            self.stats['too_short'] += 1
+            return None
+        signature = minhash(shingle_set)
+        band_keys = self._band_keys(signature)
+
+        candidates = {other for key in band_keys for other in self.buckets.get(key, ())}
+        self.stats['candidates'] += len(candidates)
+        best, best_score = None, 0.0
+        for other in candidates:
+            score = similarity(signature, self.signatures[other])
+            if score > best_score:
+                best, best_score = other, score
+
+        self.signatures[record_id] = signature
+        for key in band_keys:
+            self.buckets[key].append(record_id)
+        self.stats['indexed'] += 1
+
+        key = listing_key(program)
+        if best is not None and best_score >= self.threshold:
+            root = self._root(best)
+            self.parent[record_id] = root
+            self.stats['duplicates'] += 1
+            if self.listing_first.get(key) is not None and self._root(self.listing_first[key]) == root:
+                self.duplicate_listings.add(key)
+            self.listing_first.setdefault(key, record_id)
+            return root
+        self.listing_first.setdefault(key, record_id)
+        return None
+
+    def is_known_duplicate(self, program):
+        # Listing-time check: this title and university were already fetched under another link
+        # and the detail text turned out to be the same program, so the fetch can be skipped.
+        # Programs found in the sitemaps carry only a URL slug and no university yet, so they never match here.
+        if not program.get('University'):
+            return False
+        return listing_key(program) in self.duplicate_listings
+
+    def duplicate_of(self, record_id):
+        # The cluster's first program when this one was fetched and found to duplicate it, else None
+        if record_id not in self.signatures:
+            return None
+        root = self._root(record_id)
+        return root if root != record_id else None
+
+    def clusters(self):
+        groups = defaultdict(list)
+        for record_id in self.signatures:
+            groups[self._root(record_id)].append(record_id)
+        return [members for members in groups.values() if len(members) > 1]
+
+    def report(self):
+        clusters = self.clusters()
+        sizes = Counter(len(members) for members in clusters)
+        return {
+            'indexed': self.stats['indexed'],
+            'too_short': self.stats['too_short'],
+            'candidate_checks': self.stats['candidates'],
+            'clusters': len(clusters),
+            'duplicates': sum(len(members) - 1 for members in clusters),
+            'cluster_sizes': dict(sorted(sizes.items())),
+            'skipped_fetches': self.stats['skipped_fetches'],
+        }
+
+
+def load_programs(path):
+    if path.endswith('.jsonl'):
+        from program_store import ProgramStore
+        return list(ProgramStore(path))
+    if path.endswith('.json'):
+        import json
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    import pandas as pd
+    from normalize import parse_list_columns
+    return parse_list_columns(pd.read_csv(path)).to_dict('records')
+
+
+def main():
+    # Batch mode: cluster a whole store or export and print the largest clusters
+    if len(sys.argv) < 2:
+        print("Usage: python near_duplicates.py <master_programs_store.jsonl|master_programs_final.csv> [index.pkl]")
+        sys.exit(1)
+    programs = load_programs(sys.argv[1])
+    index = NearDuplicateIndex.load(sys.argv[2]) if len(sys.argv) > 2 else NearDuplicateIndex()
+    by_id = {}
+    for program in programs:
+        record_id = program.get('Program ID') or program.get('Link')
+        by_id[record_id] = program
+        index.add(record_id, program)
+    if len(sys.argv) > 2:
+        index.save(sys.argv[2])
+    logging.info(f"{len(programs)} programs: {index.report()}")
+    for members in sorted(index.clusters(), key=len, reverse=True)[:10]:
+        logging.info(f"{len(members)} near-duplicates: " + '; '.join(
+            f"{by_id.get(member, {}).get('Title', '?')} ({by_id.get(member, {}).get('Link') or member})" for member in members[:5]))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,205 @@
+import ast
+import json
+import logging
+import sys
+
+import numpy as np
+import pandas as pd
+
+from program_store import ProgramStore
+
+# Normalization stage: turns the free-text fields written by scraper.py
+# (mastersportal) and offer_scraper.py (1point3acres) into typed columns.
+# Every parser works on a whole column at once with pandas' vectorized
+# string methods, so the full dataset is normalized in one batch.
+
+# Values the scrapers write when a field is missing; they are not counted as parse failures
+NULL_MARKERS = ['', 'n/a', 'na', 'none', 'nan', 'null', '-', '--']
+
+NUMBER = r'\d[\d,]*(?:\.\d+)?'
+
+MONEY_PATTERN = (
+    r'(?P<symbol>(?:[A-Z]{1,3})?[$€£¥]|[A-Z]{3}(?=\s*\d))?\s*(?P<min>' + NUMBER + r')'
+    r'(?:\s*[-–~]\s*[$€£¥]?\s*(?P<max>' + NUMBER + r'))?'
+    r'\s*(?:(?!PER\b)(?P<code>[A-Z]{3})(?![A-Za-z]))?'
+    r'(?:\s*(?:/|(?i:\bper\b))\s*(?P<period>[A-Za-z]+|年|月|学期))?'
+)
+RANGE_PATTERN = r'(?P<min>' + NUMBER + r')(?:\s*[-–~]\s*(?P<max>' + NUMBER + r'))?'
+SCORE_PATTERN = r'(?P<value>' + NUMBER + r')'
+DURATION_PATTERN = (
+    r'(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>years?|yrs?|months?|mos?|semesters?|terms?|quarters?|weeks?|days?|年|个月|月|学期)'
+)
+
+CURRENCY_SYMBOLS = {
+    '$': 'USD', 'US$': 'USD', 'CA$': 'CAD', 'C$': 'CAD', 'A$': 'AUD', 'AU$': 'AUD',
+    'NZ$': 'NZD', 'HK$': 'HKD', 'S$': 'SGD', '€': 'EUR', '£': 'GBP', '¥': 'CNY',
+}
+# Three capitals after an amount only name the currency when they are one of these ("1,200 PER YEAR" does not)
+CURRENCY_CODES = {
+    'USD', 'EUR', 'GBP', 'CAD', 'AUD', 'NZD', 'HKD', 'SGD', 'CNY', 'RMB', 'JPY', 'KRW', 'INR', 'CHF',
+    'SEK', 'NOK', 'DKK', 'PLN', 'CZK', 'HUF', 'MYR', 'THB', 'TWD', 'ZAR', 'BRL', 'MXN', 'TRY', 'AED',
+}
+PERIODS = {
+    'year': 'year', 'years': 'year', 'yr': 'year', 'annual': 'year', '年': 'year',
+    'month': 'month', 'months': 'month', 'mo': 'month', '月': 'month',
+    'semester': 'semester', 'semesters': 'semester', '学期': 'semester',
+    'full': 'full', 'total': 'full', 'credit': 'credit',
+}
+MONTHS_PER_UNIT = {
+    'year': 12.0, 'years': 12.0, 'yr': 12.0, 'yrs': 12.0, '年': 12.0,
+    'month': 1.0, 'months': 1.0, 'mo': 1.0, 'mos': 1.0, '个月': 1.0, '月': 1.0,
+    'semester': 6.0, 'semesters': 6.0, 'term': 4.0, 'terms': 4.0, '学期': 6.0,
+    'quarter': 3.0, 'quarters': 3.0,
+    'week': 12.0 / 52, 'weeks': 12.0 / 52,
+    'day': 12.0 / 365, 'days': 12.0 / 365,
+}
+
+# Source columns that hold Python-style list reprs once they have been round-tripped through CSV
+LIST_COLUMNS = ['Degree Tags', 'Disciplines', 'Tags', 'Program Structure', 'Other Requirements']
+
+
+def _text(series):
+    return series.astype('string').str.strip()
+
+
+def _blank(text):
+    return text.isna() | text.str.lower().isin(NULL_MARKERS)
+
+
+def _to_number(series):
+    return pd.to_numeric(series.str.replace(',', '', regex=False), errors='coerce').astype('float64')
+
+
+def parse_money(series, prefix):
+    text = _text(series)
+    parts = text.str.extract(MONEY_PATTERN)
+    low = _to_number(parts['min'])
+    high = _to_number(parts['max']).fillna(low)
+    # "CA$21,585" / "EUR9,450" carry the currency in front, "1200 USD" behind; a code behind wins over a symbol
+    symbol = parts['symbol'].map(CURRENCY_SYMBOLS).fillna(parts['symbol'].where(parts['symbol'].isin(CURRENCY_CODES)))
+    currency = parts['code'].where(parts['code'].isin(CURRENCY_CODES)).fillna(symbol)
+    period = parts['period'].str.lower().map(PERIODS)
+    columns = pd.DataFrame({
+        f'{prefix}_min': low,
+        f'{prefix}_max': high,
+        f'{prefix}_currency': currency.astype('string'),
+        f'{prefix}_period': period.astype('string'),
+    }, index=series.index)
+    return columns, low.notna()
+
+
+def parse_range(series, prefix):
+    text = _text(series)
+    parts = text.str.extract(RANGE_PATTERN)
+    low = _to_number(parts['min'])
+    high = _to_number(parts['max']).fillna(low)
+    columns = pd.DataFrame({f'{prefix}_min': low, f'{prefix}_max': high}, index=series.index)
+    return columns, low.notna()
+
+
+def parse_score(series, prefix):
+    text = _text(series)
+    value = _to_number(text.str.extract(SCORE_PATTERN)['value'])
+    return pd.DataFrame({prefix: value}, index=series.index), value.notna()
+
+
+def parse_count(series, prefix):
+    columns, parsed = parse_score(series, prefix)
+    columns[prefix] = columns[prefix].round().astype('Int64')
+    return columns, parsed
+
+
+def parse_duration(series, prefix):
+    text = _text(series).str.lower()
+    # "1 year, 6 months" contributes both parts, so sum every match per row
+    matches = text.str.extractall(DURATION_PATTERN)
+    months = pd.Series(np.nan, index=series.index, dtype='float64')
+    if not matches.empty:
+        per_match = pd.to_numeric(matches['value'], errors='coerce') * matches['unit'].map(MONTHS_PER_UNIT).astype('float64')
+        summed = per_match.groupby(level=0).sum(min_count=1)
+        months.loc[summed.index] = summed
+    return pd.DataFrame({f'{prefix}_months': months}, index=series.index), months.notna()
+
+
+# Source column -> (output prefix, parser)
+FIELD_PARSERS = {
+    # scraper.py get_additional_info
+    'Tuition Fee': ('tuition', parse_money),
+    'Duration': ('duration', parse_duration),
+    'Cost of Living': ('living_cost', parse_money),
+    'GPA': ('gpa', parse_score),
+    'IELTS': ('ielts', parse_score),
+    'TOEFL': ('toefl', parse_score),
+    'Ranking': ('ranking', parse_range),
+    # offer_scraper.py read_program_card
+    'Median GPA': ('median_gpa', parse_score),
+    'GRE': ('gre', parse_score),
+    'Applicants': ('applicants', parse_count),
+    'Admissions': ('admissions', parse_count),
+    'US News Ranking': ('us_news_ranking', parse_range),
+}
+
+
+def parse_list_columns(df):
+    # CSV checkpoints store lists as their repr; decode them once so later stages get real lists
+    for column in LIST_COLUMNS:
+        if column not in df.columns:
+            continue
+        values = df[column].tolist()
+        if any(isinstance(value, str) and value.startswith('[') for value in values):
+            df[column] = pd.Series([
+                ast.literal_eval(value) if isinstance(value, str) and value.startswith('[') else value
+                for value in values
+            ], index=df.index, dtype=object)
+    return df
+
+
+def normalize_programs(df, fields=None):
+    fields = fields or FIELD_PARSERS
+    typed = []
+    failures = {}
+    for column, (prefix, parser) in fields.items():
+        if column not in df.columns:
+            continue
+        columns, parsed = parser(df[column], prefix)
+        failed = ~parsed & ~_blank(_text(df[column]))
+        failures[column] = int(failed.sum())
+        typed.append(columns)
+    result = pd.concat([df] + typed, axis=1) if typed else df.copy()
+    result.attrs['parse_failures'] = failures
+    for column, count in failures.items():
+        if count:
+            logging.warning(f"{count} of {len(df)} values in '{column}' could not be parsed")
+    return result, failures
+
+
+def load_programs(path):
+    if path.endswith('.jsonl'):
+        return pd.DataFrame(list(ProgramStore(path)))
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return pd.DataFrame(json.load(f))
+    if path.endswith('.pkl'):
+        return pd.read_pickle(path)
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python normalize.py <master_programs_final.csv|program_data.json|program_data.jsonl> [output.pkl]")
+        sys.exit(1)
+    source = sys.argv[1]
+    output = sys.argv[2] if len(sys.argv) > 2 else 'programs_normalized.pkl'
+
+    df = parse_list_columns(load_programs(source))
+    normalized, failures = normalize_programs(df)
+    # Pickle keeps the typed columns and decoded lists, so loaders never reparse text
+    normalized.to_pickle(output)
+    logging.info(f"Normalized {len(normalized)} programs from {source} into {output}")
+    for column, count in failures.items():
+        logging.info(f"  {column}: {count} parse failures")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
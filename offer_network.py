@@ -0,0 +1,158 @@
+import base64
+import json
+import re
+import sys
+
+# Captures the JSON API responses behind the 1point3acres report table and
+# 详情 modals from Chrome's performance (CDP network) log, so a whole page of
+# admission reports is read in one go instead of clicking every row.
+#
+# The API paths and field names below (created_at, result, background, ...)
+# are a best guess, not taken from a captured session, and so is
+# fixtures/offer_network_log.json, which is built to the same guess. Record a
+# real log before relying on this path; until the names are confirmed the DOM
+# scraper stays the fallback whenever nothing here matches.
+
+# Responses whose URL matches this are treated as report payloads
+REPORT_API_PATTERN = re.compile(r'offer\.1point3acres\.com/api/.*(report|result|offer)', re.IGNORECASE)
+
+# API field -> key used by the DOM scraper, so both paths produce identical report dicts
+BACKGROUND_FIELDS = {
+    'year': '申入学年度',
+    'semester': '入学学期',
+    'major': '申请专业',
+    'degree': '申请学位',
+    'target': '申请目标',
+    'undergrad_tier': '本科学校档次',
+    'undergrad_school': '本科学校名称',
+    'undergrad_major': '本科专业',
+    'undergrad_gpa': '本科成绩和算法，排名',
+    'english': '托福/雅思\n总分+单项(R+L+S+W)',
+    'gre': 'GRE/GMAT\n总分+单项(V+Q+AW)',
+    'work_experience': '相关工作经验范围',
+    'work_years': '相关工作经验年数',
+    'research': '论文/科研经历',
+    'awards': '学科竞赛/奖励',
+    'other': '其他背景说明(如牛推等)',
+    'grad_tier': '研究生学校档次',
+    'grad_school': '研究生学校名称',
+    'grad_major': '研究生专业',
+    'grad_gpa': '研究生成绩和算法，排名',
+    'target_range': '申请希望范围',
+    'sub_subject': 'sub专业和分数',
+}
+
+
+def enable_network_capture(chrome_options):
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return chrome_options
+
+
+def clear_network_log(driver):
+    # Reading the performance log drains Chrome's buffer
+    driver.get_log('performance')
+
+
+def capture_json_responses(driver, url_pattern=REPORT_API_PATTERN):
+    responses = []
+    for entry in driver.get_log('performance'):
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+        if message.get('method') != 'Network.responseReceived':
+            continue
+        params = message.get('params', {})
+        response = params.get('response', {})
+        if 'json' not in response.get('mimeType', '') or not url_pattern.search(response.get('url', '')):
+            continue
+        try:
+            body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': params['requestId']})
+        except Exception:
+            # The body is gone once Chrome evicts it from its network cache
+            continue
+        text = body.get('body', '')
+        if body.get('base64Encoded'):
+            text = base64.b64decode(text).decode('utf-8')
+        try:
+            responses.append((response['url'], json.loads(text)))
+        except ValueError:
+            continue
+    return responses
+
+
+def _find_report_lists(payload):
+    # Report lists may be nested under data/list/items depending on the endpoint
+    if isinstance(payload, list):
+        if payload and all(isinstance(item, dict) and 'result' in item for item in payload):
+            yield payload
+        else:
+            for item in payload:
+                yield from _find_report_lists(item)
+    elif isinstance(payload, dict):
+        for value in payload.values():
+            yield from _find_report_lists(value)
+
+
+def _text(value):
+    return '' if value is None else str(value)
+
+
+def report_from_api(item):
+    report = {
+        '报告时间': _text(item.get('created_at')),
+        '学位/专业': f"{_text(item.get('degree'))}\n{_text(item.get('major'))}",
+        '项目': _text(item.get('program')),
+        '标题': _text(item.get('title')),
+        '学期': f"{_text(item.get('year'))}\n{_text(item.get('semester'))}",
+        '录取结果': f"{_text(item.get('channel'))}/{_text(item.get('result'))}\n{_text(item.get('notified_at'))}",
+    }
+    for key, value in (item.get('background') or {}).items():
+        if value not in (None, ''):
+            report[BACKGROUND_FIELDS.get(key, key)] = _text(value)
+    return report
+
+
+def reports_from_responses(responses):
+    reports = {}
+    for _, payload in responses:
+        for report_list in _find_report_lists(payload):
+            for item in report_list:
+                key = item['id'] if item.get('id') is not None else object()
+                # The table and the modal endpoints both return a report; the modal one carries the background
+                if key not in reports or item.get('background'):
+                    reports[key] = report_from_api(item)
+    return list(reports.values())
+
+
+def capture_admission_reports(driver):
+    return reports_from_responses(capture_json_responses(driver))
+
+
+class RecordedLogDriver:
+    # Replays a recorded performance log and response bodies in place of a live driver
+    def __init__(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            recording = json.load(f)
+        self.entries = recording['performance_log']
+        self.bodies = recording['response_bodies']
+
+    def get_log(self, log_type):
+        entries, self.entries = self.entries, []
+        return entries
+
+    def execute_cdp_cmd(self, command, params):
+        return self.bodies[params['requestId']]
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python offer_network.py <recorded_log.json>")
+        sys.exit(1)
+    reports = capture_admission_reports(RecordedLogDriver(sys.argv[1]))
+    print(json.dumps(reports, ensure_ascii=False, indent=2))
+    print(f"Parsed {len(reports)} reports")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import logging
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from normalize import load_programs, normalize_programs, parse_list_columns
+
+# In-memory faceted index over scraped programs. It is built once from the
+# normalized dataset (see normalize.py), after which combined filters and
+# facet counts are answered with NumPy array operations instead of full
+# DataFrame scans.
+
+# Categorical fields get an inverted index; list-valued ones (Tags, Disciplines) index every element
+TERM_FIELDS = ['University', 'Location', 'Tags', 'Degree Tags', 'Disciplines']
+
+
+class TermIndex:
+    def __init__(self, values):
+        rows = []
+        terms = []
+        for row, value in enumerate(values):
+            if isinstance(value, (list, tuple, np.ndarray)):
+                for term in value:
+                    if term:
+                        rows.append(row)
+                        terms.append(term)
+            elif isinstance(value, str) and value:
+                rows.append(row)
+                terms.append(value)
+
+        self.terms, codes = np.unique(np.array(terms, dtype=object), return_inverse=True) if terms else (np.array([], dtype=object), np.array([], dtype=np.int64))
+        self.lookup = {term: code for code, term in enumerate(self.terms)}
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.codes = np.asarray(codes, dtype=np.int64)
+
+        # Postings: rows grouped by term code, addressed through offsets
+        order = np.argsort(self.codes, kind='stable')
+        self.postings = self.rows[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(self.codes, minlength=len(self.terms)))])
+
+    def rows_for(self, term):
+        code = self.lookup.get(term)
+        if code is None:
+            return self.postings[:0]
+        return self.postings[self.offsets[code]:self.offsets[code + 1]]
+
+    def counts(self, mask):
+        selected = self.codes[mask[self.rows]]
+        return np.bincount(selected, minlength=len(self.terms))
+
+
+class RangeIndex:
+    def __init__(self, values):
+        values = np.asarray(values, dtype='float64')
+        present = np.flatnonzero(~np.isnan(values))
+        order = np.argsort(values[present], kind='stable')
+        self.order = present[order]
+        self.sorted_values = values[self.order]
+
+    def rows_between(self, low=None, high=None):
+        start = 0 if low is None else np.searchsorted(self.sorted_values, low, side='left')
+        end = len(self.sorted_values) if high is None else np.searchsorted(self.sorted_values, high, side='right')
+        return self.order[start:end]
+
+
+class CurrencyRangeIndex:
+    # Money amounts (normalize.parse_money) are only comparable within one currency, so each currency gets its own sorted index
+    def __init__(self, values, currencies):
+        values = np.asarray(values, dtype='float64')
+        currencies = np.asarray(currencies, dtype=object)
+        self.by_currency = {}
+        # Amounts without a known currency cannot be compared with anything and are left out
+        for currency in sorted(set(currencies) - {''}):
+            rows = np.flatnonzero(currencies == currency)
+            index = RangeIndex(values[rows])
+            index.order = rows[index.order]
+            self.by_currency[currency] = index
+
+    def rows_between(self, low=None, high=None, currency=None):
+        if currency is None:
+            if len(self.by_currency) > 1:
+                raise ValueError(f"Amounts are in {', '.join(self.by_currency)}; give a currency, e.g. (low, high, 'USD')")
+            currency = next(iter(self.by_currency), None)
+        index = self.by_currency.get(currency)
+        if index is None:
+            return np.array([], dtype=np.int64)
+        return index.rows_between(low, high)
+
+
+class ProgramIndex:
+    def __init__(self, df, term_fields=None):
+        self.df = df.reset_index(drop=True)
+        self.size = len(self.df)
+        self.term_indexes = {}
+        self.range_indexes = {}
+
+        for field in term_fields or TERM_FIELDS:
+            if field in self.df.columns:
+                self.term_indexes[field] = TermIndex(self.df[field].tolist())
+        for field in self.df.columns:
+            if field not in self.term_indexes and pd.api.types.is_numeric_dtype(self.df[field]):
+                values = self.df[field].to_numpy(dtype='float64', na_value=np.nan)
+                currency = self._currency_column(field)
+                if currency is not None:
+                    self.range_indexes[field] = CurrencyRangeIndex(values, self.df[currency].fillna('').tolist())
+                else:
+                    self.range_indexes[field] = RangeIndex(values)
+
+    def _currency_column(self, field):
+        # tuition_min / tuition_max go with tuition_currency
+        prefix, _, bound = field.rpartition('_')
+        column = f'{prefix}_currency'
+        return column if bound in ('min', 'max') and column in self.df.columns else None
+
+    @classmethod
+    def load(cls, path, term_fields=None):
+        # The normalized pickle already holds typed columns and decoded lists; anything else is normalized here once
+        df = load_programs(path)
+        if not path.endswith('.pkl'):
+            df, _ = normalize_programs(parse_list_columns(df))
+        return cls(df, term_fields)
+
+    def mask(self, criteria):
+        # criteria: {term field: value or list of values (OR), numeric field: (low, high) inclusive, None = open,
+        #            money field: (low, high, currency); the currency may be left out only when the data has a single one}
+        result = np.ones(self.size, dtype=bool)
+        for field, condition in criteria.items():
+            field_mask = np.zeros(self.size, dtype=bool)
+            if field in self.term_indexes:
+                index = self.term_indexes[field]
+                for term in ([condition] if isinstance(condition, str) else condition):
+                    field_mask[index.rows_for(term)] = True
+            elif field in self.range_indexes:
+                index = self.range_indexes[field]
+                if isinstance(index, CurrencyRangeIndex):
+                    low, high, *currency = condition
+                    field_mask[index.rows_between(low, high, *currency)] = True
+                else:
+                    low, high = condition
+                    field_mask[index.rows_between(low, high)] = True
+            else:
+                raise KeyError(f"Field '{field}' is not indexed")
+            result &= field_mask
+        return result
+
+    def filter(self, criteria):
+        return np.flatnonzero(self.mask(criteria))
+
+    def count(self, criteria):
+        return int(np.count_nonzero(self.mask(criteria)))
+
+    def facets(self, field, criteria=None, top=None):
+        mask = self.mask(criteria or {})
+        index = self.term_indexes[field]
+        counts = index.counts(mask)
+        order = np.argsort(-counts, kind='stable')
+        if top is not None:
+            order = order[:top]
+        return {index.terms[code]: int(counts[code]) for code in order if counts[code]}
+
+    def records(self, criteria, columns=None):
+        rows = self.df.iloc[self.filter(criteria)]
+        return rows[columns] if columns else rows
+
+    def fields(self):
+        return {'terms': list(self.term_indexes), 'ranges': list(self.range_indexes)}
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python program_index.py <programs_normalized.pkl|program_data.json|program_data.jsonl|master_programs_final.csv>")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    index = ProgramIndex.load(sys.argv[1])
+    logging.info(f"Indexed {index.size} programs in {time.perf_counter() - start:.3f}s: {index.fields()}")
+
+    # Example: TOEFL <= 100 and tuition under $40k, if those columns exist in this dataset
+    criteria = {field: bounds for field, bounds in {'toefl': (None, 100), 'tuition_max': (None, 40000, 'USD')}.items() if field in index.range_indexes}
+    runs = 1000
+    start = time.perf_counter()
+    for _ in range(runs):
+        matches = index.count(criteria)
+    elapsed = (time.perf_counter() - start) / runs
+    logging.info(f"{criteria} -> {matches} programs ({elapsed * 1000:.3f} ms per query)")
+
+    for field in index.term_indexes:
+        logging.info(f"Top {field}: {index.facets(field, criteria, top=5)}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import uuid
+from urllib.parse import urlsplit, urlunsplit, unquote
+
+# Durable program store keyed on deterministic program IDs. Records are kept
+# in an append-only JSON-lines log; an in-memory index maps each ID to the
+# offset and content hash of its latest version, so an upsert of an unchanged
+# record costs a hash comparison and a changed one costs one appended line.
+
+logger = logging.getLogger('program_store')
+
+# Fixed namespace so the same program always gets the same ID
+PROGRAM_NAMESPACE = uuid.UUID('6f1c2a52-3a8e-5d0b-9b7e-2f43c1d0a9e1')
+
+# Fields that change on every scrape without the program changing
+VOLATILE_FIELDS = ('Scraped At',)
+
+# Dictionary written by 'python text_codec.py train <store>'
+DICT_SUFFIX = '.zdict'
+
+# Every line starts with the id and hash, so the index is built without decoding the records
+ENTRY_PREFIX = re.compile(rb'^\{"id": "((?:[^"\\]|\\.)*)", "hash": "([0-9a-f]{40})"')
+
+
+def canonical_url(url):
+    parts = urlsplit(url.strip())
+    path = re.sub(r'/{2,}', '/', unquote(parts.path)).rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower() or 'https', parts.netloc.lower(), path, '', ''))
+
+
+def normalize_name(text):
+    text = re.sub(r'[^\w\s]', ' ', (text or '').lower())
+    return ' '.join(text.split())
+
+
+def program_id(url=None, university='', department='', name=''):
+    if url:
+        key = canonical_url(url)
+    else:
+        key = '|'.join(normalize_name(part) for part in (university, department, name))
+    return str(uuid.uuid5(PROGRAM_NAMESPACE, key))
+
+
+def record_hash(record, ignore=VOLATILE_FIELDS):
+    content = {key: value for key, value in record.items() if key not in ignore}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+
+def store_codec(path):
+    # Long text fields are zstd-compressed once a dictionary has been trained for the store
+    if not os.path.exists(path + DICT_SUFFIX):
+        return None
+    from text_codec import TextCodec
+    return TextCodec.load(path + DICT_SUFFIX)
+
+
+class ProgramStore:
+    def __init__(self, path, id_field='Program ID', codec=None):
+        self.path = path
+        self.id_field = id_field
+        self.codec = codec if codec is not None else store_codec(path)
+        # id -> (offset, content hash) of the latest version
+        self.index = {}
+        self.lines = 0
+        self.lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.path):
+            return
+        self.lines = 0
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    match = ENTRY_PREFIX.match(line)
+                    if match:
+                        self.index[json.loads(b'"' + match.group(1) + b'"')] = (offset, match.group(2).decode('ascii'))
+                    else:
+                        entry = json.loads(line)
+                        self.index[entry['id']] = (offset, entry['hash'])
+                    self.lines += 1
+                offset += len(line)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, record_id):
+        return record_id in self.index
+
+    def _line(self, record_id, digest, record, codec=None):
+        codec = codec or self.codec
+        if codec is not None:
+            record = codec.encode(record)
+        return (json.dumps({'id': record_id, 'hash': digest, 'record': record}, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+    def _record(self, line):
+        record = json.loads(line)['record']
+        return self.codec.decode(record) if self.codec is not None else record
+
+    def upsert(self, record):
+        record_id = record[self.id_field]
+        digest = record_hash(record)
+        with self.lock:
+            current = self.index.get(record_id)
+            if current is not None and current[1] == digest:
+                return False
+            line = self._line(record_id, digest, record)
+            with open(self.path, 'ab') as f:
+                offset = f.tell()
+                f.write(line)
+            self.index[record_id] = (offset, digest)
+            self.lines += 1
+        return True
+
+    def upsert_many(self, records):
+        return sum(1 for record in records if self.upsert(record))
+
+    def get(self, record_id):
+        position = self.index.get(record_id)
+        if position is None:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(position[0])
+            return self._record(f.readline())
+
+    def hashes(self):
+        return {record_id: digest for record_id, (_, digest) in self.index.items()}
+
+    def __iter__(self):
+        # Latest version of every record, in file order
+        if not os.path.exists(self.path):
+            return
+        latest = {offset for offset, _ in self.index.values()}
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                if offset in latest:
+                    yield self._record(line)
+                offset += len(line)
+
+    def compact(self, codec=None):
+        # Drops superseded versions; the log is rewritten once, not on every save.
+        # With a codec, records are read with the current one and rewritten with the new one.
+        with self.lock:
+            temp_path = self.path + '.tmp'
+            index = {}
+            with open(temp_path, 'wb') as out:
+                for record in self:
+                    digest = record_hash(record)
+                    index[record[self.id_field]] = (out.tell(), digest)
+                    out.write(self._line(record[self.id_field], digest, record, codec))
+            os.replace(temp_path, self.path)
+            self.index = index
+            self.lines = len(index)
+            if codec is not None:
+                self.codec = codec
+
+
+def store_stats(store):
+    # From the index alone; no record is read
+    size = os.path.getsize(store.path) if os.path.exists(store.path) else 0
+    return {
+        'programs': len(store),
+        'superseded_versions': store.lines - len(store),
+        'megabytes': round(size / 1e6, 2),
+        'compressed': store.codec is not None,
+    }
+
+
+def assign_program_id(record):
+    # 1point3acres records carry 'Program Name'/'Department', mastersportal ones 'Title' and 'Link'
+    record['Program ID'] = program_id(
+        record.get('Program URL') or record.get('Link'),
+        record.get('University', ''),
+        record.get('Department', ''),
+        record.get('Program Name') or record.get('Title', ''),
+    )
+    return record
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ('import', 'export', 'compact', 'count', 'stats'):
+        print("Usage: python program_store.py import <store.jsonl> <program_data.json|master_programs_final.csv>")
+        print("       python program_store.py export <store.jsonl> <program_data.json|.jsonl|.csv|.parquet> [batch size]")
+        print("       python program_store.py compact|count|stats <store.jsonl>")
+        sys.exit(1)
+    command, path = sys.argv[1], sys.argv[2]
+    store = ProgramStore(path)
+
+    if command == 'import':
+        source = sys.argv[3]
+        if source.endswith('.json'):
+            with open(source, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        else:
+            import pandas as pd
+            records = pd.read_csv(source, dtype=str, keep_default_na=False).to_dict('records')
+        changed = store.upsert_many(assign_program_id(record) for record in records)
+        logger.info(f"Imported {len(records)} records from {source}: {changed} new or changed, {len(store)} programs in {path}")
+    elif command == 'export':
+        from store_export import BATCH_SIZE, export_store
+        export_store(store, sys.argv[3], int(sys.argv[4]) if len(sys.argv) > 4 else BATCH_SIZE)
+    elif command == 'compact':
+        store.compact()
+        logger.info(f"Compacted {path} to {len(store)} programs")
+    elif command == 'stats':
+        print(json.dumps(store_stats(store)))
+    else:
+        print(len(store))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,158 @@
+import atexit
+import contextlib
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+
+# Shared logging setup for the scrapers. Records are put on a queue by the
+# scraping threads and written by a single background listener, so worker
+# threads never block on console I/O. Output is one JSON object per line
+# carrying the program id and phase of the code that logged it.
+
+_context = contextvars.ContextVar('scrape_log_context', default={})
+_listener = None
+
+# Fraction of DEBUG payload dumps that are actually emitted
+PAYLOAD_SAMPLE_RATE = 0.01
+
+# Loggers that get the requested level; everything else stays at INFO or above
+SCRAPER_LOGGERS = ('offer_scraper', 'crawl_engine', 'session_store', 'program_store', 'chrome_watchdog',
+                   'span_trace', 'crawl_profiler', 'unigo_crawler')
+# Library loggers whose DEBUG output (WebDriver wire traffic, connection pool chatter) would flood the queue
+QUIET_LOGGERS = ('selenium', 'urllib3', 'WDM')
+
+
+@contextlib.contextmanager
+def log_context(**fields):
+    # e.g. with log_context(program_id=link, phase='detail'): ...
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def update_log_context(**fields):
+    # Adds fields to the current context, e.g. once the program URL is known inside a log_context block
+    _context.set({**_context.get(), **fields})
+
+
+class ContextFilter(logging.Filter):
+    def filter(self, record):
+        record.context = _context.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    # Token bucket per logger name; records over the limit are dropped before they reach the queue
+    def __init__(self, rate=20.0, burst=50, limits=None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.limits = limits or {}
+        self.buckets = {}
+        self.suppressed = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate, burst = self.limits.get(record.name, (self.rate, self.burst))
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.get(record.name, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            if tokens < 1:
+                self.buckets[record.name] = (tokens, now)
+                self.suppressed[record.name] = self.suppressed.get(record.name, 0) + 1
+                return False
+            self.buckets[record.name] = (tokens - 1, now)
+            dropped = self.suppressed.pop(record.name, 0)
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    FIELDS = ('suppressed', 'payload')
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        # program_id, phase and anything else set through log_context
+        entry.update(getattr(record, 'context', {}))
+        for field in self.FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _PreparedQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Resolve the message and traceback in the calling thread, leave the JSON encoding to the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level=logging.INFO, stream=None, json_lines=True, rate=20.0, burst=50, limits=None, payload_sample_rate=0.01,
+                  loggers=SCRAPER_LOGGERS):
+    global _listener, PAYLOAD_SAMPLE_RATE
+    if _listener is not None:
+        return _listener
+    PAYLOAD_SAMPLE_RATE = payload_sample_rate
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if json_lines else logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    handler = _PreparedQueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    handler.addFilter(RateLimitFilter(rate, burst, limits))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    # DEBUG is only turned on for our own loggers, never for the root and so for every library
+    root.setLevel(max(level, logging.INFO))
+    for name in loggers:
+        logging.getLogger(name).setLevel(level)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_payload(logger, message, payload_fn):
+    # Large dumps (outerHTML etc.) are DEBUG-only and sampled; payload_fn is not even called otherwise
+    if not logger.isEnabledFor(logging.DEBUG) or random.random() >= PAYLOAD_SAMPLE_RATE:
+        return
+    logger.debug(message, extra={'payload': payload_fn()})
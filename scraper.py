@@ -1,3 +1,4 @@
+import argparse
 import logging
 import gc
 import psutil
@@ -23,22 +24,66 @@ import sys
 import os
 import subprocess
 import threading
-
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from collections import Counter
+from datetime import datetime
+from scrape_logging import setup_logging, update_log_context
+from chrome_watchdog import quit_driver, start_watchdog, stop_watchdog, track
+from crawl_profiler import MODES as PROFILE_MODES, start_profiler, stop_profiler
+from span_trace import span, start_tracing, stop_tracing, traced, traced_lock
+from program_store import DICT_SUFFIX, ProgramStore, assign_program_id, program_id
+from near_duplicates import NearDuplicateIndex
+from compact_records import ProgramList
+from store_export import export_store
+from sitemap_discovery import discover_programs, title_and_university
+from crawl_frontier import Budget, Frontier, ProgramScorer
+from snapshot_diff import SNAPSHOT_DIR, change_log_path, diff_snapshots, latest_snapshots, snapshot_path, write_change_log, write_snapshot
+from snapshot_versions import VersionStore
+
+# Set up logging: records are queued and written as JSON lines by a background listener
+setup_logging(level=logging.INFO)
 
 base_url = 'https://www.mastersportal.com/search/master/united-states?page='
 
-# Set the runtime limit (in seconds)
-if len(sys.argv) > 1:
-    runtime_limit = int(sys.argv[1])
-else:
-    runtime_limit = 60000  # Default to 100 minutes if no argument is provided
+parser = argparse.ArgumentParser(description="Scrape United States master's programs from mastersportal")
+parser.add_argument('runtime_limit', nargs='?', type=int, default=60000, help='seconds before progress is saved and the run stops (default: %(default)s)')
+parser.add_argument('discovery', nargs='?', choices=('listing', 'sitemap'), default='listing', metavar='discovery',
+                    help="how program links are found: 'listing' renders the search result pages, 'sitemap' reads the XML sitemaps (default: %(default)s)")
+parser.add_argument('page_budget', nargs='?', type=int, help='cap on detail pages fetched in this run, on top of the time limit')
+parser.add_argument('--trace', metavar='TRACE_JSON', help='record span timings and write a Chrome trace (Perfetto) plus a per-phase summary at exit')
+parser.add_argument('--profile', choices=PROFILE_MODES, help='sample: all-thread flamegraphs (wall clock and on-CPU); cprofile: deterministic stats of the main and worker threads, for short runs')
+parser.add_argument('--profile-out', default='profile', help='output path prefix for --profile (default: %(default)s); SIGUSR1 writes an interim profile')
+args = parser.parse_args()
+
+trace_file = args.trace
+profile_mode = args.profile
+profile_out = args.profile_out
+runtime_limit = args.runtime_limit
+discovery = args.discovery
+page_budget = args.page_budget
+
+# Programs popped from the frontier per batch once discovery is done
+FRONTIER_BATCH = 100
 
 start_time = time.time()
+budget = Budget(seconds=runtime_limit, pages=page_budget, started=start_time)
 
 progress_lock = threading.Lock()
 
+# Every detailed program is upserted here by its deterministic 'Program ID' as soon as it is scraped
+STORE_FILE = 'master_programs_store.jsonl'
+store = ProgramStore(STORE_FILE)
+# Programs listed under several links with the same About/Programme Structure text
+duplicates = NearDuplicateIndex.load()
+# Sitemap-discovered programs whose detail page is outside the United States; not fetched again on restart
+non_us_ids = set()
+# Programs waiting for their detail fetch, most valuable first; saved with the crawl state
+frontier = Frontier.load()
+scorer = ProgramScorer()
+# Program ID -> detail fetches that failed this run (page error, or the driver killed by the Chrome watchdog)
+failed_fetches = Counter()
+# A program is put back on the frontier after a failed fetch until it has failed this often
+MAX_FETCH_ATTEMPTS = 3
+
 def create_driver():
     options = Options()
     options.add_argument('--headless')
@@ -54,15 +99,21 @@ def create_driver():
     options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
     options.add_argument('--window-size=1280x1024')  # Set a standard window size
 
-    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    return track(webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options))
 
+@traced('listing.fetch')
 @retry(stop_max_attempt_number=3, wait_random_min=1000, wait_random_max=2000)
 def get_html_with_retry(url):
-    driver = create_driver()
+    update_log_context(program_id=None, phase='listing', url=url)
+    with span('driver.launch'):
+        driver = create_driver()
     try:
-        driver.get(url)
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
-        time.sleep(random.uniform(2, 4))  # Increased delay
+        with span('listing.get', url=url):
+            driver.get(url)
+        with span('listing.wait'):
+            WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
+        with span('listing.sleep'):
+            time.sleep(random.uniform(2, 4))  # Increased delay
         html = driver.page_source
         if "No results found" in html:
             logging.warning(f"No results found on page: {url}")
@@ -74,9 +125,12 @@ def get_html_with_retry(url):
         logging.error(f"Error retrieving {url}: {e}")
         return None
     finally:
-        driver.quit()
-        gc.collect()
+        with span('driver.quit'):
+            quit_driver(driver)
+        with span('gc'):
+            gc.collect()
 
+@traced('listing.parse')
 def parse_programs(html):
     if html is None:
         return []
@@ -95,116 +149,138 @@ def parse_programs(html):
         title = study.text.strip()
         university = organisation.text.strip()
         link = study.find_parent('a')['href']
-        programs.append({'Title': title, 'University': university, 'Link': link})
+        programs.append({'Program ID': program_id(link), 'Title': title, 'University': university, 'Link': link})
 
     gc.collect()  # Manually trigger garbage collection
     return programs
 
-def get_additional_info(program):
-    driver = create_driver()
-
-    try:
-        driver.get(program['Link'])
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
-        time.sleep(random.uniform(0.5, 2))  # Random delay between 0.5 and 2 seconds
-        html = driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
-
-        about_section = soup.find('h2', string='About')
-        about_text = about_section.find_next('p').text.strip() if about_section else ''
-
-        degree_tags = [tag.text.strip() for tag in soup.find_all('span', class_='Tag js-tag')]
-
-        fee_element = soup.find('div', class_='TuitionFeeContainer')
-        tuition_fee = fee_element.find('span', class_='Title').text.strip() if fee_element else ''
-
-        link_element = soup.find('a', class_='StudyLink TextLink TrackingExternalLink ProgrammeWebsiteLink')
-        program_website_link = urllib.parse.unquote(link_element['href'].split('target=')[1].split('&')[0]) if link_element else ''
-
-        duration_element = soup.find('span', class_='js-duration')
-        duration = duration_element.text.strip() if duration_element else ''
-
-        ranking_element = soup.find('span', class_='Value')
-        ranking = ranking_element.text.strip() if ranking_element else ''
-
-        location_element = soup.find('span', class_='Location')
-        location = location_element.text.strip() if location_element else ''
-
-        program_type_element = soup.find('div', class_='FactItemInformation FactListTitle js-durationFact')
-        program_type = program_type_element.text.strip() if program_type_element else ''
-
-        start_dates = []
-        startdate_container = soup.find('div', id='js-StartdateContainer')
-        if startdate_container:
-            startdate_items = startdate_container.find_all('li', class_='StartDateItem')
-            for item in startdate_items:
-                start_date_element = item.find('div', class_='FactItemInformation StartDateItemTime js-deadlineFact')
-                if start_date_element:
-                    start_date = start_date_element.text.strip()
-                    deadline_list = item.find_all('li', class_='ApplicationDeadline')
-                    deadlines_list = [deadline.find('div', class_='FactItemInformation Deadline').text.strip() for deadline in deadline_list if deadline.find('div', class_='FactItemInformation Deadline')]
-                    start_dates.append({'Start Date': start_date, 'Deadlines': deadlines_list})
-
-        program_structure = []
-        structure_section = soup.find('h2', string='Programme Structure')
-        if structure_section:
-            courses = structure_section.find_next('ul').find_all('li') if structure_section.find_next('ul') else []
-            program_structure = [course.text.strip() for course in courses]
-
-        gpa_container = soup.find('div', class_='CardContents GPACard js-CardGPA')
-        gpa_element = gpa_container.find('div', class_='Score').find('span') if gpa_container else None
-        gpa = gpa_element.text.strip() if gpa_element else ''
-
-        ielts_container = soup.find('div', class_='CardContents EnglishCardContents IELTSCard js-CardIELTS')
-        ielts_element = ielts_container.find('div', class_='Score').find('span') if ielts_container else None
-        ielts = ielts_element.text.strip() if ielts_element else ''
-
-        toefl_container = soup.find('div', class_='CardContents EnglishCardContents TOEFLCard js-CardTOEFL')
-        toefl_element = toefl_container.find('div', class_='Score').find('span') if toefl_container else None
-        toefl = toefl_element.text.strip() if toefl_element else ''
-
-        other_requirements_section = soup.find('article', id='OtherRequirements')
-        other_requirements = [req.text.strip() for req in other_requirements_section.find_all('li')] if other_requirements_section else []
-
-        cost_of_living_section = soup.find('section', id='CostOfLivingContainer')
-        if cost_of_living_section:
-            amount_elements = cost_of_living_section.find_all('span', class_='Amount')
-            if len(amount_elements) >= 2:
-                low_amount = amount_elements[0].text.strip()
-                high_amount = amount_elements[1].text.strip()
-                cost_of_living = f"{low_amount} - {high_amount} USD/month"
-            else:
-                cost_of_living = ''
+def parse_program_page(soup):
+    # Detail fields of a mastersportal program page
+    about_section = soup.find('h2', string='About')
+    about_text = about_section.find_next('p').text.strip() if about_section else ''
+
+    degree_tags = [tag.text.strip() for tag in soup.find_all('span', class_='Tag js-tag')]
+
+    fee_element = soup.find('div', class_='TuitionFeeContainer')
+    tuition_fee = fee_element.find('span', class_='Title').text.strip() if fee_element else ''
+
+    link_element = soup.find('a', class_='StudyLink TextLink TrackingExternalLink ProgrammeWebsiteLink')
+    program_website_link = urllib.parse.unquote(link_element['href'].split('target=')[1].split('&')[0]) if link_element else ''
+
+    duration_element = soup.find('span', class_='js-duration')
+    duration = duration_element.text.strip() if duration_element else ''
+
+    ranking_element = soup.find('span', class_='Value')
+    ranking = ranking_element.text.strip() if ranking_element else ''
+
+    location_element = soup.find('span', class_='Location')
+    location = location_element.text.strip() if location_element else ''
+
+    program_type_element = soup.find('div', class_='FactItemInformation FactListTitle js-durationFact')
+    program_type = program_type_element.text.strip() if program_type_element else ''
+
+    start_dates = []
+    startdate_container = soup.find('div', id='js-StartdateContainer')
+    if startdate_container:
+        startdate_items = startdate_container.find_all('li', class_='StartDateItem')
+        for item in startdate_items:
+            start_date_element = item.find('div', class_='FactItemInformation StartDateItemTime js-deadlineFact')
+            if start_date_element:
+                start_date = start_date_element.text.strip()
+                deadline_list = item.find_all('li', class_='ApplicationDeadline')
+                deadlines_list = [deadline.find('div', class_='FactItemInformation Deadline').text.strip() for deadline in deadline_list if deadline.find('div', class_='FactItemInformation Deadline')]
+                start_dates.append({'Start Date': start_date, 'Deadlines': deadlines_list})
+
+    program_structure = []
+    structure_section = soup.find('h2', string='Programme Structure')
+    if structure_section:
+        courses = structure_section.find_next('ul').find_all('li') if structure_section.find_next('ul') else []
+        program_structure = [course.text.strip() for course in courses]
+
+    gpa_container = soup.find('div', class_='CardContents GPACard js-CardGPA')
+    gpa_element = gpa_container.find('div', class_='Score').find('span') if gpa_container else None
+    gpa = gpa_element.text.strip() if gpa_element else ''
+
+    ielts_container = soup.find('div', class_='CardContents EnglishCardContents IELTSCard js-CardIELTS')
+    ielts_element = ielts_container.find('div', class_='Score').find('span') if ielts_container else None
+    ielts = ielts_element.text.strip() if ielts_element else ''
+
+    toefl_container = soup.find('div', class_='CardContents EnglishCardContents TOEFLCard js-CardTOEFL')
+    toefl_element = toefl_container.find('div', class_='Score').find('span') if toefl_container else None
+    toefl = toefl_element.text.strip() if toefl_element else ''
+
+    other_requirements_section = soup.find('article', id='OtherRequirements')
+    other_requirements = [req.text.strip() for req in other_requirements_section.find_all('li')] if other_requirements_section else []
+
+    cost_of_living_section = soup.find('section', id='CostOfLivingContainer')
+    if cost_of_living_section:
+        amount_elements = cost_of_living_section.find_all('span', class_='Amount')
+        if len(amount_elements) >= 2:
+            low_amount = amount_elements[0].text.strip()
+            high_amount = amount_elements[1].text.strip()
+            cost_of_living = f"{low_amount} - {high_amount} USD/month"
         else:
             cost_of_living = ''
+    else:
+        cost_of_living = ''
+
+    discipline_section = soup.find('article', class_='FactItem Disciplines')
+    disciplines = [disc.text.strip() for disc in discipline_section.find_all('a', class_='TextOnly')] if discipline_section else []
+
+    return {
+        'About': about_text,
+        'Degree Tags': degree_tags,
+        'Tuition Fee': tuition_fee,
+        'Program Website': program_website_link,
+        'Duration': duration,
+        'Ranking': ranking,
+        'Location': location,
+        'Program Type': program_type,
+        'Start Dates and Deadlines': start_dates,
+        'Program Structure': program_structure,
+        'GPA': gpa,
+        'IELTS': ielts,
+        'TOEFL': toefl,
+        'Other Requirements': other_requirements,
+        'Cost of Living': cost_of_living,
+        'Disciplines': disciplines
+    }
+
+@traced('program')
+def get_additional_info(program):
+    # 'Scraped At' is only set once the page was read; a program without it after this call was not fetched
+    update_log_context(program_id=program['Link'], phase='detail')
+    program.pop('Scraped At', None)
+    with span('driver.launch'):
+        driver = create_driver()
 
-        discipline_section = soup.find('article', class_='FactItem Disciplines')
-        disciplines = [disc.text.strip() for disc in discipline_section.find_all('a', class_='TextOnly')] if discipline_section else []
-
-        program.update({
-            'About': about_text,
-            'Degree Tags': degree_tags,
-            'Tuition Fee': tuition_fee,
-            'Program Website': program_website_link,
-            'Duration': duration,
-            'Ranking': ranking,
-            'Location': location,
-            'Program Type': program_type,
-            'Start Dates and Deadlines': start_dates,
-            'Program Structure': program_structure,
-            'GPA': gpa,
-            'IELTS': ielts,
-            'TOEFL': toefl,
-            'Other Requirements': other_requirements,
-            'Cost of Living': cost_of_living,
-            'Disciplines': disciplines
-        })
+    try:
+        with span('detail.get', program=program['Link']):
+            driver.get(program['Link'])
+        with span('detail.wait'):
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
+        with span('detail.sleep'):
+            time.sleep(random.uniform(0.5, 2))  # Random delay between 0.5 and 2 seconds
+        with span('detail.parse'):
+            html = driver.page_source
+            soup = BeautifulSoup(html, 'html.parser')
+            program.update(parse_program_page(soup))
+
+        if not program['University']:
+            # Sitemap programs whose page could not be checked only know their URL; the page title names both
+            title, university = title_and_university(soup.title.text.strip() if soup.title else '')
+            if university:
+                program.update({'Title': title or program['Title'], 'University': university})
+
+        program['Scraped At'] = datetime.now().isoformat(timespec='seconds')
         logging.info(f"Processed program: {program['Title']}")
     except Exception as e:
         logging.error(f"Exception occurred while processing program {program['Title']}: {traceback.format_exc()}")
     finally:
-        driver.quit()
-        gc.collect()  # Manually trigger garbage collection
+        with span('driver.quit'):
+            quit_driver(driver)
+        with span('gc'):
+            gc.collect()  # Manually trigger garbage collection
     
     return program
 
@@ -236,14 +312,21 @@ def check_cpu_usage():
         logging.warning("CPU usage is high. Pausing for a while...")
         time.sleep(6)  # Pause for 6 seconds to allow CPU usage to drop
 
+@traced('save_progress')
 def save_progress(all_programs, current_page, scraped_count):
-    with progress_lock:
+    with traced_lock(progress_lock, 'save_progress.lock_wait'):
         logging.info(f"Saving progress at page {current_page}, scraped count {scraped_count}")
         try:
-            pd.DataFrame(all_programs).to_csv('master_programs_progress.csv', index=False)
+            # Programs are already in the store; only the crawl position needs saving
             with open('scraper_state.json', 'w') as f:
-                json.dump({'current_page': current_page, 'scraped_count': scraped_count}, f)
-            logging.info(f"Progress saved. Current page: {current_page}, Programs scraped: {scraped_count}")
+                json.dump({'current_page': current_page, 'scraped_count': scraped_count, 'non_us_ids': sorted(non_us_ids)}, f)
+            duplicates.save()
+            frontier.save()
+            scorer.save()
+            # Everything up to here is in the store, so the in-memory records can be dropped to their IDs
+            all_programs.spill()
+            rss = psutil.Process().memory_info().rss / 2**20
+            logging.info(f"Progress saved. Current page: {current_page}, Programs scraped: {scraped_count}, RSS {rss:.0f} MiB")
         except Exception as e:
             logging.error(f"Error saving progress: {e}")
 
@@ -251,27 +334,157 @@ def load_progress():
     try:
         with progress_lock:
             logging.info("Loading progress")
-            df = pd.read_csv('master_programs_progress.csv')
+            if len(store) == 0 and os.path.exists('master_programs_progress.csv'):
+                # Older runs checkpointed the whole list to CSV; move it into the store once
+                legacy = pd.read_csv('master_programs_progress.csv').to_dict('records')
+                store.upsert_many(assign_program_id(program) for program in legacy)
             with open('scraper_state.json', 'r') as f:
                 state = json.load(f)
             # Validate state
             if 'current_page' not in state or 'scraped_count' not in state:
                 raise ValueError("Invalid state in scraper_state.json")
+            non_us_ids.update(state.get('non_us_ids', []))
             logging.info(f"Progress loaded. Current page: {state['current_page']}, Programs scraped: {state['scraped_count']}")
-        return df.to_dict('records'), state['current_page'], state['scraped_count']
+        return ProgramList.from_store(store), state['current_page'], state['scraped_count']
     except (FileNotFoundError, ValueError) as e:
         logging.error(f"Error loading progress: {e}")
-        return [], 1, 0
+        return ProgramList.from_store(store), 1, len(store)
+
+def fetch_details(new_programs, pbar, limit):
+    # Detail pages for one batch of programs popped from the frontier, each stored as soon as it completes.
+    # Only as many as still fit under the limit are fetched; the rest are returned unfetched.
+    global scraped_count
+    room = max(0, limit - scraped_count)
+    new_programs, unused = new_programs[:room], new_programs[room:]
+    with ThreadPoolExecutor(max_workers=25) as inner_executor:
+        inner_futures = {inner_executor.submit(get_additional_info, program): program for program in new_programs}
+        for inner_future in as_completed(inner_futures):
+            program = inner_futures[inner_future]
+            try:
+                detailed_program = inner_future.result()
+                budget.record()
+                if 'Scraped At' not in detailed_program:
+                    # The page failed to load or its driver was killed mid-page; nothing of it is stored
+                    failed_fetches[program['Program ID']] += 1
+                    if failed_fetches[program['Program ID']] < MAX_FETCH_ATTEMPTS:
+                        frontier.push(program, scorer.score(program))
+                    else:
+                        logging.warning(f"Giving up on {program['Link']} after {MAX_FETCH_ATTEMPTS} failed fetches")
+                    continue
+                if not is_us_program(detailed_program):
+                    non_us_ids.add(detailed_program['Program ID'])
+                    logging.info(f"Skipping non-US program {detailed_program['Title']} ({detailed_program['Location']})")
+                    continue
+                with span('near_duplicates.add'):
+                    duplicate_of = duplicates.add(detailed_program['Program ID'], detailed_program)
+                if duplicate_of:
+                    detailed_program['Duplicate Of'] = duplicate_of
+                refreshed = detailed_program['Program ID'] in store
+                with span('store.upsert'):
+                    store.upsert(detailed_program)
+                if refreshed:
+                    # A stale program fetched again; it is already counted and listed
+                    frontier.stats['refreshed'] += 1
+                    continue
+                all_programs.append(detailed_program)
+                scraped_count += 1
+                pbar.update(1)
+
+                if scraped_count % 20 == 0:
+                    save_progress(all_programs, current_page, scraped_count)
+            except Exception as e:
+                logging.error(f"Exception occurred while processing additional info for program {program['Title']}: {traceback.format_exc()}")
+    return unused
+
+def is_us_program(program):
+    # The search listing is limited to the United States and sitemap discovery checks each page's country
+    # before it gets here; this catches pages whose country could not be checked then
+    location = program.get('Location', '')
+    return not location or 'United States' in location
+
+def enqueue(programs):
+    # New programs, and stored ones that have gone stale, wait on the frontier in order of value
+    queued = known_duplicates = 0
+    for program in programs:
+        record_id = program['Program ID']
+        if record_id in non_us_ids:
+            continue
+        stored = store.get(record_id) if record_id in store else None
+        if stored is None and duplicates.is_known_duplicate(program):
+            # Same title and university as a program already fetched under another link and found to be a duplicate
+            known_duplicates += 1
+            continue
+        if stored is not None and not scorer.needs_refresh(stored):
+            continue
+        if stored is not None and duplicates.duplicate_of(record_id):
+            # A stale stored duplicate is not refreshed; the program it duplicates is. This is the only skip that
+            # applies to sitemap programs, which are known by their URL alone
+            known_duplicates += 1
+            continue
+        queued += frontier.push(program, scorer.score(program, stored))
+    if known_duplicates:
+        duplicates.stats['skipped_fetches'] += known_duplicates
+        logging.info(f"Skipping {known_duplicates} detail fetches for known near-duplicates")
+    return queued
+
+def fetch_from_frontier(pbar, limit, count):
+    # Fetches up to count of the best programs waiting, within the run's budget
+    count = min(count, budget.remaining_pages(), limit - scraped_count)
+    if count <= 0 or not len(frontier):
+        return 0
+    batch = frontier.pop_many(count)
+    with span('detail_batch', size=len(batch)):
+        unused = fetch_details(batch, pbar, limit)
+    for program in unused:
+        frontier.push(program, scorer.score(program))
+    return len(batch) - len(unused)
+
+def drain_frontier(pbar, limit):
+    # Whatever is left once discovery is done, best first, until the budget runs out
+    while len(frontier) and scraped_count < limit and not budget.exhausted():
+        if not fetch_from_frontier(pbar, limit, FRONTIER_BATCH):
+            break
+        gc.collect()
+        check_cpu_usage()
+
+def scrape_sitemap_programs(pbar, limit):
+    # discover_programs checks every program page at a polite rate and drops other countries and degrees,
+    # which takes hours over the whole site, so detail fetches start as programs arrive: after every
+    # FRONTIER_BATCH programs found, the best FRONTIER_BATCH waiting are fetched, as after a listing page
+    stats = {}
+    found = 0
+    for program in discover_programs(stats=stats):
+        if budget.exhausted() or scraped_count >= limit:
+            break
+        program['Program ID'] = program_id(program['Link'])
+        enqueue([program])
+        found += 1
+        if found % FRONTIER_BATCH == 0:
+            fetch_from_frontier(pbar, limit, FRONTIER_BATCH)
+    logging.info(f"Sitemap discovery: {stats}, frontier {len(frontier)}")
+    drain_frontier(pbar, limit)
+    return found
 
 def scrape_programs(base_url, num_pages=1980, limit=40000):
-    global all_programs, current_page, scraped_count
+    global all_programs, current_page, scraped_count, resumed_count
     all_programs, current_page, scraped_count = load_progress()
+    # all_programs lists every program in the store; this run's count is scraped_count - resumed_count
+    resumed_count = scraped_count
+    if len(frontier):
+        logging.info(f"Resuming with {len(frontier)} programs on the frontier")
 
     with tqdm(total=limit, initial=scraped_count, desc="Scraping Progress") as pbar:
+        if discovery == 'sitemap':
+            if scrape_sitemap_programs(pbar, limit):
+                save_progress(all_programs, current_page, scraped_count)
+                logging.info(f"Frontier: {len(frontier)} left, {frontier.stats}, {len(failed_fetches)} programs with failed fetches")
+                logging.info(f"Near-duplicates: {duplicates.report()}")
+                return all_programs
+            logging.warning("No programs found in the sitemaps; falling back to the search listing pages")
         with ThreadPoolExecutor(max_workers=25) as executor:
             while current_page <= num_pages and scraped_count < limit:
-                if time.time() - start_time > runtime_limit:
-                    logging.info(f"Runtime limit of {runtime_limit} seconds reached. Saving progress and exiting.")
+                if budget.exhausted():
+                    logging.info(f"Budget of {runtime_limit} seconds / {budget.pages} pages reached. Saving progress and exiting.")
                     save_progress(all_programs, current_page, scraped_count)
                     return all_programs
 
@@ -281,25 +494,9 @@ def scrape_programs(base_url, num_pages=1980, limit=40000):
                     html = future.result()
                     if html:
                         programs = parse_programs(html)
-                        new_programs = [p for p in programs if not any(existing_p['Link'] == p['Link'] for existing_p in all_programs)]
-                        
-                        with ThreadPoolExecutor(max_workers=25) as inner_executor:
-                            inner_futures = {inner_executor.submit(get_additional_info, program): program for program in new_programs}
-                            for inner_future in as_completed(inner_futures):
-                                program = inner_futures[inner_future]
-                                try:
-                                    detailed_program = inner_future.result()
-                                    all_programs.append(detailed_program)
-                                    scraped_count += 1
-                                    pbar.update(1)
-                                    
-                                    if scraped_count % 20 == 0:
-                                        save_progress(all_programs, current_page, scraped_count)
-                                    
-                                    if scraped_count >= limit:
-                                        break
-                                except Exception as e:
-                                    logging.error(f"Exception occurred while processing additional info for program {program['Title']}: {traceback.format_exc()}")
+                        queued = enqueue(programs)
+                        # As many fetches as the page listed, taken from the best of everything seen so far
+                        fetch_from_frontier(pbar, limit, queued)
                     else:
                         logging.error(f"Failed to retrieve or parse page {current_page}")
                 
@@ -307,15 +504,42 @@ def scrape_programs(base_url, num_pages=1980, limit=40000):
                     logging.error(f"Exception occurred while processing page {current_page}: {traceback.format_exc()}")
                 
                 current_page += 1
-                gc.collect()
-                time.sleep(5)
-                check_cpu_usage()
+                with span('gc'):
+                    gc.collect()
+                with span('listing.sleep'):
+                    time.sleep(5)
+                with span('check_cpu_usage'):
+                    check_cpu_usage()
                 if scraped_count >= limit:
                     break
+            drain_frontier(pbar, limit)
         
     save_progress(all_programs, current_page, scraped_count)
+    logging.info(f"Frontier: {len(frontier)} left, {frontier.stats}, {len(failed_fetches)} programs with failed fetches")
+    logging.info(f"Near-duplicates: {duplicates.report()}")
     return all_programs
 
+def record_snapshot():
+    # Each finished run leaves a hashed snapshot; the change log against the previous one sits beside it
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    path = snapshot_path()
+    write_snapshot(store, path)
+    previous = latest_snapshots(count=2)
+    if len(previous) == 2:
+        changes_path = change_log_path(path)
+        summary = write_change_log(diff_snapshots(previous[0], path), changes_path)
+        logging.info(f"Changes since {previous[0]}: {summary}")
+    # Runs are kept as versions (full every few runs, deltas between); only the newest snapshot stays a file,
+    # and older runs are diffed by version ID (python snapshot_diff.py diff v3 <newest snapshot>)
+    versions = VersionStore()
+    if not len(versions) and len(previous) == 2:
+        versions.add_version(previous[0])
+    versions.add_version(path)
+    for old in previous[:-1]:
+        for old_path in (old, old + DICT_SUFFIX):
+            if os.path.exists(old_path):
+                os.remove(old_path)
+
 def signal_handler(signum, frame):
     logging.info("Received interrupt signal. Saving progress and exiting...")
     save_progress(all_programs, current_page, scraped_count)
@@ -332,21 +556,29 @@ def main():
     
     #cpu_monitor_thread = threading.Thread(target=monitor_cpu_usage, daemon=True)
     #cpu_monitor_thread.start()
+    # Reaps Chrome left over by a crashed earlier run and kills drivers that outgrow the memory cap
+    start_watchdog()
+    if trace_file:
+        start_tracing(trace_file)
+    if profile_mode:
+        start_profiler(profile_mode, profile_out)
     
     try:
         programs = scrape_programs(base_url, num_pages=1980, limit=40000)
 
         if programs:
-            df = pd.DataFrame(programs)
-            df.to_csv('master_programs_final.csv', index=False)
-            gc.collect()
-            logging.info(f"Data saved to master_programs_final.csv. Total programs scraped: {len(programs)}")
+            # Streamed from the store in batches rather than built as one DataFrame at peak memory
+            export_store(store, 'master_programs_final.csv')
+            logging.info(f"Data saved to master_programs_final.csv ({len(store)} programs). "
+                         f"Programs scraped: {scraped_count - resumed_count} in this run, {scraped_count} in total")
+            record_snapshot()
         else:
             logging.info("No programs scraped. Verify the scraping logic.")
     finally:
-        stop_event.set()
         #cpu_monitor_thread.join(timeout=5)
-        logging.info("CPU monitoring thread stopped.")
+        stop_watchdog()
+        stop_tracing()
+        stop_profiler()
         gc.collect()
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+import requests
+
+# Exportable 1point3acres login session. Log in once in a visible browser,
+# save cookies and localStorage to a file, and every later process (headless
+# Chrome on Linux or a plain requests client) loads it in milliseconds
+# instead of reusing a Chrome profile and waiting on a manual login.
+
+logger = logging.getLogger('session_store')
+
+SESSION_FILE = 'offer_session.json'
+SITE_URL = 'https://offer.1point3acres.com/'
+LOGIN_URL = 'https://auth.1point3acres.com/login?url=https://offer.1point3acres.com/?from=discuz'
+
+
+class SessionExpiredError(Exception):
+    pass
+
+
+def capture_session(driver):
+    local_storage = driver.execute_script(
+        "var items = {}; for (var i = 0; i < localStorage.length; i++) {"
+        " var key = localStorage.key(i); items[key] = localStorage.getItem(key); } return items;"
+    )
+    return {
+        'saved_at': time.time(),
+        'origin': SITE_URL,
+        'user_agent': driver.execute_script("return navigator.userAgent;"),
+        'cookies': driver.get_cookies(),
+        'local_storage': local_storage or {},
+    }
+
+
+def save_session(session, path=SESSION_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(session, f, ensure_ascii=False, indent=2)
+    logger.info(f"Saved {len(session['cookies'])} cookies and {len(session['local_storage'])} localStorage items to {path}")
+
+
+def load_session(path=SESSION_FILE):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def session_expiry(session):
+    # The session lasts as long as its shortest-lived persistent cookie; session cookies have no expiry
+    expiries = [cookie['expiry'] for cookie in session.get('cookies', []) if cookie.get('expiry')]
+    return min(expiries) if expiries else None
+
+
+def describe_expiry(session):
+    expiry = session_expiry(session)
+    if expiry is None:
+        return "no persistent cookies; validity can only be checked live"
+    remaining = expiry - time.time()
+    when = datetime.fromtimestamp(expiry).isoformat(timespec='seconds')
+    if remaining <= 0:
+        return f"expired at {when}"
+    return f"expires at {when} (in {remaining / 3600:.1f} h)"
+
+
+def is_expired(session, margin=300):
+    expiry = session_expiry(session)
+    return expiry is not None and expiry - margin <= time.time()
+
+
+def apply_session(driver, session):
+    # Cookies and localStorage can only be set for the origin currently loaded
+    driver.get(session.get('origin', SITE_URL))
+    for cookie in session.get('cookies', []):
+        try:
+            driver.add_cookie(cookie)
+        except Exception as e:
+            logger.debug(f"Skipping cookie {cookie.get('name')} for {cookie.get('domain')}: {e}")
+    if session.get('local_storage'):
+        driver.execute_script(
+            "var items = arguments[0]; for (var key in items) { localStorage.setItem(key, items[key]); }",
+            session['local_storage'],
+        )
+    driver.refresh()
+
+
+def requests_session(session):
+    http = requests.Session()
+    if session.get('user_agent'):
+        http.headers['User-Agent'] = session['user_agent']
+    for cookie in session.get('cookies', []):
+        http.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+    return http
+
+
+def check_session_http(session, timeout=10):
+    # The login page redirects straight to offer.1point3acres.com when the session is still logged in
+    response = requests_session(session).get(LOGIN_URL, timeout=timeout, allow_redirects=True)
+    return 'offer.1point3acres.com' in response.url
+
+
+def restore_session(driver, path=SESSION_FILE):
+    session = load_session(path)
+    if session is None:
+        raise SessionExpiredError(f"No saved session at {path}; run 'python session_store.py export' first")
+    if is_expired(session):
+        raise SessionExpiredError(f"Saved session {describe_expiry(session)}; run 'python session_store.py export' again")
+    apply_session(driver, session)
+    driver.get(LOGIN_URL)
+    if 'offer.1point3acres.com' not in driver.current_url:
+        raise SessionExpiredError(f"Saved session at {path} was rejected by the site; run 'python session_store.py export' again")
+    logger.info(f"Restored session from {path}, {describe_expiry(session)}")
+    return session
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'check'
+    path = sys.argv[2] if len(sys.argv) > 2 else SESSION_FILE
+
+    if command == 'export':
+        # One interactive login in a visible browser, then the session is saved for headless runs
+        from offer_scraper import setup_driver, check_login
+        driver = setup_driver()
+        try:
+            if check_login(driver):
+                session = capture_session(driver)
+                save_session(session, path)
+                logger.info(f"Session {describe_expiry(session)}")
+            else:
+                logger.error("Login failed; no session saved.")
+        finally:
+            driver.quit()
+    elif command == 'check':
+        session = load_session(path)
+        if session is None:
+            logger.error(f"No saved session at {path}")
+            sys.exit(1)
+        logger.info(f"Session {describe_expiry(session)}")
+        valid = not is_expired(session) and check_session_http(session)
+        logger.info("Session is valid." if valid else "Session is no longer valid; export it again.")
+        sys.exit(0 if valid else 1)
+    else:
+        print("Usage: python session_store.py [export|check] [session file]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
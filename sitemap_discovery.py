@@ -0,0 +1,211 @@
+import argparse
+import gzip
+import logging
+import re
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+
+from unigo_crawler import HostRateLimiter, make_session, serve_fixtures
+
+# Finds mastersportal program pages from the site's XML sitemaps instead of
+# rendering ~2000 search result pages in Chrome. Sitemaps (and sitemap indexes
+# pointing at more sitemaps, gzipped or not) are parsed as a stream with
+# iterparse and each element is cleared once read, so memory stays constant no
+# matter how many URLs they list.
+#
+# The sitemaps list programs worldwide and study URLs carry no country or
+# locale segment, so each program page is checked with a plain GET (a few
+# concurrently, at most CHECK_RATE per second to the site) before it is handed
+# on: only United States master's programs are yielded, and Chrome is never
+# opened for the rest.
+
+SITE_URL = 'https://www.mastersportal.com'
+# Program detail pages, e.g. https://www.mastersportal.com/studies/12345/data-science.html
+STUDY_URL = re.compile(r'/studies/(\d+)/([^/?#]+?)(?:\.html)?$')
+# Child sitemaps whose name mentions one of these are followed; others (articles, countries) are skipped
+SITEMAP_HINTS = ('stud', 'program')
+TIMEOUT = (5, 60)
+COUNTRY = 'United States'
+# Degree tags of master's programs (M.Sc., MSc, MBA, MPhil, LL.M., Master of ...); Pre-Master and bachelor tags are not
+MASTER_DEGREE = re.compile(r'^(?:M[A-Z.]|LL\.?\s?M|Master\b)')
+CHECK_WORKERS = 8
+# Page checks per second to one host, shared by the workers
+CHECK_RATE = 2.0
+CHECK_BATCH = 64
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _open_stream(session, url):
+    response = session.get(url, stream=True, timeout=TIMEOUT)
+    response.raise_for_status()
+    # Transfer encodings are undone by urllib3; a .xml.gz file itself still needs gunzip
+    response.raw.decode_content = True
+    stream = response.raw
+    if url.endswith('.gz') or response.headers.get('Content-Type', '').startswith(('application/gzip', 'application/x-gzip')):
+        stream = gzip.GzipFile(fileobj=stream)
+    return response, stream
+
+
+def iter_sitemap(session, url):
+    # Yields ('sitemap', url) for sitemap index entries and ('url', url) for pages
+    response, stream = _open_stream(session, url)
+    try:
+        context = ET.iterparse(stream, events=('start', 'end'))
+        _, root = next(context)
+        for event, element in context:
+            if event != 'end':
+                continue
+            name = _local_name(element.tag)
+            if name == 'loc':
+                parent = 'sitemap' if _local_name(root.tag) == 'sitemapindex' else 'url'
+                yield parent, element.text.strip()
+            elif name in ('url', 'sitemap'):
+                # Drop what has been read so the tree never grows
+                root.clear()
+    finally:
+        response.close()
+
+
+def robots_sitemaps(session, site_url=SITE_URL):
+    try:
+        response = session.get(urljoin(site_url, '/robots.txt'), timeout=TIMEOUT)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logging.warning(f"Could not read robots.txt from {site_url}: {e}")
+        return []
+    return [line.split(':', 1)[1].strip() for line in response.text.splitlines() if line.lower().startswith('sitemap:')]
+
+
+def _study_urls(session, pending, stats):
+    # Every program URL reachable from the pending sitemaps, each yielded once
+    seen_sitemaps = set()
+    seen_programs = set()
+    while pending:
+        sitemap_url = pending.pop(0)
+        if sitemap_url in seen_sitemaps:
+            continue
+        seen_sitemaps.add(sitemap_url)
+        stats['sitemaps'] += 1
+        try:
+            for kind, url in iter_sitemap(session, sitemap_url):
+                # Sitemaps should list absolute URLs; relative ones are resolved against the sitemap
+                url = urljoin(sitemap_url, url)
+                if kind == 'sitemap':
+                    if any(hint in urlsplit(url).path.lower() for hint in SITEMAP_HINTS):
+                        pending.append(url)
+                    continue
+                stats['urls'] += 1
+                match = STUDY_URL.search(urlsplit(url).path)
+                if match and match.group(1) not in seen_programs:
+                    seen_programs.add(match.group(1))
+                    stats['studies'] += 1
+                    yield url
+        except (requests.RequestException, ET.ParseError, OSError) as e:
+            logging.error(f"Error reading sitemap {sitemap_url}: {e}")
+
+
+def title_and_university(page_title):
+    # A program page's title reads "<program> - <university>" (or with " | "); ('', '') when it does not
+    for separator in (' - ', ' | '):
+        if separator in page_title:
+            title, university = [part.strip() for part in page_title.split(separator)[:2]]
+            return title, university
+    return '', ''
+
+
+def check_program(session, rate_limiter, url):
+    # ('programs', page title) for a US master's program, otherwise (why it was left out, '').
+    # Location and degree tags are read as parse_program_page reads them; a page without them is kept.
+    rate_limiter.wait(url)
+    try:
+        response = session.get(url, timeout=TIMEOUT)
+        if response.status_code in (404, 410):
+            return 'missing', ''
+        response.raise_for_status()
+    except requests.RequestException as e:
+        # Not known either way; the detail stage still checks the Location
+        logging.warning(f"Could not check program page {url}: {e}")
+        return 'unchecked', ''
+    soup = BeautifulSoup(response.text, 'html.parser')
+    location = soup.find('span', class_='Location')
+    if location and location.text.strip() and COUNTRY not in location.text:
+        return 'non_us', ''
+    degree_tags = [tag.text.strip() for tag in soup.find_all('span', class_='Tag js-tag')]
+    if degree_tags and not any(MASTER_DEGREE.match(tag) for tag in degree_tags):
+        return 'not_master', ''
+    return 'programs', soup.title.text.strip() if soup.title else ''
+
+
+def discover_programs(session=None, roots=None, site_url=SITE_URL, stats=None, check=True, workers=CHECK_WORKERS, requests_per_second=CHECK_RATE):
+    # US master's programs reachable from the root sitemaps, each yielded once (see program_from_url).
+    # check=False skips the page check and yields every program, known by its URL alone.
+    session = session or make_session()
+    stats = stats if stats is not None else {}
+    stats.update({'sitemaps': 0, 'urls': 0, 'studies': 0, 'programs': 0, 'non_us': 0, 'not_master': 0, 'missing': 0, 'unchecked': 0})
+    pending = list(roots or robots_sitemaps(session, site_url) or [urljoin(site_url, '/sitemap.xml')])
+    urls = _study_urls(session, pending, stats)
+    if not check:
+        for url in urls:
+            stats['programs'] += 1
+            yield program_from_url(url)
+        return
+    rate_limiter = HostRateLimiter(requests_per_second)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # A batch at a time, so memory stays flat and programs come out in sitemap order
+        while True:
+            batch = list(islice(urls, CHECK_BATCH))
+            if not batch:
+                break
+            for url, (verdict, page_title) in zip(batch, executor.map(partial(check_program, session, rate_limiter), batch)):
+                stats[verdict] += 1
+                if verdict in ('programs', 'unchecked'):
+                    yield program_from_url(url, page_title)
+
+
+def program_from_url(url, page_title=''):
+    # The listing page used to supply Title and University. The page check read the page's title, which
+    # names both, so the frontier can rank the program by its university; without it only the URL slug is
+    # known and get_additional_info fills both in from the detail page.
+    slug = STUDY_URL.search(urlsplit(url).path).group(2)
+    title, university = title_and_university(page_title)
+    return {'Title': title or slug.replace('-', ' ').strip().title(), 'University': university, 'Link': url}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List mastersportal programs from the sitemaps')
+    parser.add_argument('sitemap', nargs='*', help='sitemap or sitemap index URLs (default: from robots.txt)')
+    parser.add_argument('--fixtures', help='serve this directory locally and read its sitemap.xml, e.g. fixtures/sitemaps')
+    parser.add_argument('--show', type=int, default=5, help='number of programs to print')
+    parser.add_argument('--no-check', action='store_true', help="list every program URL without checking the pages' country and degree")
+    parser.add_argument('--requests-per-second', type=float, default=CHECK_RATE, help='page checks per second (default: %(default)s)')
+    args = parser.parse_args()
+
+    server = None
+    site_url, roots = SITE_URL, args.sitemap or None
+    if args.fixtures:
+        server, site_url = serve_fixtures(args.fixtures)
+    try:
+        stats = {}
+        programs = discover_programs(roots=roots, site_url=site_url, stats=stats, check=not args.no_check,
+                                     requests_per_second=args.requests_per_second)
+        for count, program in enumerate(programs):
+            if count < args.show:
+                print(f"{program['Link']}  {program['Title']} - {program['University'] or '?'}")
+        logging.info(f"Sitemap discovery: {stats}")
+    finally:
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
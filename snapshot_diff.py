@@ -0,0 +1,190 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+from collections import Counter
+from datetime import datetime
+
+from program_store import (DICT_SUFFIX, ENTRY_PREFIX, VOLATILE_FIELDS, ProgramStore, assign_program_id,
+                           record_hash, store_codec)
+
+# What changed between two crawl runs without loading either into pandas.
+# A snapshot is a ProgramStore-format JSON-lines file sorted by program ID in
+# which every line also carries a short hash per field. Diffing two snapshots
+# is then a single merge pass over both files: lines whose record hashes match
+# are skipped without being decoded, and only modified records are compared
+# field by field.
+
+SNAPSHOT_DIR = 'snapshots'
+FIELD_HASH_LENGTH = 12
+# Stored versions (see snapshot_versions.py) can be diffed by ID, e.g. v12 or 12
+VERSION_ID = re.compile(r'^v?(\d+)$')
+
+
+def field_hashes(record, ignore=VOLATILE_FIELDS):
+    return {
+        field: hashlib.sha1(json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()[:FIELD_HASH_LENGTH]
+        for field, value in record.items() if field not in ignore
+    }
+
+
+def _snapshot_line(record_id, record, codec):
+    entry = {'id': record_id, 'hash': record_hash(record), 'fields': field_hashes(record),
+             'record': codec.encode(record) if codec is not None else record}
+    return (json.dumps(entry, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+
+def write_snapshot(source, path):
+    # source: a ProgramStore, or a program_data.json / master_programs_final.csv export
+    codec = None
+    if isinstance(source, ProgramStore):
+        codec = source.codec
+        records = (source.get(record_id) for record_id in sorted(source.index))
+        if codec is not None:
+            # The snapshot is compressed with the store's dictionary, so it travels with it
+            shutil.copyfile(source.path + DICT_SUFFIX, path + DICT_SUFFIX)
+    else:
+        # The last record with an ID wins, as with ProgramStore.upsert
+        by_id = {record['Program ID']: record for record in map(assign_program_id, _read_export(source))}
+        records = (by_id[record_id] for record_id in sorted(by_id))
+    count = 0
+    with open(path + '.tmp', 'wb') as f:
+        for record in records:
+            f.write(_snapshot_line(record['Program ID'], record, codec))
+            count += 1
+    os.replace(path + '.tmp', path)
+    logging.info(f"Wrote snapshot {path} with {count} programs")
+    return count
+
+
+def _read_export(path):
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    import pandas as pd
+    return pd.read_csv(path, dtype=str, keep_default_na=False).to_dict('records')
+
+
+def snapshot_path(directory=SNAPSHOT_DIR, when=None):
+    return os.path.join(directory, f"programs_{(when or datetime.now()).strftime('%Y%m%d_%H%M%S')}.jsonl")
+
+
+def change_log_path(snapshot):
+    directory, name = os.path.split(snapshot)
+    return os.path.join(directory, name.replace('programs_', 'changes_', 1))
+
+
+def latest_snapshots(directory=SNAPSHOT_DIR, count=2):
+    # Snapshot names sort by time
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if name.startswith('programs_') and name.endswith('.jsonl'))
+    return [os.path.join(directory, name) for name in names[-count:]]
+
+
+def snapshot_file(name, scratch):
+    # name as it is if it is a file; a version ID is materialized into scratch first
+    match = VERSION_ID.match(name)
+    if os.path.exists(name) or not match:
+        return name
+    from snapshot_versions import VersionStore
+    path = os.path.join(scratch, f"v{int(match.group(1)):04d}.jsonl")
+    VersionStore().materialize(int(match.group(1)), path)
+    return path
+
+
+def _entries(path):
+    # (id, hash, raw line) in file order; the line is only decoded when the hashes differ
+    with open(path, 'rb') as f:
+        for line in f:
+            match = ENTRY_PREFIX.match(line)
+            if match:
+                yield json.loads(b'"' + match.group(1) + b'"'), match.group(2).decode('ascii'), line
+            elif line.strip():
+                entry = json.loads(line)
+                yield entry['id'], entry['hash'], line
+
+
+def _decode(line, codec):
+    entry = json.loads(line)
+    if codec is not None:
+        entry['record'] = codec.decode(entry['record'])
+    return entry
+
+
+def _canonical(value):
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def field_change(old, new):
+    # Lists (admission reports, deadlines, tags) are reported as the items added and removed
+    if isinstance(old, list) and isinstance(new, list):
+        old_items = {_canonical(item): item for item in old}
+        new_items = {_canonical(item): item for item in new}
+        return {'added': [item for key, item in new_items.items() if key not in old_items],
+                'removed': [item for key, item in old_items.items() if key not in new_items]}
+    return {'old': old, 'new': new}
+
+
+def _label(record):
+    return {key: record[key] for key in ('Title', 'Program Name', 'University') if record.get(key)}
+
+
+def diff_snapshots(old_path, new_path):
+    # Merge join of two ID-sorted snapshots; yields one change per added, removed or modified program
+    old_codec, new_codec = store_codec(old_path), store_codec(new_path)
+    old_entries, new_entries = _entries(old_path), _entries(new_path)
+    old, new = next(old_entries, None), next(new_entries, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            yield {'change': 'removed', 'id': old[0], **_label(_decode(old[2], old_codec)['record'])}
+            old = next(old_entries, None)
+        elif old is None or new[0] < old[0]:
+            yield {'change': 'added', 'id': new[0], **_label(_decode(new[2], new_codec)['record'])}
+            new = next(new_entries, None)
+        else:
+            if old[1] != new[1]:
+                before, after = _decode(old[2], old_codec), _decode(new[2], new_codec)
+                changed = [field for field in before['fields'].keys() | after['fields'].keys()
+                           if before['fields'].get(field) != after['fields'].get(field)]
+                yield {'change': 'modified', 'id': new[0], **_label(after['record']),
+                       'fields': {field: field_change(before['record'].get(field), after['record'].get(field)) for field in sorted(changed)}}
+            old, new = next(old_entries, None), next(new_entries, None)
+
+
+def write_change_log(changes, path):
+    # One JSON line per change; returns counts of changes and of modified fields
+    summary = Counter()
+    fields = Counter()
+    with open(path, 'w', encoding='utf-8') as f:
+        for change in changes:
+            summary[change['change']] += 1
+            fields.update(list(change.get('fields', ())))
+            f.write(json.dumps(change, ensure_ascii=False, default=str) + '\n')
+    return {'added': summary['added'], 'removed': summary['removed'], 'modified': summary['modified'],
+            'fields': dict(fields.most_common())}
+
+
+def main():
+    if len(sys.argv) < 4 or sys.argv[1] not in ('snapshot', 'diff'):
+        print("Usage: python snapshot_diff.py snapshot <store.jsonl|program_data.json|master_programs_final.csv> <snapshot.jsonl>")
+        print("       python snapshot_diff.py diff <old snapshot.jsonl|version> <new snapshot.jsonl|version> [changes.jsonl]")
+        sys.exit(1)
+    if sys.argv[1] == 'snapshot':
+        source = sys.argv[2]
+        write_snapshot(ProgramStore(source) if source.endswith('.jsonl') else source, sys.argv[3])
+    else:
+        output = sys.argv[4] if len(sys.argv) > 4 else 'changes.jsonl'
+        with tempfile.TemporaryDirectory() as scratch:
+            old, new = (snapshot_file(name, scratch) for name in sys.argv[2:4])
+            summary = write_change_log(diff_snapshots(old, new), output)
+        logging.info(f"{sys.argv[2]} -> {sys.argv[3]}: {summary}; change log in {output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
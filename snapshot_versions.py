@@ -0,0 +1,251 @@
+import json
+import logging
+import os
+import pickle
+import shutil
+import sys
+import time
+from datetime import datetime
+
+from program_store import DICT_SUFFIX, ENTRY_PREFIX, ProgramStore, store_codec
+from snapshot_diff import write_snapshot
+
+# Every crawl's snapshot kept as a version without storing every crawl in full.
+# The first version, and every KEYFRAME_EVERY-th after it, is a full snapshot
+# (a keyframe); the versions in between only hold the records that were added
+# or changed and the IDs that were removed. A version is rebuilt from its
+# nearest keyframe plus at most KEYFRAME_EVERY - 1 deltas, and a per-program
+# index of the versions in which each record changed answers field history
+# questions by seeking to those lines only.
+
+VERSIONS_DIR = 'versions'
+KEYFRAME_EVERY = 10
+# Records in a keyframe or delta file are compressed with this dictionary when there is one
+DICT_NAME = 'programs'
+
+
+def _entry_id(line):
+    match = ENTRY_PREFIX.match(line)
+    if match:
+        return json.loads(b'"' + match.group(1) + b'"'), match.group(2).decode('ascii')
+    entry = json.loads(line)
+    return entry['id'], entry['hash']
+
+
+class VersionStore:
+    def __init__(self, directory=VERSIONS_DIR, keyframe_every=KEYFRAME_EVERY):
+        self.directory = directory
+        self.keyframe_every = keyframe_every
+        self.index_path = os.path.join(directory, 'index.pkl')
+        self.codec = store_codec(os.path.join(directory, DICT_NAME))
+        # versions: [{'version', 'created', 'kind', 'file', 'programs', 'changed', 'removed'}]
+        # latest: id -> record hash in the newest version
+        # changes: id -> [(version, offset)] for every version that added, changed (offset) or removed (None) it
+        self.versions = []
+        self.latest = {}
+        self.changes = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                saved = pickle.load(f)
+            self.versions, self.latest, self.changes = saved['versions'], saved['latest'], saved['changes']
+
+    def save(self):
+        with open(self.index_path + '.tmp', 'wb') as f:
+            pickle.dump({'versions': self.versions, 'latest': self.latest, 'changes': self.changes}, f)
+        os.replace(self.index_path + '.tmp', self.index_path)
+        with open(os.path.join(self.directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.versions, f, indent=1)
+
+    def __len__(self):
+        return len(self.versions)
+
+    def _path(self, version):
+        return os.path.join(self.directory, self.versions[version]['file'])
+
+    def _recoder(self, snapshot):
+        # None when the snapshot's lines can be copied as they are (same dictionary, or none on either side);
+        # otherwise a function that re-encodes a line from the snapshot's dictionary to the store's
+        source = store_codec(snapshot)
+        if self.codec is None and source is not None and not self.versions:
+            shutil.copyfile(snapshot + DICT_SUFFIX, os.path.join(self.directory, DICT_NAME + DICT_SUFFIX))
+            self.codec = source
+        if source is None and self.codec is None:
+            return None
+        if source is not None and self.codec is not None and source.dictionary.as_bytes() == self.codec.dictionary.as_bytes():
+            return None
+
+        def recode(line):
+            entry = json.loads(line)
+            record = source.decode(entry['record']) if source is not None else entry['record']
+            entry['record'] = self.codec.encode(record) if self.codec is not None else record
+            return (json.dumps(entry, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+        return recode
+
+    def add_version(self, snapshot, created=None):
+        # snapshot: a file written by snapshot_diff.write_snapshot (sorted by ID, hashed)
+        os.makedirs(self.directory, exist_ok=True)
+        version = len(self.versions)
+        recode = self._recoder(snapshot)
+        keyframe = version % self.keyframe_every == 0
+        name = f"v{version:04d}.{'full' if keyframe else 'delta'}.jsonl"
+        path = os.path.join(self.directory, name)
+        seen = set()
+        changed = 0
+        with open(snapshot, 'rb') as source, open(path + '.tmp', 'wb') as out:
+            for line in source:
+                if not line.strip():
+                    continue
+                record_id, digest = _entry_id(line)
+                seen.add(record_id)
+                is_change = self.latest.get(record_id) != digest
+                if keyframe or is_change:
+                    offset = out.tell()
+                    out.write(recode(line) if recode else line)
+                    if is_change:
+                        self.changes.setdefault(record_id, []).append((version, offset))
+                        self.latest[record_id] = digest
+                        changed += 1
+            removed = sorted(set(self.latest) - seen)
+            if not keyframe:
+                # Removals are delta lines of their own; a keyframe simply no longer lists them
+                for record_id in removed:
+                    out.write((json.dumps({'id': record_id, 'removed': True}) + '\n').encode('utf-8'))
+            for record_id in removed:
+                self.changes.setdefault(record_id, []).append((version, None))
+                del self.latest[record_id]
+        os.replace(path + '.tmp', path)
+        self.versions.append({
+            'version': version,
+            'created': (created or datetime.now()).isoformat(timespec='seconds'),
+            'kind': 'full' if keyframe else 'delta',
+            'file': name,
+            'programs': len(self.latest),
+            'changed': changed,
+            'removed': len(removed),
+        })
+        self.save()
+        logging.info(f"Stored version {version} ({self.versions[-1]['kind']}): {changed} added or changed, {len(removed)} removed")
+        return version
+
+    def _lines(self, version):
+        # (id, raw line or None for a removal) from one version's file, in ID order for keyframes
+        with open(self._path(version), 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                if line.startswith(b'{"id": ') and line.rstrip().endswith(b'"removed": true}'):
+                    yield json.loads(line)['id'], None
+                else:
+                    yield _entry_id(line)[0], line
+
+    def materialize(self, version, path):
+        # Writes version as a snapshot: its keyframe streamed, with the deltas since applied on top
+        if not 0 <= version < len(self.versions):
+            raise ValueError(f"No version {version}; the store has versions 0 to {len(self.versions) - 1}")
+        keyframe = max(number for number in range(version + 1) if self.versions[number]['kind'] == 'full')
+        overrides = {}
+        for delta in range(keyframe + 1, version + 1):
+            overrides.update(self._lines(delta))
+        pending = sorted(overrides)
+        position = 0
+        count = 0
+        with open(path + '.tmp', 'wb') as out:
+            for record_id, line in self._lines(keyframe):
+                while position < len(pending) and pending[position] < record_id:
+                    if overrides[pending[position]] is not None:
+                        out.write(overrides[pending[position]])
+                        count += 1
+                    position += 1
+                if position < len(pending) and pending[position] == record_id:
+                    line = overrides[record_id]
+                    position += 1
+                if line is not None:
+                    out.write(line)
+                    count += 1
+            for record_id in pending[position:]:
+                if overrides[record_id] is not None:
+                    out.write(overrides[record_id])
+                    count += 1
+        os.replace(path + '.tmp', path)
+        if self.codec is not None:
+            shutil.copyfile(os.path.join(self.directory, DICT_NAME + DICT_SUFFIX), path + DICT_SUFFIX)
+        return count
+
+    def _read(self, version, offset):
+        with open(self._path(version), 'rb') as f:
+            f.seek(offset)
+            entry = json.loads(f.readline())
+        if self.codec is not None:
+            entry['record'] = self.codec.decode(entry['record'])
+        return entry
+
+    def history(self, record_id, field):
+        # [(version, created, value)] each time the field took a new value; None once the program was removed
+        history = []
+        previous_hash = object()
+        for version, offset in self.changes.get(record_id, []):
+            created = self.versions[version]['created']
+            if offset is None:
+                history.append((version, created, None))
+                previous_hash = None
+                continue
+            entry = self._read(version, offset)
+            field_hash = entry.get('fields', {}).get(field)
+            if field_hash != previous_hash or field_hash is None:
+                value = entry['record'].get(field)
+                if not history or history[-1][2] != value:
+                    history.append((version, created, value))
+            previous_hash = field_hash
+        return history
+
+    def stats(self):
+        sizes = sum(os.path.getsize(self._path(version)) for version in range(len(self.versions)))
+        return {
+            'versions': len(self.versions),
+            'keyframes': sum(1 for version in self.versions if version['kind'] == 'full'),
+            'programs': len(self.latest),
+            'megabytes': round(sizes / 1e6, 2),
+        }
+
+
+def main():
+    commands = ('add', 'materialize', 'history', 'list')
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print("Usage: python snapshot_versions.py add <snapshot.jsonl|store.jsonl|program_data.json|master_programs_final.csv>")
+        print("       python snapshot_versions.py materialize <version> <output snapshot.jsonl>")
+        print("       python snapshot_versions.py history <program id> <field>")
+        print("       python snapshot_versions.py list")
+        sys.exit(1)
+    versions = VersionStore()
+    command = sys.argv[1]
+    if command == 'add':
+        source = sys.argv[2]
+        with open(source, 'rb') as f:
+            first = f.readline()
+        if source.endswith('.jsonl') and b'"fields": ' in first:
+            versions.add_version(source)
+        else:
+            # Anything else is turned into a snapshot first
+            os.makedirs(versions.directory, exist_ok=True)
+            snapshot = os.path.join(versions.directory, 'incoming.jsonl')
+            write_snapshot(ProgramStore(source) if source.endswith('.jsonl') else source, snapshot)
+            versions.add_version(snapshot)
+            for path in (snapshot, snapshot + DICT_SUFFIX):
+                if os.path.exists(path):
+                    os.remove(path)
+    elif command == 'materialize':
+        started = time.perf_counter()
+        count = versions.materialize(int(sys.argv[2]), sys.argv[3])
+        logging.info(f"Wrote version {sys.argv[2]} ({count} programs) to {sys.argv[3]} in {time.perf_counter() - started:.2f} s")
+    elif command == 'history':
+        for version, created, value in versions.history(sys.argv[2], sys.argv[3]):
+            print(f"v{version} {created}: {json.dumps(value, ensure_ascii=False)}")
+    else:
+        for version in versions.versions:
+            print(json.dumps(version))
+        logging.info(f"{versions.stats()}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
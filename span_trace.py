@@ -0,0 +1,217 @@
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+# Span tracing for the scrapers: where a listing page's or a program's time
+# goes (driver launch, page load, waits, sleeps, parsing, lock waits).
+#
+#     with span('detail.get', program=link):
+#         driver.get(link)
+#
+# Spans are appended to a buffer owned by the recording thread, so recording
+# takes no lock; when tracing is off, span() returns a shared no-op object.
+# stop_tracing() writes Chrome trace-event JSON (open it in ui.perfetto.dev or
+# chrome://tracing) and a per-phase summary table next to it.
+
+logger = logging.getLogger('span_trace')
+
+# Spans kept for the timeline per run; the summary keeps counting after that
+MAX_EVENTS = 1_000_000
+
+_tracer = None
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _ThreadBuffer:
+    __slots__ = ('tid', 'name', 'events', 'stack', 'totals')
+
+    def __init__(self):
+        thread = threading.current_thread()
+        self.tid = threading.get_native_id()
+        self.name = thread.name
+        self.events = []
+        # child time of each open span, for self time
+        self.stack = []
+        # name -> [count, total ns, self ns, max ns]
+        self.totals = defaultdict(lambda: [0, 0, 0, 0])
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'buffer', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.buffer = self.tracer.buffer()
+        self.buffer.stack.append(0)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter_ns() - self.start
+        buffer = self.buffer
+        children = buffer.stack.pop()
+        if buffer.stack:
+            buffer.stack[-1] += duration
+        totals = buffer.totals[self.name]
+        totals[0] += 1
+        totals[1] += duration
+        totals[2] += duration - children
+        if duration > totals[3]:
+            totals[3] = duration
+        if self.tracer.keep_event():
+            if exc_type is not None:
+                self.args = dict(self.args, error=exc_type.__name__)
+            buffer.events.append((self.name, self.start, duration, self.args))
+        return False
+
+
+class Tracer:
+    def __init__(self, path='trace.json', max_events=MAX_EVENTS):
+        self.path = path
+        self.max_events = max_events
+        self.started = time.perf_counter_ns()
+        self.local = threading.local()
+        self.buffers = []
+        self.lock = threading.Lock()
+        self.events = 0
+        self.dropped = 0
+
+    def buffer(self):
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is None:
+            buffer = self.local.buffer = _ThreadBuffer()
+            with self.lock:
+                self.buffers.append(buffer)
+        return buffer
+
+    def keep_event(self):
+        # A racy count is fine here: the cap only bounds memory
+        if self.events >= self.max_events:
+            self.dropped += 1
+            return False
+        self.events += 1
+        return True
+
+    def span(self, name, args):
+        return _Span(self, name, args)
+
+    def trace_events(self):
+        pid = os.getpid()
+        for buffer in list(self.buffers):
+            yield {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': buffer.tid, 'args': {'name': buffer.name}}
+            for name, start, duration, args in list(buffer.events):
+                event = {'name': name, 'cat': name.split('.', 1)[0], 'ph': 'X', 'pid': pid, 'tid': buffer.tid,
+                         'ts': (start - self.started) / 1000, 'dur': duration / 1000}
+                if args:
+                    event['args'] = args
+                yield event
+
+    def write_trace(self, path=None):
+        # Streamed out event by event; a long run's timeline is never built as one list
+        path = path or self.path
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+            for position, event in enumerate(self.trace_events()):
+                f.write((',\n' if position else '') + json.dumps(event, ensure_ascii=False, default=str))
+            f.write('\n]}\n')
+        os.replace(path + '.tmp', path)
+        return path
+
+    def summary(self):
+        # name -> count, total/self seconds, mean and max milliseconds, summed over threads
+        merged = defaultdict(lambda: [0, 0, 0, 0])
+        for buffer in list(self.buffers):
+            for name, (count, total, self_time, longest) in list(buffer.totals.items()):
+                row = merged[name]
+                row[0] += count
+                row[1] += total
+                row[2] += self_time
+                row[3] = max(row[3], longest)
+        return {name: {'count': count, 'total_s': total / 1e9, 'self_s': self_time / 1e9,
+                       'mean_ms': total / count / 1e6, 'max_ms': longest / 1e6}
+                for name, (count, total, self_time, longest) in merged.items()}
+
+    def summary_table(self):
+        wall = (time.perf_counter_ns() - self.started) / 1e9
+        rows = sorted(self.summary().items(), key=lambda item: -item[1]['total_s'])
+        width = max([len(name) for name, _ in rows] + [5])
+        lines = [f"{'phase':<{width}} {'count':>8} {'total s':>10} {'self s':>10} {'mean ms':>10} {'max ms':>10}",
+                 '-' * (width + 52)]
+        for name, row in rows:
+            lines.append(f"{name:<{width}} {row['count']:>8} {row['total_s']:>10.2f} {row['self_s']:>10.2f} {row['mean_ms']:>10.1f} {row['max_ms']:>10.1f}")
+        lines.append(f"wall time {wall:.1f} s over {len(self.buffers)} threads; totals add up across threads"
+                     + (f"; {self.dropped} spans beyond {self.max_events} left out of the timeline" if self.dropped else ''))
+        return '\n'.join(lines)
+
+
+def span(name, **args):
+    tracer = _tracer
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.span(name, args)
+
+
+def traced(name):
+    # Decorator form of span() for whole functions
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextlib.contextmanager
+def traced_lock(lock, name):
+    # Holds lock like "with lock:", recording the wait for it as a span
+    with span(name):
+        lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def start_tracing(path='trace.json', max_events=MAX_EVENTS):
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(path, max_events)
+        logger.info(f"Span tracing on; timeline will be written to {path}")
+    return _tracer
+
+
+def stop_tracing():
+    # Writes the timeline and <trace>.summary.txt and logs the summary; safe to call when tracing is off
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is None:
+        return None
+    tracer.write_trace()
+    table = tracer.summary_table()
+    summary_path = os.path.splitext(tracer.path)[0] + '.summary.txt'
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        f.write(table + '\n')
+    logger.info(f"Trace written to {tracer.path} ({tracer.events} spans), summary in {summary_path}\n{table}")
+    return tracer
@@ -0,0 +1,113 @@
+import csv
+import json
+import logging
+import os
+import sys
+
+from program_store import ProgramStore
+
+# Streams a ProgramStore out to CSV, JSON lines, a JSON array or Parquet in
+# fixed-size batches, so an export holds one batch in memory rather than every
+# program plus a DataFrame copy of them.
+
+BATCH_SIZE = 1000
+
+
+def batches(records, size=BATCH_SIZE):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def store_columns(store):
+    # CSV and Parquet need every column up front; one pass collecting field names only
+    columns = {}
+    for record in store:
+        columns.update(dict.fromkeys(record))
+    return list(columns)
+
+
+def _cell(value):
+    # Lists and dicts are written as their repr, as DataFrame.to_csv did (normalize.parse_list_columns reads them back)
+    if isinstance(value, (list, dict)):
+        return repr(value)
+    return value
+
+
+def _write_csv(store, path, size):
+    columns = store_columns(store)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for batch in batches(store, size):
+            writer.writerows({key: _cell(value) for key, value in record.items()} for record in batch)
+
+
+def _write_jsonl(store, path, size):
+    with open(path, 'w', encoding='utf-8') as f:
+        for batch in batches(store, size):
+            f.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in batch))
+
+
+def _write_json(store, path, size):
+    # Same layout as program_data.json, written element by element
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        first = True
+        for batch in batches(store, size):
+            for record in batch:
+                f.write('\n' if first else ',\n')
+                f.write(json.dumps(record, ensure_ascii=False, indent=2))
+                first = False
+        f.write('\n]\n')
+
+
+def _write_parquet(store, path, size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = store_columns(store)
+    # Every column is text; nested values are stored as JSON
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for batch in batches(store, size):
+            arrays = [
+                pa.array([None if record.get(column) is None else
+                          json.dumps(record[column], ensure_ascii=False) if isinstance(record[column], (list, dict)) else str(record[column])
+                          for record in batch], pa.string())
+                for column in columns
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+WRITERS = {'.csv': _write_csv, '.jsonl': _write_jsonl, '.json': _write_json, '.parquet': _write_parquet}
+
+
+def export_store(store, path, batch_size=BATCH_SIZE):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"Cannot export to {path}: expected one of {', '.join(WRITERS)}")
+    # Written next to the target and renamed, so a failed export never leaves a truncated file behind
+    temp_path = path + '.tmp'
+    WRITERS[extension](store, temp_path, batch_size)
+    os.replace(temp_path, path)
+    logging.info(f"Exported {len(store)} programs from {store.path} to {path}")
+    return len(store)
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(f"Usage: python store_export.py <store.jsonl> <output{'|'.join(WRITERS)}> [batch size]")
+        sys.exit(1)
+    batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else BATCH_SIZE
+    export_store(ProgramStore(sys.argv[1]), sys.argv[2], batch_size)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
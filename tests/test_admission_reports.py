@@ -0,0 +1,39 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from admission_reports import build_report_table
+
+PROGRAM_DATA = os.path.join(os.path.dirname(__file__), '..', 'program_data.json')
+
+
+@pytest.fixture(scope='module')
+def table():
+    with open(PROGRAM_DATA, 'r', encoding='utf-8') as f:
+        return build_report_table(json.load(f), '2024-11-26T00:00:00')
+
+
+def test_every_result_is_parsed(table):
+    assert len(table) == 864
+    assert table['decision'].notna().all()
+    assert table['decision_date'].notna().all()
+
+
+def test_reject_is_a_whole_decision(table):
+    rejects = table[table['decision'] == 'Reject']
+    assert len(rejects) == 210
+    assert rejects['funding'].isna().all()
+    assert 'Rej' not in set(table['decision'].dropna())
+
+
+def test_empty_channel(table):
+    # "/AD无奖\n2024-04-19" and the like: no channel, but decision, funding and date are still read
+    no_channel = table[table['channel'].isna()]
+    assert len(no_channel) == 42
+    assert set(no_channel['decision']) == {'AD', 'Waiting'}
+    assert no_channel['funding'].isin(['无奖', '小奖']).sum() == 38
+    assert no_channel['decision_date'].notna().all()
+    assert table['funding'].dropna().isin(['无奖', '小奖']).all()
+    assert pd.api.types.is_datetime64_any_dtype(table['decision_date'])
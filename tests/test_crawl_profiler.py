@@ -0,0 +1,22 @@
+import pstats
+from concurrent.futures import ThreadPoolExecutor
+
+from crawl_profiler import DeterministicProfiler
+
+
+def parse_in_worker(count):
+    return sum(len(str(number)) for number in range(count))
+
+
+def test_cprofile_includes_worker_threads(tmp_path):
+    path = str(tmp_path / 'profile')
+    profiler = DeterministicProfiler(path).start()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert list(executor.map(parse_in_worker, [1000, 2000, 3000])) == [2890, 6890, 10890]
+    profiler.stop()
+    profiler.write()
+
+    # The work only ran on the pool's threads; their profiles are merged into the written stats
+    stats = pstats.Stats(f'{path}.pstats').stats
+    calls = {name: stat[1] for (_, _, name), stat in stats.items()}
+    assert calls['parse_in_worker'] == 3
@@ -0,0 +1,20 @@
+from near_duplicates import NearDuplicateIndex
+
+ABOUT = ('The Master of Science in Data Science trains students in statistics, machine learning and '
+         'large scale data systems through coursework, a capstone project and an industry practicum.')
+
+
+def program(link, university='Boston University'):
+    return {'Title': 'Data Science', 'University': university, 'Link': link, 'About': ABOUT}
+
+
+def test_sitemap_programs_are_matched_by_id_only():
+    index = NearDuplicateIndex()
+    assert index.add('a', program('https://example.com/a')) is None
+    assert index.add('b', program('https://example.com/b')) == 'a'
+    assert index.duplicate_of('b') == 'a'
+    assert index.duplicate_of('a') is None
+    assert index.duplicate_of('unseen') is None
+    # A third link with the same listing is skipped; a sitemap program has no university to match on
+    assert index.is_known_duplicate(program('https://example.com/c'))
+    assert not index.is_known_duplicate({'Title': 'Data Science', 'University': '', 'Link': 'https://example.com/c'})
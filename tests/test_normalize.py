@@ -0,0 +1,20 @@
+import pandas as pd
+
+from normalize import parse_money
+
+
+def money(*values):
+    columns, parsed = parse_money(pd.Series(values), 'fee')
+    return [(row.fee_min, row.fee_currency, row.fee_period) for row in columns.itertuples()], parsed.tolist()
+
+
+def test_words_after_the_amount_are_not_currency_codes():
+    rows, parsed = money('$40,000 per year', '$1,200 for full programme', '$30,000 PER YEAR')
+    assert rows == [(40000.0, 'USD', 'year'), (1200.0, 'USD', pd.NA), (30000.0, 'USD', 'year')]
+    assert parsed == [True, True, True]
+
+
+def test_iso_code_decides_the_currency():
+    rows, _ = money('1,500 USD per month', '15,000 EUR / year', 'CA$21,585 / year', 'EUR9,450')
+    assert [(low, currency) for low, currency, _ in rows] == [(1500.0, 'USD'), (15000.0, 'EUR'), (21585.0, 'CAD'), (9450.0, 'EUR')]
+    assert [period for _, _, period in rows][:3] == ['month', 'year', 'year']
@@ -0,0 +1,34 @@
+import os
+
+from offer_network import RecordedLogDriver, capture_admission_reports, capture_json_responses
+
+LOG = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'offer_network_log.json')
+
+
+def test_only_report_api_responses_are_read():
+    urls = [url for url, _ in capture_json_responses(RecordedLogDriver(LOG))]
+    # The PNG, the profile endpoint and the request without a response are skipped
+    assert urls == ['https://offer.1point3acres.com/api/programs/nyu-ds/reports?page=1',
+                    'https://offer.1point3acres.com/api/reports/9101']
+
+
+def test_report_rows():
+    reports = capture_admission_reports(RecordedLogDriver(LOG))
+    assert [report['标题'] for report in reports] == ['NYU 2024 MSDS 找校友啦', '【二硕选择】Penn SE 和 Brown DS求比较', '24Fall NYU DS offer']
+    first = reports[0]
+    assert first['报告时间'] == '2024-04-15'
+    assert first['学位/专业'] == 'MS\nDataScience/Analytics'
+    assert first['学期'] == '2024\nFall'
+    assert first['录取结果'] == '网申/AD无奖\n2024-03-10'
+
+
+def test_modal_background_replaces_table_row():
+    reports = capture_admission_reports(RecordedLogDriver(LOG))
+    # Report 9101 also came from the base64-encoded 详情 endpoint, whose background wins
+    first = reports[0]
+    assert first['本科学校名称'] == 'UCLA'
+    assert first['本科成绩和算法，排名'] == '3.82'
+    assert first['托福/雅思\n总分+单项(R+L+S+W)'] == '113'
+    # Empty background fields (gre: null) are not turned into columns
+    assert 'GRE/GMAT\n总分+单项(V+Q+AW)' not in first
+    assert '本科学校名称' not in reports[1]
@@ -0,0 +1,76 @@
+import os
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+from sitemap_discovery import discover_programs
+from unigo_crawler import make_session, serve_fixtures
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'sitemaps')
+
+
+@pytest.fixture
+def site():
+    server, root = serve_fixtures(FIXTURES)
+    yield root
+    server.shutdown()
+    server.server_close()
+
+
+def discover(site, session=None, **kwargs):
+    stats = {}
+    # The fixture server's listen backlog is 5; more workers than that only wait on dropped connects
+    programs = list(discover_programs(session or make_session(retries=0), roots=[f'{site}/sitemap.xml'], stats=stats, workers=4,
+                                      requests_per_second=0, **kwargs))
+    return programs, stats
+
+
+def paths_of(programs):
+    return [urlsplit(program['Link']).path for program in programs]
+
+
+def test_every_program_url_is_found_once(site):
+    programs, stats = discover(site, check=False)
+    paths = paths_of(programs)
+    # 500 in the gzipped sitemap and two more behind the nested index (10001 is listed in both); articles.xml is not read
+    assert len(paths) == 502
+    assert stats['sitemaps'] == 4
+    assert stats['programs'] == 502
+
+
+def test_only_us_masters_programs_are_yielded(site):
+    programs, stats = discover(site)
+    assert paths_of(programs) == ['/studies/10001/program-1.html', '/studies/10002/program-2.html', '/studies/30001/business-analytics.html']
+    # Toronto and Munich are left out by country, the Pre-Master course by degree
+    assert stats['non_us'] == 2
+    assert stats['not_master'] == 1
+    # The other listed programs have no saved page
+    assert stats['missing'] == 496
+    assert stats['programs'] == 3
+    # The checked page names the university, so the frontier can rank the program before its detail fetch
+    assert [(program['Title'], program['University']) for program in programs] == [
+        ('Data Science', 'Boston University'), ('Business Administration', 'University of Michigan'),
+        ('Business Analytics', 'New York University')]
+
+
+class FailingSession(requests.Session):
+    # A program page that cannot be fetched, as a timeout or 5xx after retries would
+    def __init__(self, failing):
+        super().__init__()
+        self.failing = failing
+
+    def get(self, url, **kwargs):
+        if url.endswith(self.failing):
+            raise requests.ConnectionError(f'{url} unreachable')
+        return super().get(url, **kwargs)
+
+
+def test_unchecked_programs_are_left_to_the_detail_stage(site):
+    programs, stats = discover(site, FailingSession('/studies/30002/computer-science.html'))
+    assert paths_of(programs)[-1] == '/studies/30002/computer-science.html'
+    # Known by its URL alone until the detail page is read
+    assert programs[-1]['Title'] == 'Computer Science'
+    assert programs[-1]['University'] == ''
+    assert stats['unchecked'] == 1
+    assert stats['non_us'] == 1
@@ -0,0 +1,40 @@
+import json
+import sys
+
+import snapshot_diff
+from program_store import ProgramStore, assign_program_id
+from snapshot_diff import write_snapshot
+from snapshot_versions import VersionStore
+
+
+def program(number, fee):
+    return assign_program_id({'Title': f'Program {number}', 'University': 'Example University',
+                              'Link': f'https://www.mastersportal.com/studies/{number}/program.html', 'Tuition Fee': fee})
+
+
+def test_diff_accepts_version_ids(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = ProgramStore('store.jsonl')
+    versions = VersionStore()
+    store.upsert_many([program(1, '10,000 USD'), program(2, '20,000 USD')])
+    write_snapshot(store, 'first.jsonl')
+    versions.add_version('first.jsonl')
+    store.upsert(program(2, '22,000 USD'))
+    store.upsert(program(3, '30,000 USD'))
+    write_snapshot(store, 'second.jsonl')
+    versions.add_version('second.jsonl')
+
+    # Version 0 only exists in the version store now; the newest snapshot is still a file
+    monkeypatch.setattr(sys, 'argv', ['snapshot_diff.py', 'diff', 'v0', 'second.jsonl', 'changes.jsonl'])
+    snapshot_diff.main()
+    with open('changes.jsonl', encoding='utf-8') as f:
+        changes = {change['Title']: change for change in map(json.loads, f)}
+    assert sorted(changes) == ['Program 2', 'Program 3']
+    assert changes['Program 2']['fields'] == {'Tuition Fee': {'old': '20,000 USD', 'new': '22,000 USD'}}
+    assert changes['Program 3']['change'] == 'added'
+
+    # Both sides can be versions
+    monkeypatch.setattr(sys, 'argv', ['snapshot_diff.py', 'diff', '0', 'v1', 'by_version.jsonl'])
+    snapshot_diff.main()
+    with open('changes.jsonl', encoding='utf-8') as before, open('by_version.jsonl', encoding='utf-8') as after:
+        assert before.read() == after.read()
@@ -0,0 +1,43 @@
+import json
+import os
+import sys
+
+import pytest
+
+import text_codec
+from program_store import DICT_SUFFIX, ProgramStore, assign_program_id
+from text_codec import TextCodec
+
+PROGRAM_DATA = os.path.join(os.path.dirname(__file__), '..', 'program_data.json')
+
+
+@pytest.fixture
+def records():
+    with open(PROGRAM_DATA, 'r', encoding='utf-8') as f:
+        return [assign_program_id(record) for record in json.load(f)]
+
+
+def train(path, monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['text_codec.py', 'train', path])
+    text_codec.main()
+
+
+def test_retrain_interrupted_before_the_rewrite(tmp_path, monkeypatch, records):
+    path = str(tmp_path / 'store.jsonl')
+    ProgramStore(path).upsert_many(records)
+    train(path, monkeypatch)
+    store = ProgramStore(path)
+    old = store.codec
+    expected = {record['Program ID']: record for record in store}
+
+    # What train does up to compact(): the old dictionary kept under its ID, the new one in its place
+    new = TextCodec.train(records[::2])
+    assert new.dictionary.dict_id() != old.dictionary.dict_id()
+    old.save(f"{path}{DICT_SUFFIX}.{old.dictionary.dict_id()}")
+    new.save(path + DICT_SUFFIX)
+    assert {record['Program ID']: record for record in ProgramStore(path)} == expected
+
+    # Training again finishes the job and drops the kept dictionary
+    train(path, monkeypatch)
+    assert {record['Program ID']: record for record in ProgramStore(path)} == expected
+    assert sorted(os.listdir(tmp_path)) == ['store.jsonl', 'store.jsonl.zdict']
@@ -0,0 +1,98 @@
+import csv
+import os
+
+import pytest
+import requests
+
+from unigo_crawler import INFO_COLUMNS, UnigoClient, scrape_all_states, serve_fixtures
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'unigo')
+
+
+@pytest.fixture
+def site():
+    server, root = serve_fixtures(FIXTURES)
+    yield f'{root}/colleges'
+    server.shutdown()
+    server.server_close()
+
+
+class FailingClient(UnigoClient):
+    # Fails the first fetch of each listed URL, as a timeout or 5xx after retries would
+    def __init__(self, failing):
+        super().__init__(requests_per_second=0)
+        self.failing = set(failing)
+
+    def get_soup(self, url):
+        for part in list(self.failing):
+            if url.endswith(part):
+                self.failing.discard(part)
+                raise requests.ConnectionError(f'{url} unreachable')
+        return super().get_soup(url)
+
+
+def crawl(url, directory, client=None):
+    reviews, info = str(directory / 'reviews.csv'), str(directory / 'info.csv')
+    stats = scrape_all_states(url, workers=2, state_workers=2, requests_per_second=0, reviews_file=reviews, info_file=info, client=client)
+    return stats, reviews, info
+
+
+def rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_crawl_over_fixture_site(site, tmp_path):
+    stats, reviews, info = crawl(site, tmp_path)
+    assert stats['states'] == 2
+    assert stats['colleges'] == 4
+    assert stats['reviews'] == 5
+    # Four extractors share each college page's single fetch and parse
+    assert stats['fetches_avoided'] == 12
+    assert len(rows(info)) == 4
+    assert len(rows(reviews)) == 5
+    # Listing page 2 of Alabama is followed
+    assert {row['University Name'] for row in rows(info)} == {'Alabama A & M University', 'Auburn University', 'Columbia College'}
+
+
+def test_resume_skips_done_colleges(site, tmp_path):
+    crawl(site, tmp_path)
+    stats, _, info = crawl(site, tmp_path)
+    assert stats['colleges'] == 0
+    assert stats['skipped'] == 4
+    assert len(rows(info)) == 4
+
+
+def test_failed_college_is_retried_on_resume(site, tmp_path):
+    stats, reviews, info = crawl(site, tmp_path, FailingClient(['/auburn-university']))
+    assert stats['failed'] == 1
+    assert stats['colleges'] == 3
+    assert 'Auburn University' not in {row['University Name'] for row in rows(info)}
+    assert 'Auburn University' not in {row['University Name'] for row in rows(reviews)}
+
+    stats, _, info = crawl(site, tmp_path)
+    assert stats['colleges'] == 1
+    assert stats['skipped'] == 3
+    assert sorted(row['University Name'] for row in rows(info)).count('Auburn University') == 1
+
+
+def test_notebook_info_file_gets_url_column(site, tmp_path):
+    # The notebook's info file has no 'University URL'; its rows can only be matched by name
+    legacy = [column for column in INFO_COLUMNS if column != 'University URL']
+    with open(tmp_path / 'info.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=legacy)
+        writer.writeheader()
+        writer.writerow({'University Name': 'Auburn University', 'Acceptance Rate': '81%'})
+
+    stats, _, info = crawl(site, tmp_path)
+    assert stats['skipped'] == 1
+    assert stats['colleges'] == 3
+    written = rows(info)
+    assert all('University URL' in row for row in written)
+    assert written[0]['University URL'] == '' and written[0]['Acceptance Rate'] == '81%'
+    assert all(row['University URL'].startswith('http://127.0.0.1') for row in written[1:])
+
+    # The new rows resume by URL, so the two colleges named Columbia College are told apart
+    stats, _, _ = crawl(site, tmp_path)
+    assert stats['colleges'] == 0
+    assert stats['skipped'] == 4
@@ -0,0 +1,42 @@
+from university_listing import parse_universities, parse_universities_find_next
+
+CARD = ('<article class="SearchUniversityCard"><h2 class="OrganisationName">{name}</h2>'
+        '<div class="Value">{location}</div><div class="Value">On campus</div>{ranking}'
+        '<span class="Label">Institution type</span><span class="Value">Public</span></article>')
+RANKING = '<span class="Label">Global Ranking</span><span class="Value">{}</span>'
+
+
+def page(*cards, before='', after=''):
+    return f'<html><body>{before}<main>{"".join(cards)}</main>{after}</body></html>'
+
+
+def test_single_card_ignores_values_outside_it():
+    html = page(CARD.format(name='Ohio State University', location='Columbus, OH, United States', ranking=RANKING.format(120)),
+                before='<div class="Value">Newsletter</div>', after='<div class="Value">Footer</div>')
+    assert parse_universities(html) == [{
+        'Name': 'Ohio State University', 'Location': 'Columbus, OH, United States', 'Mode of Delivery': 'On campus',
+        'Global Ranking': '120', 'Institution Type': 'Public',
+    }]
+
+
+def test_name_outside_a_card_is_skipped():
+    html = page(CARD.format(name='A', location='Boston', ranking=''),
+                '<h2 class="OrganisationName">Sponsored</h2><div class="Value">Elsewhere</div>')
+    assert [row['Name'] for row in parse_universities(html)] == ['A']
+
+
+def test_cards_without_the_card_class_are_split_by_name():
+    # Markup whose card class is not the expected one
+    card = CARD.replace('<article class="SearchUniversityCard">', '<li class="Result">').replace('</article>', '</li>')
+    html = page(card.format(name='A', location='Boston', ranking=RANKING.format(10)),
+                card.format(name='B', location='Austin', ranking=RANKING.format(45)),
+                after='<div class="Value">Footer</div>')
+    assert [(row['Name'], row['Location'], row['Global Ranking']) for row in parse_universities(html)] == [('A', 'Boston', '10'), ('B', 'Austin', '45')]
+
+
+def test_missing_field_is_not_taken_from_the_next_card():
+    html = page(CARD.format(name='A', location='Boston', ranking=''),
+                CARD.format(name='B', location='Austin', ranking=RANKING.format(45)))
+    assert [row['Global Ranking'] for row in parse_universities(html)] == ['N/A', '45']
+    # The notebook's find_next parser gave A the ranking of B
+    assert [row['Global Ranking'] for row in parse_universities_find_next(html)] == ['45', '45']
@@ -0,0 +1,32 @@
+import json
+
+import pandas as pd
+
+from program_store import ProgramStore
+from university_resolver import UniversityResolver, build_university_view
+
+
+def test_program_level_names_of_one_university_are_linked(tmp_path):
+    resolver = UniversityResolver(str(tmp_path / 'keys.json'))
+    key = resolver.resolve('Nanyang Technological University', '1point3acres')
+    assert resolver.resolve('Nanyang Technology University', '1point3acres') == key
+
+
+def test_institution_level_names_stay_apart(tmp_path):
+    resolver = UniversityResolver(str(tmp_path / 'keys.json'))
+    # unigo lists every college once, so these are two schools however alike their names
+    assert resolver.resolve('Columbia University', 'unigo') != resolver.resolve('Columbia College', 'unigo')
+
+
+def test_programs_are_counted_from_one_file_per_source(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    programs = [{'Program ID': str(number), 'University': 'Boston University'} for number in range(3)]
+    with open('program_data.json', 'w', encoding='utf-8') as f:
+        json.dump(programs, f)
+    # The crawler's store and the same programs exported to JSON, as both sit in the working directory
+    ProgramStore('program_data.jsonl').upsert_many(programs)
+    ProgramStore('master_programs_store.jsonl').upsert_many(programs)
+    pd.DataFrame(programs).to_csv('master_programs_final.csv', index=False)
+    view = build_university_view(UniversityResolver())
+    assert view.loc['boston university', '1point3acres programs'] == 3
+    assert view.loc['boston university', 'mastersportal_programs programs'] == 3
@@ -0,0 +1,203 @@
+import base64
+import glob
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+import zstandard
+
+# zstd compression of the long, repetitive fields of program records (About,
+# Programme Structure, requirements, admission reports) with a dictionary
+# trained on a sample of them. Every field value is compressed on its own, so
+# any single record can still be read without touching the others; the shared
+# dictionary is what makes such small frames compress well.
+# A ProgramStore compresses transparently when <store>.zdict exists next to it.
+# The store is JSON lines, so frames are kept base64-encoded, a third larger
+# than the frames themselves; measure() reports the ratio with and without it.
+# Every frame names the dictionary it was compressed with. While a store is
+# recompressed with a new dictionary the old one is kept as
+# <store>.zdict.<dictionary id>, so records of either kind can be read if the
+# rewrite is interrupted.
+
+LONG_TEXT_FIELDS = ('About', 'Program Structure', 'Other Requirements', 'admission_reports', 'General Ranking')
+# Values shorter than this stay plain; a frame header would outweigh the saving
+MIN_BYTES = 64
+DICT_SIZE = 112 * 1024
+LEVEL = 9
+MARKER = '$zstd'
+
+
+def _field_bytes(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def is_compressed(value):
+    return isinstance(value, dict) and len(value) == 1 and MARKER in value
+
+
+class TextCodec:
+    def __init__(self, dictionary=None, fields=LONG_TEXT_FIELDS, level=LEVEL, previous=()):
+        self.dictionary = dictionary
+        self.fields = fields
+        self.level = level
+        # dictionary id -> earlier dictionaries, only for reading records not yet recompressed
+        self.previous = {old.dict_id(): old for old in previous}
+        # zstd compressor/decompressor objects must not be shared between threads
+        self.local = threading.local()
+
+    @classmethod
+    def train(cls, records, fields=LONG_TEXT_FIELDS, dict_size=DICT_SIZE, sample_size=2000, level=LEVEL):
+        samples = [_field_bytes(record[field]) for record in records for field in fields if record.get(field)]
+        random.Random(0).shuffle(samples)
+        dictionary = zstandard.train_dictionary(dict_size, samples[:sample_size * len(fields)], level=level)
+        return cls(dictionary, fields, level)
+
+    @classmethod
+    def load(cls, path):
+        # The dictionary at path, plus any kept beside it by an interrupted recompression
+        with open(path, 'rb') as f:
+            dictionary = zstandard.ZstdCompressionDict(f.read())
+        previous = []
+        for old_path in previous_dictionaries(path):
+            with open(old_path, 'rb') as f:
+                previous.append(zstandard.ZstdCompressionDict(f.read()))
+        return cls(dictionary, previous=previous)
+
+    def save(self, path):
+        with open(path + '.tmp', 'wb') as f:
+            f.write(self.dictionary.as_bytes())
+        os.replace(path + '.tmp', path)
+
+    def _compressor(self):
+        compressor = getattr(self.local, 'compressor', None)
+        if compressor is None:
+            compressor = self.local.compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self.dictionary)
+        return compressor
+
+    def _decompressor(self, frame):
+        dict_id = zstandard.get_frame_parameters(frame).dict_id
+        dictionary = self.dictionary
+        if dict_id and (dictionary is None or dict_id != dictionary.dict_id()):
+            if dict_id not in self.previous:
+                raise ValueError(f"Record compressed with dictionary {dict_id}, which is neither the current one nor kept beside it")
+            dictionary = self.previous[dict_id]
+        decompressors = getattr(self.local, 'decompressors', None)
+        if decompressors is None:
+            decompressors = self.local.decompressors = {}
+        if dict_id not in decompressors:
+            decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary if dict_id else None)
+        return decompressors[dict_id]
+
+    def encode_value(self, value):
+        raw = _field_bytes(value)
+        if len(raw) < MIN_BYTES:
+            return value
+        return {MARKER: base64.b64encode(self._compressor().compress(raw)).decode('ascii')}
+
+    def decode_value(self, value):
+        if not is_compressed(value):
+            return value
+        frame = base64.b64decode(value[MARKER])
+        return json.loads(self._decompressor(frame).decompress(frame))
+
+    def encode(self, record):
+        encoded = dict(record)
+        for field in self.fields:
+            if encoded.get(field) and not is_compressed(encoded[field]):
+                encoded[field] = self.encode_value(encoded[field])
+        return encoded
+
+    def decode(self, record):
+        if not any(is_compressed(value) for value in record.values()):
+            return record
+        return {key: self.decode_value(value) for key, value in record.items()}
+
+
+def previous_dictionaries(path):
+    return sorted(old for old in glob.glob(glob.escape(path) + '.*') if old[len(path) + 1:].isdigit())
+
+
+def measure(codec, records):
+    # Compressed size of the long fields with the dictionary, without it, and encode/decode throughput
+    plain = TextCodec(None, codec.fields, codec.level)
+    raw_bytes = sum(len(_field_bytes(record[field])) for record in records for field in codec.fields if record.get(field))
+    started = time.perf_counter()
+    encoded = [codec.encode(record) for record in records]
+    encode_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for record in encoded:
+        codec.decode(record)
+    decode_seconds = time.perf_counter() - started
+
+    def stored_bytes(sample):
+        # As written to the store: compressed frames are base64 inside a {"$zstd": ...} JSON object
+        return sum(len(_field_bytes(record[field])) for record in sample for field in codec.fields if record.get(field))
+
+    def frame_bytes(sample):
+        # The zstd frames themselves (plain values as they are), i.e. before the base64 and JSON wrapping
+        return sum(len(base64.b64decode(record[field][MARKER])) if is_compressed(record[field]) else len(_field_bytes(record[field]))
+                   for record in sample for field in codec.fields if record.get(field))
+    with_dictionary = stored_bytes(encoded)
+    frames = frame_bytes(encoded)
+    without_dictionary = stored_bytes([plain.encode(record) for record in records])
+    return {
+        'records': len(records),
+        'raw_mb': round(raw_bytes / 1e6, 2),
+        'stored_mb': round(with_dictionary / 1e6, 2),
+        # Ratios are of the stored bytes, base64 included; ratio_frames is what zstd alone achieves
+        'ratio': round(raw_bytes / with_dictionary, 2) if with_dictionary else None,
+        'ratio_frames': round(raw_bytes / frames, 2) if frames else None,
+        'base64_overhead_mb': round((with_dictionary - frames) / 1e6, 2),
+        'ratio_without_dictionary': round(raw_bytes / without_dictionary, 2) if without_dictionary else None,
+        'encode_mb_s': round(raw_bytes / 1e6 / encode_seconds, 1) if encode_seconds else None,
+        'decode_mb_s': round(raw_bytes / 1e6 / decode_seconds, 1) if decode_seconds else None,
+    }
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ('train', 'stats'):
+        print("Usage: python text_codec.py train <store.jsonl>   (writes <store.jsonl>.zdict and recompresses the store)")
+        print("       python text_codec.py stats <store.jsonl|program_data.json>")
+        sys.exit(1)
+    from program_store import DICT_SUFFIX, ProgramStore
+    command, path = sys.argv[1], sys.argv[2]
+    if command == 'train' and not path.endswith('.jsonl'):
+        print("Train on a store; convert program_data.json first with 'python program_store.py import'")
+        sys.exit(1)
+
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        store = None
+    else:
+        store = ProgramStore(path)
+        records = list(store)
+
+    if command == 'train' or store is None or store.codec is None:
+        codec = TextCodec.train(records)
+        logging.info(f"Trained a {len(codec.dictionary)}-byte dictionary on {len(records)} records")
+    else:
+        codec = store.codec
+    if command == 'train':
+        before = os.path.getsize(path)
+        dict_path = path + DICT_SUFFIX
+        if store.codec is not None:
+            # The old dictionary is kept under its ID until every record has been rewritten, so a store
+            # interrupted during compact() still reads, whichever dictionary each record was written with
+            store.codec.save(f"{dict_path}.{store.codec.dictionary.dict_id()}")
+        # The new dictionary goes to disk before any record is written with it
+        codec.save(dict_path)
+        store.compact(codec)
+        for old_path in previous_dictionaries(dict_path):
+            os.remove(old_path)
+        logging.info(f"Recompressed {path}: {before / 1e6:.2f} MB -> {os.path.getsize(path) / 1e6:.2f} MB")
+    logging.info(f"Long-text fields: {measure(codec, records)}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
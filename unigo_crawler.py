@@ -0,0 +1,433 @@
+import argparse
+import csv
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# unigo.com college reviews and general information, moved out of the
+# notebook's scrape_all_states. All requests share one pooled keep-alive
+# session with timeouts; state listings and college pages are fetched by
+# bounded worker pools under a per-host rate limit, and every college is
+# appended to the CSVs as soon as it is done instead of rewriting them per state.
+
+logger = logging.getLogger('unigo_crawler')
+
+UNIGO_URL = 'https://www.unigo.com/colleges'
+REVIEWS_FILE = 'universities_all_states_reviews.csv'
+INFO_FILE = 'universities_all_states_info.csv'
+
+REVIEW_COLUMNS = ['Reviewer', 'Date', 'Rating (%)', 'Review Text', 'University Name']
+# Same column order as the notebook's output, so existing files can be appended to
+INFO_COLUMNS = [
+    'Acceptance Rate', 'Application Deadline', 'Application Fee', 'SAT Range', 'ACT Range',
+    'How would you rate on-campus housing?', 'How would you rate off-campus housing?',
+    'How would you rate campus food?', 'How would you rate campus facilities?',
+    'How would you rate class size?', 'How would you rate school activities?',
+    'How would you rate local services?', 'How would you rate academics?',
+    'University Name', 'Student Life Reviews', 'General Info', 'Table', 'Quick Facts', 'University URL',
+]
+
+EMPTY_REVIEW = {'Reviewer': 'None', 'Date': 'None', 'Rating (%)': 'None', 'Review Text': 'None'}
+
+# (connect, read) seconds; the notebook had no timeout and could hang on one college forever
+TIMEOUT = (5, 30)
+
+
+class HostRateLimiter:
+    # Minimum spacing between requests to the same host, shared by all worker threads
+    def __init__(self, requests_per_second=2.0):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def make_session(pool_size=16, retries=3):
+    session = requests.Session()
+    session.headers['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    retry = Retry(total=retries, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=['GET'])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class UnigoClient:
+    def __init__(self, session=None, requests_per_second=2.0, timeout=TIMEOUT):
+        self.session = session or make_session()
+        self.rate_limiter = HostRateLimiter(requests_per_second)
+        self.timeout = timeout
+
+    def get_soup(self, url):
+        self.rate_limiter.wait(url)
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return BeautifulSoup(response.text, 'html.parser')
+
+    def close(self):
+        self.session.close()
+
+
+def join_url(base, href):
+    if href.startswith(('http://', 'https://')):
+        return href
+    return f'{base.rstrip("/")}/{href.lstrip("/")}'
+
+
+def parse_state_links(soup):
+    return [(link.text, link['href']) for link in soup.select('div.colleges-by-state-listing-columns a')]
+
+
+def parse_college_links(soup):
+    return [(link.text, link['href']) for link in soup.select('div.col-md-6 a')]
+
+
+def has_next_page(soup):
+    pagination = soup.find('div', {'class': 'pagination'})
+    return bool(pagination and pagination.find('a', {'class': 'next'}))
+
+
+def parse_reviews(soup):
+    reviews_container = soup.find('div', {'class': 'reviews-list'})
+    if not reviews_container:
+        return [dict(EMPTY_REVIEW)]
+    reviews = []
+    for review_div in reviews_container.find_all('div', {'class': 'overall-college-user-review-container'}):
+        reviewer = review_div.find('strong').text.strip() if review_div.find('strong') else 'None'
+        date = review_div.find('span').text.strip() if review_div.find('span') else 'None'
+        rating_div = review_div.find('div', {'class': 'front-stars'})
+        rating = rating_div['style'].split(':')[1].strip().replace('%', '') if rating_div else 'None'
+        review_text = review_div.find('p').text.strip() if review_div.find('p') else 'None'
+        reviews.append({'Reviewer': reviewer, 'Date': date, 'Rating (%)': rating, 'Review Text': review_text})
+    return reviews
+
+
+def _info_container(soup):
+    return soup.find('div', {'class': 'college-general-information-container'})
+
+
+def parse_general_info(soup):
+    container = _info_container(soup)
+    if not container:
+        return {'General Info': 'None'}
+    table = container.find('table', {'class': 'table table-bordered'})
+    if not table:
+        return {'Table': 'None'}
+    data = {}
+    for row in table.find_all('tr'):
+        cols = row.find_all('td')
+        if len(cols) == 2:
+            data[cols[0].text.strip() or 'None'] = cols[1].text.strip() or 'None'
+    return data
+
+
+def parse_quick_facts(soup):
+    container = _info_container(soup)
+    if not container:
+        return {}
+    quick_facts = container.find('div', {'class': 'college_detail_supplemental_information_container'})
+    if not quick_facts:
+        return {'Quick Facts': 'None'}
+    data = {}
+    for fact in quick_facts.find_all('p'):
+        key_value = fact.get_text(separator=" ", strip=True).split(":", 1)
+        if len(key_value) == 2:
+            data[key_value[0].strip() or 'None'] = key_value[1].strip() or 'None'
+    return data
+
+
+def parse_ratings(soup):
+    container = _info_container(soup)
+    if not container:
+        return {}
+    student_life_reviews = container.find('ul', {'class': 'overall-ratings-list'})
+    if not student_life_reviews:
+        return {'Student Life Reviews': 'None'}
+    data = {}
+    for review in student_life_reviews.find_all('li'):
+        question = review.find('h4').text.strip() if review.find('h4') else 'None'
+        answer = review.find('p').text.strip() if review.find('p') else 'None'
+        data[question] = answer
+    return data
+
+
+# The parts of the general-information box, merged into one info row
+INFO_EXTRACTORS = ('general_info', 'quick_facts', 'ratings')
+
+
+class PagePipeline:
+    # Fetches and parses each page once and runs every registered extractor over the same soup.
+    # The notebook fetched and parsed a college page once per scrape_* function.
+    def __init__(self, client):
+        self.client = client
+        self.extractors = {}
+        self.stats = {'pages': 0, 'fetches': 0, 'parses': 0, 'extractions': 0, 'fetch_errors': 0, 'extract_errors': 0}
+        self.lock = threading.Lock()
+
+    def register(self, name, extractor):
+        self.extractors[name] = extractor
+        return extractor
+
+    def _count(self, **counts):
+        with self.lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def run(self, url):
+        # {extractor name: result}, or None when the page could not be fetched
+        try:
+            soup = self.client.get_soup(url)
+        except requests.RequestException as e:
+            logger.error(f'Error fetching {url}: {e}')
+            self._count(pages=1, fetch_errors=1)
+            return None
+        results = {}
+        errors = 0
+        for name, extract in self.extractors.items():
+            try:
+                results[name] = extract(soup)
+            except Exception as e:
+                logger.error(f'Extractor {name} failed on {url}: {e}')
+                errors += 1
+        self._count(pages=1, fetches=1, parses=1, extractions=len(self.extractors), extract_errors=errors)
+        return results
+
+    def avoided(self):
+        # Compared with one fetch and one parse per extractor per page
+        with self.lock:
+            saved = self.stats['pages'] * max(len(self.extractors) - 1, 0)
+        return {'fetches_avoided': saved, 'parses_avoided': saved}
+
+
+def college_pipeline(client):
+    pipeline = PagePipeline(client)
+    pipeline.register('reviews', parse_reviews)
+    pipeline.register('general_info', parse_general_info)
+    pipeline.register('quick_facts', parse_quick_facts)
+    pipeline.register('ratings', parse_ratings)
+    return pipeline
+
+
+def list_state_colleges(client, state_url, base_url):
+    # Every (name, url) on all of a state's listing pages
+    colleges = []
+    page_number = 1
+    while True:
+        try:
+            soup = client.get_soup(f"{state_url}?paged={page_number}")
+        except requests.RequestException as e:
+            logger.error(f'Error listing {state_url} page {page_number}: {e}')
+            break
+        links = parse_college_links(soup)
+        if not links:
+            break
+        colleges.extend((name, join_url(base_url, href)) for name, href in links)
+        if not has_next_page(soup):
+            break
+        page_number += 1
+    return colleges
+
+
+def migrate_header(path, columns):
+    # Adds columns missing from an existing file's header (the notebook's files have no 'University URL'),
+    # leaving them empty in the old rows; returns the file's columns
+    with open(path, newline='', encoding='utf-8') as f:
+        header = next(csv.reader(f), None) or []
+    missing = [column for column in columns if column not in header]
+    if not missing:
+        return header
+    header = header + missing
+    with open(path, newline='', encoding='utf-8') as f, open(path + '.tmp', 'w', newline='', encoding='utf-8') as out:
+        writer = csv.DictWriter(out, fieldnames=header)
+        writer.writeheader()
+        writer.writerows(csv.DictReader(f))
+    os.replace(path + '.tmp', path)
+    logger.info(f"Added columns {missing} to {path}")
+    return header
+
+
+class AppendCsv:
+    # Rows are appended and flushed one college at a time; the header is written only for a new file
+    def __init__(self, path, columns):
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            columns = migrate_header(path, columns)
+        self.columns = columns
+        self.file = open(path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=columns, extrasaction='ignore')
+        if not exists:
+            self.writer.writeheader()
+        self.unknown = set()
+
+    def write(self, rows):
+        for row in rows:
+            extra = set(row) - set(self.columns) - self.unknown
+            if extra:
+                logger.warning(f"Dropping fields not in {self.path}: {sorted(extra)}")
+                self.unknown |= extra
+            self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def read_done(path):
+    # Colleges already in the info file are skipped, so an interrupted crawl resumes where it stopped.
+    # Keyed on the page URL; rows written by the notebook have none and are matched on the (not unique) name.
+    urls, names = set(), set()
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return urls, names
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row.get('University URL'):
+                urls.add(row['University URL'])
+            else:
+                names.add(row.get('University Name'))
+    return urls, names
+
+
+def scrape_college(pipeline, name, url):
+    # (reviews, info row), or None when the page could not be fetched; nothing is written then,
+    # so the college is not recorded as done and the next run retries it
+    logger.info(f'Scraping: {url}')
+    results = pipeline.run(url)
+    if results is None:
+        return None
+    reviews = results.get('reviews') or [dict(EMPTY_REVIEW)]
+    info = {}
+    for extractor in INFO_EXTRACTORS:
+        info.update(results.get(extractor) or {})
+    for review in reviews:
+        review['University Name'] = name
+    info['University Name'] = name
+    info['University URL'] = url
+    return reviews, info
+
+
+def scrape_all_states(main_url=UNIGO_URL, workers=8, state_workers=2, requests_per_second=2.0,
+                      reviews_file=REVIEWS_FILE, info_file=INFO_FILE, client=None):
+    parts = urlsplit(main_url)
+    base_url = f'{parts.scheme}://{parts.netloc}'
+    client = client or UnigoClient(make_session(pool_size=workers + state_workers), requests_per_second)
+    pipeline = college_pipeline(client)
+    done_urls, done_names = read_done(info_file)
+    queued = set()
+    reviews_out = AppendCsv(reviews_file, REVIEW_COLUMNS)
+    info_out = AppendCsv(info_file, INFO_COLUMNS)
+    stats = {'states': 0, 'colleges': 0, 'skipped': 0, 'failed': 0, 'reviews': 0}
+
+    try:
+        state_links = parse_state_links(client.get_soup(main_url))
+        with ThreadPoolExecutor(state_workers, thread_name_prefix='state') as states, \
+                ThreadPoolExecutor(workers, thread_name_prefix='college') as colleges:
+            pending = {}
+            for state_name, state_url in state_links:
+                logger.info(f'Scraping state: {state_name}')
+                pending[states.submit(list_state_colleges, client, join_url(main_url, state_url), base_url)] = state_name
+            # State listings and college pages run side by side; the main thread only writes results
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    state_name = pending.pop(future)
+                    result = future.result()
+                    if state_name is None:
+                        if result is None:
+                            stats['failed'] += 1
+                            continue
+                        reviews, info = result
+                        reviews_out.write(reviews)
+                        info_out.write([info])
+                        stats['colleges'] += 1
+                        stats['reviews'] += len(reviews)
+                        continue
+                    stats['states'] += 1
+                    for name, url in result:
+                        if url in done_urls or name in done_names:
+                            stats['skipped'] += 1
+                            continue
+                        if url in queued:
+                            continue
+                        queued.add(url)
+                        pending[colleges.submit(scrape_college, pipeline, name, url)] = None
+    except requests.RequestException as e:
+        logger.error(f'Error: {e}')
+    finally:
+        reviews_out.close()
+        info_out.close()
+        client.close()
+    logger.info(f"Unigo crawl finished: {stats}")
+    logger.info(f"College pages: {pipeline.stats}, {pipeline.avoided()} with {len(pipeline.extractors)} extractors per page")
+    stats.update(pipeline.avoided())
+    return stats
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    # Serves a saved copy of the site: /colleges/x is read from x.html, and ?paged=N from pageN.html in the listing's directory
+    def translate_path(self, path):
+        parts = urlsplit(path)
+        page = parse_qs(parts.query).get('paged', ['1'])[0]
+        translated = super().translate_path(parts.path)
+        if page != '1' and os.path.isdir(translated):
+            return os.path.join(translated, f'page{page}.html')
+        if not os.path.exists(translated) and os.path.exists(translated + '.html'):
+            return translated + '.html'
+        return translated
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures(directory):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(FixtureHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scrape unigo.com college reviews and general information')
+    parser.add_argument('--url', default=UNIGO_URL, help='colleges-by-state page (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=8, help='concurrent college page fetches')
+    parser.add_argument('--state-workers', type=int, default=2, help='concurrent state listing crawls')
+    parser.add_argument('--requests-per-second', type=float, default=2.0, help='per-host request rate')
+    parser.add_argument('--reviews', default=REVIEWS_FILE)
+    parser.add_argument('--info', default=INFO_FILE)
+    parser.add_argument('--fixtures', help='serve this saved copy of the site locally and crawl it instead, e.g. fixtures/unigo')
+    args = parser.parse_args()
+
+    url = args.url
+    server = None
+    if args.fixtures:
+        server, root = serve_fixtures(args.fixtures)
+        url = f'{root}/colleges'
+    try:
+        scrape_all_states(url, args.workers, args.state_workers, args.requests_per_second, args.reviews, args.info)
+    finally:
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,239 @@
+import glob
+import html
+import logging
+import sys
+import time
+
+import pandas as pd
+from bs4 import BeautifulSoup, Tag
+
+# Parser for the mastersportal university search pages that produced
+# universities.csv. The notebook version looked up every field with
+# org.find_next(...) from the card's name, scanning forward through the rest of
+# the page and picking up the next card's value whenever a field was missing.
+# Here each card's container is found once and its elements are walked once.
+#
+# verify checks the parser against search pages saved from the site
+# (driver.page_source, as the notebook's get_html returns it) in
+# fixtures/mastersportal/, comparing every card with its universities.csv row;
+# it fails until at least one page has been saved there. No page could be
+# saved yet, so the card class is a guess; pages without it are split into
+# cards by the names themselves.
+
+FIELDS = ['Name', 'Location', 'Mode of Delivery', 'Global Ranking', 'Institution Type']
+# Labelled span values inside a card
+SPAN_FIELDS = {'Global Ranking': 'Global Ranking', 'Institution type': 'Institution Type'}
+# Class of the element that wraps one university on the search page; card_containers warns when names fall outside it
+CARD_CLASS = 'SearchUniversityCard'
+SAVED_PAGES = 'fixtures/mastersportal/*.html'
+
+
+def _has_class(element, name):
+    return name in (element.get('class') or ())
+
+
+def card_containers(soup, card_class=CARD_CLASS):
+    # (name, card) for every OrganisationName. The card is its card_class ancestor; a name outside any card is
+    # skipped rather than given the page (and every stray div.Value on it) as its card.
+    # The class has not been checked against a saved page, so when no name at all sits in such a card, each
+    # name's card is instead its largest ancestor that holds no other OrganisationName.
+    names = soup.select('h2.OrganisationName')
+    cards = []
+    skipped = 0
+    for name in names:
+        card = next((parent for parent in name.parents if _has_class(parent, card_class)), None)
+        if card is None:
+            skipped += 1
+            continue
+        cards.append((name, card))
+    if names and not cards:
+        logging.warning(f"No OrganisationName is inside a .{card_class} card; taking the largest ancestor of each name that holds no other name")
+        return ancestor_cards(names)
+    if skipped:
+        logging.warning(f"{skipped} OrganisationName elements are not inside a .{card_class} card; check the card class")
+    return cards
+
+
+def ancestor_cards(names):
+    # Every name marks its ancestors once, so a card is found without searching any subtree
+    counts = {}
+    for name in names:
+        for parent in name.parents:
+            counts[id(parent)] = counts.get(id(parent), 0) + 1
+    cards = []
+    for name in names:
+        card = name
+        for parent in name.parents:
+            if counts[id(parent)] > 1:
+                break
+            card = parent
+        cards.append((name, card))
+    return cards
+
+
+def parse_card(name, card):
+    university = dict.fromkeys(FIELDS, "N/A")
+    university['Name'] = name.text.strip()
+    values = []
+    pending_label = None
+    for element in card.descendants:
+        if not isinstance(element, Tag):
+            continue
+        if element.name == 'div' and _has_class(element, 'Value'):
+            values.append(element.text.strip())
+        elif element.name == 'span':
+            if _has_class(element, 'Value'):
+                if pending_label:
+                    university[pending_label] = element.text.strip()
+                    pending_label = None
+            elif element.string and element.string.strip() in SPAN_FIELDS:
+                pending_label = SPAN_FIELDS[element.string.strip()]
+    if values:
+        university['Location'] = values[0]
+    if len(values) > 1:
+        university['Mode of Delivery'] = values[1]
+    return university
+
+
+def parse_universities(html_text):
+    return extract_universities(BeautifulSoup(html_text, 'html.parser'))
+
+
+def extract_universities(soup):
+    cards = card_containers(soup)
+    if not cards:
+        logging.warning("No listings found. Verify the HTML structure and class names.")
+        return []
+    return [parse_card(name, card) for name, card in cards]
+
+
+def parse_universities_find_next(html_text):
+    return extract_universities_find_next(BeautifulSoup(html_text, 'html.parser'))
+
+
+def extract_universities_find_next(soup):
+    # The notebook's parser, kept only to verify and benchmark the card-scoped one
+    universities = []
+    organisation_names = soup.select('h2.OrganisationName')
+    location_elements = soup.select('div.Value')
+    if not organisation_names or not location_elements:
+        return universities
+    for org in organisation_names:
+        try:
+            name = org.text.strip()
+            location_element = org.find_next('div', class_='Value')
+            location = location_element.text.strip() if location_element else "N/A"
+            mode_of_delivery_element = location_element.find_next('div', class_='Value') if location_element else None
+            mode_of_delivery = mode_of_delivery_element.text.strip() if mode_of_delivery_element else "N/A"
+            global_ranking_element = org.find_next('span', string='Global Ranking').find_next('span', class_='Value')
+            global_ranking = global_ranking_element.text.strip() if global_ranking_element else "N/A"
+            institution_type_element = org.find_next('span', string='Institution type').find_next('span', class_='Value')
+            institution_type = institution_type_element.text.strip() if institution_type_element else "N/A"
+            universities.append({
+                'Name': name,
+                'Location': location,
+                'Mode of Delivery': mode_of_delivery,
+                'Global Ranking': global_ranking,
+                'Institution Type': institution_type
+            })
+        except AttributeError as e:
+            logging.error(f"Error parsing university entry: {e}")
+            continue
+    return universities
+
+
+def render_listing(rows):
+    # Synthetic search page in the card markup the parser expects, built from universities.csv rows;
+    # only used to benchmark at page sizes no saved page has
+    cards = []
+    for row in rows:
+        cards.append(
+            '<article class="SearchUniversityCard">'
+            f'<a href="#"><h2 class="OrganisationName">{html.escape(row["Name"])}</h2></a>'
+            '<div class="Facts">'
+            f'<div class="Fact"><div class="Label">Location</div><div class="Value">{html.escape(row["Location"])}</div></div>'
+            f'<div class="Fact"><div class="Label">Mode of delivery</div><div class="Value">{html.escape(row["Mode of Delivery"])}</div></div>'
+            '</div><div class="Rankings">'
+            f'<span class="Label">Global Ranking</span><span class="Value">{html.escape(row["Global Ranking"])}</span>'
+            f'<span class="Label">Institution type</span><span class="Value">{html.escape(row["Institution Type"])}</span>'
+            '</div></article>'
+        )
+    return '<html><body><header>' + '<nav><a href="#">link</a></nav>' * 50 + '</header><main>' + ''.join(cards) + '</main></body></html>'
+
+
+def load_rows(path='universities.csv'):
+    return pd.read_csv(path, dtype=str, keep_default_na=False)[FIELDS].to_dict('records')
+
+
+def verify(path='universities.csv', pages=None):
+    # Every card on the saved pages must parse to its universities.csv row, which the notebook scraped from such pages
+    pages = pages or sorted(glob.glob(SAVED_PAGES))
+    if not pages:
+        logging.error(f"No saved search pages match {SAVED_PAGES}; save a page's driver.page_source there first")
+        return False
+    expected = {row['Name']: row for row in load_rows(path)}
+    cards = mismatches = unknown = legacy_differs = 0
+    for page in pages:
+        with open(page, encoding='utf-8') as f:
+            page_html = f.read()
+        parsed = parse_universities(page_html)
+        if not parsed:
+            logging.error(f"{page}: no cards found")
+            mismatches += 1
+            continue
+        legacy = {row['Name']: row for row in parse_universities_find_next(page_html)}
+        for row in parsed:
+            cards += 1
+            if row['Name'] not in expected:
+                unknown += 1
+                continue
+            if row != expected[row['Name']]:
+                mismatches += 1
+                logging.warning(f"{page}: {row} differs from {expected[row['Name']]}")
+            if legacy.get(row['Name']) != row:
+                legacy_differs += 1
+    logging.info(f"{cards} cards on {len(pages)} saved pages: {mismatches} differ from {path}, {unknown} not in it; "
+                 f"find_next parses {legacy_differs} of them differently")
+    return mismatches == 0
+
+
+def benchmark(path='universities.csv', sizes=(20, 100, 500), repeat=5):
+    rows = load_rows(path)
+    for size in sizes:
+        page_html = render_listing((rows * (size // len(rows) + 1))[:size])
+        soup = BeautifulSoup(page_html, 'html.parser')
+        # Whole page (HTML parsing included) and field extraction alone on an already parsed page
+        for label, legacy, scoped, argument in (
+            ('page', parse_universities_find_next, parse_universities, page_html),
+            ('extraction', extract_universities_find_next, extract_universities, soup),
+        ):
+            timings = []
+            for parser in (legacy, scoped):
+                best = float('inf')
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    parser(argument)
+                    best = min(best, time.perf_counter() - started)
+                timings.append(best)
+            logging.info(
+                f"{size} cards, {label}: find_next {timings[0] * 1000:.1f} ms, "
+                f"card-scoped {timings[1] * 1000:.1f} ms ({timings[0] / timings[1]:.2f}x)"
+            )
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'verify'
+    path = sys.argv[2] if len(sys.argv) > 2 else 'universities.csv'
+    if command == 'verify':
+        sys.exit(0 if verify(path, sys.argv[3:]) else 1)
+    elif command == 'bench':
+        benchmark(path)
+    else:
+        print("Usage: python university_listing.py verify [universities.csv] [saved_page.html ...]")
+        print("       python university_listing.py bench [universities.csv]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,216 @@
+import json
+import logging
+import math
+import os
+import re
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+import pandas as pd
+
+from program_store import ProgramStore
+
+# Links the university names used by every data source to one key per
+# university. Names are normalized first, so "University of California--San
+# Diego" and "University of California-San Diego" are the same alias without
+# any scoring. The rest are compared only against aliases that share one of
+# their rarest tokens (an inverted index instead of N x M), and every decision
+# is kept in university_keys.json so later runs only score names they have not
+# seen before.
+
+KEYS_FILE = 'university_keys.json'
+OUTPUT_FILE = 'universities_resolved.pkl'
+
+# (source, files, name column); only the first file that exists is read, as the others hold the same
+# programs (a store and its export, or the export older runs wrote), and sources with none are skipped
+SOURCES = [
+    ('mastersportal', ('universities.csv',), 'Name'),
+    ('1point3acres', ('program_data.jsonl', 'program_data.json'), 'University'),
+    ('mastersportal_programs', ('master_programs_store.jsonl', 'master_programs_final.csv'), 'University'),
+    ('unigo', ('universities_all_states_info.csv',), 'University Name'),
+]
+# Sources that list each institution once; program-level sources repeat a university, spelled differently at times
+INSTITUTION_SOURCES = ('mastersportal', 'unigo')
+
+THRESHOLD = 0.85
+# Only the rarest tokens of a name are used to find candidates, and tokens shared by more aliases
+# than MAX_BLOCK ("university", "college") are too common to match on by themselves
+BLOCKING_TOKENS = 2
+MAX_BLOCK = 50
+STOP_TOKENS = {'the', 'of', 'and', 'at', 'in', 'for'}
+REPLACEMENTS = {'univ': 'university', 'u': 'university', 'coll': 'college', 'inst': 'institute', 'tech': 'technology', 'technological': 'technology', 'mt': 'mount', 'ft': 'fort'}
+
+
+def normalize_university(name):
+    text = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii').lower()
+    text = text.replace('&', ' and ').replace("'", '')
+    tokens = re.sub(r'[^a-z0-9]+', ' ', text).split()
+    normalized = []
+    for position, token in enumerate(tokens):
+        if token == 'st':
+            # "St. John's University" but "Ohio St"
+            token = 'state' if position == len(tokens) - 1 else 'saint'
+        normalized.append(REPLACEMENTS.get(token, token))
+    return ' '.join(token for token in normalized if token not in STOP_TOKENS)
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class UniversityResolver:
+    def __init__(self, path=KEYS_FILE, threshold=THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        # normalized name -> key, and key -> {'name': display name, 'sources': [...]}
+        self.aliases = {}
+        self.universities = {}
+        # token -> normalized aliases containing it
+        self.postings = defaultdict(set)
+        self.gram_cache = {}
+        self.stats = {'exact': 0, 'matched': 0, 'new': 0, 'comparisons': 0}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            self.universities = saved['universities']
+            for alias, key in saved['aliases'].items():
+                self._add_alias(alias, key)
+        # Aliases or sources added since the mapping was loaded or last saved
+        self.dirty = False
+
+    def _add_alias(self, alias, key):
+        self.aliases[alias] = key
+        self.dirty = True
+        for token in set(alias.split()):
+            self.postings[token].add(alias)
+
+    def _trigrams(self, alias):
+        grams = self.gram_cache.get(alias)
+        if grams is None:
+            grams = self.gram_cache[alias] = trigrams(alias)
+        return grams
+
+    def _weight(self, token):
+        return math.log(1 + len(self.aliases) / (1 + len(self.postings.get(token, ()))))
+
+    def score(self, left, right):
+        # IDF-weighted token Jaccard, so "columbia" counts for more than "college"; trigrams absorb typos.
+        # Token order is scored too: "Miami University" and "University of Miami" are different schools.
+        left_tokens, right_tokens = left.split(), right.split()
+        shared = sum(self._weight(token) for token in set(left_tokens) & set(right_tokens))
+        total = sum(self._weight(token) for token in set(left_tokens) | set(right_tokens))
+        left_grams, right_grams = self._trigrams(left), self._trigrams(right)
+        grams = len(left_grams & right_grams) / len(left_grams | right_grams)
+        order = SequenceMatcher(None, left_tokens, right_tokens, autojunk=False).ratio()
+        return 0.5 * (shared / total if total else 0.0) + 0.25 * grams + 0.25 * order
+
+    def candidates(self, alias):
+        postings = [self.postings[token] for token in set(alias.split()) if token in self.postings]
+        postings.sort(key=len)
+        block = set()
+        for posting in postings[:BLOCKING_TOKENS]:
+            if len(posting) > MAX_BLOCK and block:
+                break
+            block |= posting if len(posting) <= MAX_BLOCK else set()
+        return block
+
+    def resolve(self, name, source):
+        alias = normalize_university(name)
+        if not alias:
+            return None
+        key = self.aliases.get(alias)
+        if key is not None:
+            self.stats['exact'] += 1
+        else:
+            best, best_score = None, 0.0
+            for candidate in self.candidates(alias):
+                # An institution-level source lists each institution once, so two different names from it are two campuses or schools
+                if source in INSTITUTION_SOURCES and source in self.universities[self.aliases[candidate]]['sources']:
+                    continue
+                self.stats['comparisons'] += 1
+                candidate_score = self.score(alias, candidate)
+                if candidate_score > best_score:
+                    best, best_score = candidate, candidate_score
+            if best is not None and best_score >= self.threshold:
+                key = self.aliases[best]
+                self.stats['matched'] += 1
+            else:
+                key = alias
+                self.universities[key] = {'name': str(name).strip(), 'sources': []}
+                self.stats['new'] += 1
+            self._add_alias(alias, key)
+        if source not in self.universities[key]['sources']:
+            self.universities[key]['sources'].append(source)
+            self.dirty = True
+        return key
+
+    def resolve_all(self, names, source):
+        # Each distinct name is resolved once
+        keys = {name: self.resolve(name, source) for name in dict.fromkeys(names) if isinstance(name, str)}
+        return [keys.get(name) for name in names]
+
+    def save(self):
+        # Written aside and renamed, as the scraper saves it mid-run alongside its other state
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'aliases': self.aliases, 'universities': self.universities}, f, ensure_ascii=False, indent=1)
+        os.replace(self.path + '.tmp', self.path)
+        self.dirty = False
+
+
+def load_source(path):
+    if path.endswith('.jsonl'):
+        return pd.DataFrame(list(ProgramStore(path)))
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return pd.DataFrame(json.load(f))
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def build_university_view(resolver, sources=SOURCES):
+    # One row per university key: mastersportal and unigo fields side by side, plus program counts
+    frames = {}
+    for source, paths, column in sources:
+        path = next((path for path in paths if os.path.exists(path)), None)
+        if path is None:
+            continue
+        df = load_source(path)
+        if column not in df.columns:
+            continue
+        started = time.perf_counter()
+        df['University Key'] = resolver.resolve_all(df[column].tolist(), source)
+        logging.info(f"Resolved {df[column].nunique()} names from {path} in {time.perf_counter() - started:.2f} s")
+        frames[source] = df
+
+    view = pd.DataFrame(
+        [(key, university['name'], ', '.join(university['sources'])) for key, university in resolver.universities.items()],
+        columns=['University Key', 'University', 'Sources'],
+    ).set_index('University Key')
+    for source in ('mastersportal', 'unigo'):
+        if source in frames:
+            first = frames[source].dropna(subset=['University Key']).groupby('University Key').first()
+            view = view.join(first.add_prefix(f'{source}: '))
+    for source in ('1point3acres', 'mastersportal_programs'):
+        if source in frames:
+            view[f'{source} programs'] = frames[source].groupby('University Key').size().reindex(view.index).fillna(0).astype('int32')
+    return view
+
+
+def main():
+    output = sys.argv[1] if len(sys.argv) > 1 else OUTPUT_FILE
+    resolver = UniversityResolver()
+    started = time.perf_counter()
+    view = build_university_view(resolver)
+    resolver.save()
+    view.to_pickle(output)
+    logging.info(f"{len(view)} universities, {len(resolver.aliases)} aliases in {time.perf_counter() - started:.2f} s: {resolver.stats}")
+    linked = view['Sources'].str.contains(',').sum()
+    logging.info(f"{linked} universities appear in more than one source; mapping saved to {resolver.path}, view to {output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()